@@ -6,10 +6,11 @@ from objeções import views as objeções_views
 from marcas.busca_manager import BuscaManager, get_user_attr
 from form_agent import FormAgent
 from email_agent import EmailAgent
-from supabase_agent import SupabaseAgent
-from ui_components import apply_global_styles, render_login_screen, render_sidebar, limpar_formulario, limpar_session_state, limpar_cache_completo
+from supabase_agent import obter_supabase_agent
+from ui_components import apply_global_styles, render_login_screen, render_sidebar, limpar_formulario, limpar_session_state, limpar_cache_completo, render_painel_chamadas
 from config import carregar_configuracoes, configurar_logging
 from permission_manager import CargoPermissionManager
+from instrumentacao import medir_rerun, definir_pagina, PAGINA_LOGIN
 
 
 def get_user_id(user):
@@ -87,8 +88,8 @@ def main():
     config = carregar_configuracoes()
     configurar_logging()
 
-    # Criar agentes sem cache para evitar compartilhamento entre usuários
-    supabase_agent = SupabaseAgent()
+    # Agente Supabase compartilhado pelo processo (sem estado de usuário; o JWT fica na sessão)
+    supabase_agent = obter_supabase_agent()
     email_agent = EmailAgent(
         config["smtp_host"],
         config["smtp_port"],
@@ -113,6 +114,7 @@ def main():
     st.session_state.email_agent = email_agent
 
     if "user" not in st.session_state:
+        definir_pagina(PAGINA_LOGIN)
         render_login_screen(supabase_agent)
         return
 
@@ -129,8 +131,7 @@ def main():
     jwt_token = st.session_state.get('jwt_token', '')
     if not user_id or not jwt_token:
         st.error("Sessão inválida. Por favor, faça login novamente.")
-        # Limpar cache e session_state
-        st.cache_data.clear()
+        # Limpar session_state (e as listagens em cache do token)
         limpar_session_state()
         st.rerun()
 
@@ -141,13 +142,11 @@ def main():
         if not test_profile:
             st.error("Token expirado. Por favor, faça login novamente.")
             clear_user_cache(user_id)
-            st.cache_data.clear()
             limpar_session_state()
             st.rerun()
     except Exception as e:
         st.error("Erro de autenticação. Por favor, faça login novamente.")
         clear_user_cache(user_id)
-        st.cache_data.clear()
         limpar_session_state()
         st.rerun()
 
@@ -159,7 +158,6 @@ def main():
     if permissions_data is None:
         st.error(
             "Erro ao carregar permissões do usuário. Por favor, faça login novamente.")
-        st.cache_data.clear()
         limpar_session_state()
         st.rerun()
 
@@ -216,6 +214,10 @@ def main():
             }
         )
 
+        # Chamadas ao Supabase deste rerun agregadas na página escolhida
+        definir_pagina(escolha)
+        render_painel_chamadas()
+
         # Separador visual
         st.markdown(
             "<hr style='margin: 20px 0; border-color: #e0e0e0;'>", unsafe_allow_html=True)
@@ -382,4 +384,6 @@ def main():
 
 
 if __name__ == "__main__":
-    main()
+    # Cada execução do script é um rerun na instrumentação das chamadas ao Supabase
+    with medir_rerun():
+        main()
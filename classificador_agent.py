@@ -1,20 +1,45 @@
 import re
+import os
+import mmap
+import struct
+import hashlib
+import heapq
+import math
+import logging
 import PyPDF2
 import streamlit as st
 import json
-from typing import List, Dict
+from array import array
+from bisect import bisect_left, bisect_right
+from collections import Counter
+from collections.abc import Mapping, Sequence
+from typing import Callable, List, Dict, Iterable, Tuple
 import unicodedata
 
 
-@st.cache_resource(ttl=3600)  # Cache por 1 hora
-def carregar_classificador_inpi_json(json_path: str = "classificador_inpi_corrigido.json") -> List[Dict[str, str]]:
-    """Carrega o classificador INPI com cache otimizado"""
-    try:
-        with open(json_path, "r", encoding="utf-8") as f:
-            return json.load(f)
-    except Exception as e:
-        st.error(f"Erro ao carregar classificador: {e}")
-        return []
+# Tamanho dos n-gramas usados no índice de substrings
+TAMANHO_NGRAMA = 3
+
+# Similaridade mínima (Jaccard de trigramas, mesmo padrão do pg_trgm) para a busca tolerante a erros
+LIMIAR_SIMILARIDADE = 0.3
+
+# Quantidade padrão de resultados exibidos pela busca ranqueada
+LIMITE_RESULTADOS = 50
+
+# Quantidade padrão de sugestões do autocompletar
+LIMITE_SUGESTOES = 8
+
+# Parâmetros do BM25 usados no ranqueamento
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+# Peso (frequência equivalente) de cada tipo de acerto no ranqueamento
+PESO_PALAVRA_EXATA = 1.0
+PESO_PREFIXO_PALAVRA = 0.5
+PESO_SUBSTRING = 0.1
+
+_PADRAO_PALAVRA = re.compile(r"\w+")
+_PADRAO_ULTIMA_PALAVRA = re.compile(r"\w+$")
 
 
 def remover_acentos(texto: str) -> str:
@@ -22,22 +47,743 @@ def remover_acentos(texto: str) -> str:
     return ''.join(c for c in unicodedata.normalize('NFD', texto) if unicodedata.category(c) != 'Mn')
 
 
-@st.cache_data(ttl=300)  # Cache por 5 minutos
+def dobrar_texto(texto: str) -> str:
+    """Normaliza um texto para busca (minúsculas e sem acentos)"""
+    return remover_acentos(texto.lower())
+
+
+def gerar_ngramas(texto: str, tamanho: int = TAMANHO_NGRAMA) -> set:
+    """Retorna o conjunto de substrings de tamanho fixo de um texto"""
+    return {texto[i:i + tamanho] for i in range(len(texto) - tamanho + 1)}
+
+
+def extrair_palavras(texto_normalizado: str) -> List[str]:
+    """Separa um texto já normalizado em palavras"""
+    return _PADRAO_PALAVRA.findall(texto_normalizado)
+
+
+# Regras de plural (sobre o texto sem acentos), aplicadas na ordem: a primeira que casar vence
+_REGRAS_PLURAL = (
+    ("oes", "ao"), ("aes", "ao"), ("aos", "ao"),
+    ("ais", "al"), ("eis", "el"), ("ois", "ol"), ("uis", "ul"),
+    ("ns", "m"),
+    ("res", "r"), ("zes", "z"), ("ses", "s"),
+)
+
+
+def radical(palavra: str) -> str:
+    """
+    Analisador leve de português: reduz singular e plural de uma palavra
+    normalizada ao mesmo radical ("camisas" -> "camisa", "balões"/"balão" ->
+    "balao", "computadores" -> "computador", "padre"/"padres" -> "padr").
+    É aplicado igualmente na indexação e na consulta, então o radical não
+    precisa ser uma palavra real.
+    """
+    if len(palavra) <= 3 or palavra.isdigit():
+        return palavra
+
+    for sufixo, troca in _REGRAS_PLURAL:
+        if palavra.endswith(sufixo):
+            palavra = palavra[:-len(sufixo)] + troca
+            break
+    else:
+        if palavra[-1] == "s" and palavra[-2] in "aeiou":
+            palavra = palavra[:-1]
+
+    # "interesse"/"interesses", "padre"/"padres": o "e" final some nos dois
+    if len(palavra) > 3 and palavra[-1] == "e" and palavra[-2] in "rzs":
+        palavra = palavra[:-1]
+    return palavra
+
+
+def trigramas_palavra(palavra: str) -> set:
+    """Trigramas de uma palavra com bordas marcadas, no estilo do pg_trgm"""
+    return gerar_ngramas(f"  {palavra} ")
+
+
+class IndiceClassificador:
+    """
+    Índice invertido sobre as especificações já normalizadas.
+
+    Mapeia cada trigrama do texto normalizado para os ids das entradas que o
+    contêm e o prefixo numérico de cada especificação ("9 - ...") para os ids
+    da classe. A busca consulta apenas as entradas candidatas e confirma a
+    substring no texto pré-normalizado, preservando a semântica da varredura.
+
+    Para a busca aproximada, guarda também o vocabulário de palavras, as
+    entradas de cada palavra e os trigramas (com bordas) de cada palavra.
+    """
+
+    def __init__(self, secoes: Mapping[str, object]):
+        self.textos = secoes["textos"]
+        self.trigramas = secoes["trigramas"]
+        self.prefixos = secoes["prefixos"]
+        self.palavras = secoes["palavras"]
+        self.tokens = secoes["tokens"]
+        self.trigramas_palavras = secoes["trigramas_palavras"]
+        self.tamanhos = secoes["tamanhos"]
+        self.frequencias = secoes["frequencias"]
+        self.palavras_exibicao = secoes["palavras_exibicao"]
+        self.radicais = secoes["radicais"]
+        self._sugestoes_curtas = {}
+        self.media_tamanho = (sum(self.tamanhos) / len(self.tamanhos)) if len(self.tamanhos) else 1.0
+
+    @staticmethod
+    def construir_secoes(textos: Sequence, originais: Sequence = ()) -> Dict[str, object]:
+        """
+        Constrói as tabelas do índice a partir dos textos normalizados. Os
+        textos originais, quando informados, dão a grafia (com acentos)
+        exibida nas sugestões do autocompletar.
+        """
+        trigramas = {}
+        prefixos = {}
+        tokens = {}
+        tamanhos = []
+        for id_item, texto in enumerate(textos):
+            for grama in gerar_ngramas(texto):
+                trigramas.setdefault(grama, []).append(id_item)
+            if " " in texto:
+                prefixos.setdefault(texto.split(" ", 1)[0], []).append(id_item)
+            palavras_item = extrair_palavras(texto)
+            tamanhos.append(len(palavras_item))
+            for palavra in set(palavras_item):
+                tokens.setdefault(palavra, []).append(id_item)
+
+        # Grafia original mais comum de cada palavra normalizada
+        grafias = {}
+        for original in originais:
+            for palavra in _PADRAO_PALAVRA.findall(original.lower()):
+                grafias.setdefault(dobrar_texto(palavra), Counter())[palavra] += 1
+
+        palavras = sorted(tokens)
+        trigramas_palavras = {}
+        for id_palavra, palavra in enumerate(palavras):
+            for grama in trigramas_palavra(palavra):
+                trigramas_palavras.setdefault(grama, []).append(id_palavra)
+        frequencias = [len(tokens[palavra]) for palavra in palavras]
+
+        # Análise: as entradas de todas as variantes de uma palavra sob o mesmo radical
+        radicais = {}
+        for palavra in palavras:
+            radicais.setdefault(radical(palavra), set()).update(tokens[palavra])
+        radicais = {chave: sorted(ids) for chave, ids in radicais.items()}
+        palavras_exibicao = [
+            grafias[palavra].most_common(1)[0][0] if palavra in grafias else palavra
+            for palavra in palavras
+        ]
+
+        return {
+            "trigramas": trigramas,
+            "prefixos": prefixos,
+            "palavras": palavras,
+            "tokens": tokens,
+            "trigramas_palavras": trigramas_palavras,
+            "tamanhos": tamanhos,
+            "frequencias": frequencias,
+            "palavras_exibicao": palavras_exibicao,
+            "radicais": radicais,
+        }
+
+    def buscar_ids(self, termo: str) -> List[int]:
+        """
+        Retorna os ids (em ordem crescente) das entradas que casam com o termo.
+        Números buscam pelo prefixo da classe; demais termos por substring.
+        """
+        if not termo:
+            return []
+
+        termo_normalizado = dobrar_texto(termo)
+
+        # Se o termo é um número, buscar por "número - " ou "número " no início
+        if termo.isdigit():
+            return list(self.prefixos.get(termo_normalizado, ()))
+
+        # Termos curtos não formam trigramas: varre os textos já normalizados
+        if len(termo_normalizado) < TAMANHO_NGRAMA:
+            return self.ids_contendo(termo_normalizado)
+
+        # Parte da lista de candidatos mais curta e confirma a substring
+        menor = None
+        for grama in gerar_ngramas(termo_normalizado):
+            candidatos = self.trigramas.get(grama)
+            if not candidatos:
+                return []
+            if menor is None or len(candidatos) < len(menor):
+                menor = candidatos
+
+        return self.ids_contendo(termo_normalizado, menor)
+
+    def ids_contendo(self, termo_normalizado: str, candidatos: Iterable[int] = None) -> List[int]:
+        """Filtra os ids (todos ou só os candidatos) cujo texto contém o termo"""
+        if isinstance(self.textos, _TextosSnapshot):
+            return self.textos.ids_contendo(termo_normalizado, candidatos)
+        textos = self.textos
+        if candidatos is None:
+            return [i for i, texto in enumerate(textos) if termo_normalizado in texto]
+        return [i for i in candidatos if termo_normalizado in textos[i]]
+
+    def palavras_similares(self, palavra: str, limiar: float = LIMIAR_SIMILARIDADE) -> Dict[str, float]:
+        """
+        Palavras do vocabulário cuja similaridade de trigramas com a palavra
+        (interseção sobre união) atinge o limiar.
+        """
+        gramas = trigramas_palavra(palavra)
+        contagem = Counter()
+        for grama in gramas:
+            contagem.update(self.trigramas_palavras.get(grama, ()))
+
+        # A união nunca é menor que os trigramas da consulta: descarta cedo
+        minimo = limiar * len(gramas)
+        similares = {}
+        for id_palavra, comuns in contagem.items():
+            if comuns < minimo:
+                continue
+            candidata = self.palavras[id_palavra]
+            similaridade = comuns / (len(gramas) + len(trigramas_palavra(candidata)) - comuns)
+            if similaridade >= limiar:
+                similares[candidata] = similaridade
+        return similares
+
+    def faixa_prefixo(self, prefixo: str) -> range:
+        """Posições (no vocabulário ordenado) das palavras que começam com o prefixo"""
+        inicio = bisect_left(self.palavras, prefixo)
+        fim = bisect_left(self.palavras, prefixo + "\uffff", inicio)
+        return range(inicio, fim)
+
+    def sugerir(self, texto: str, limite: int = LIMITE_SUGESTOES) -> List[str]:
+        """
+        Autocompletar: completa a última palavra do texto com as palavras do
+        vocabulário mais frequentes que começam com ela (busca binária no
+        vocabulário ordenado), mantendo o restante do texto digitado.
+        """
+        ultima = _PADRAO_ULTIMA_PALAVRA.search(texto.lower())
+        if not ultima:
+            return []
+
+        prefixo = dobrar_texto(ultima.group())
+        chave = (prefixo, limite)
+        melhores = self._sugestoes_curtas.get(chave)
+        if melhores is None:
+            frequencias = self.frequencias
+            melhores = heapq.nlargest(
+                limite, self.faixa_prefixo(prefixo), key=lambda i: (frequencias[i], -i))
+            # Prefixos de 1-2 letras cobrem faixas grandes: guarda o resultado
+            if len(prefixo) < TAMANHO_NGRAMA:
+                self._sugestoes_curtas[chave] = melhores
+        contexto = texto[:ultima.start()]
+        return [contexto + self.palavras_exibicao[i] for i in melhores]
+
+    def _pontuar(self, ids: Sequence, termo_normalizado: str) -> Callable[[int], float]:
+        """
+        Monta a função de pontuação BM25 de uma consulta. Cada palavra conta
+        como frequência PESO_PALAVRA_EXATA quando aparece inteira na entrada
+        (em qualquer variante de singular/plural), PESO_PREFIXO_PALAVRA quando
+        inicia uma palavra e PESO_SUBSTRING nos demais acertos; entradas
+        curtas são favorecidas pela normalização.
+        """
+        total_itens = len(self.tamanhos)
+        pesos = []
+        for palavra in set(extrair_palavras(termo_normalizado)):
+            exatos = set(self.tokens.get(palavra, ()))
+            exatos.update(self.radicais.get(radical(palavra), ()))
+            prefixados = set()
+            # Prefixos de 1-2 letras casariam quase todo o vocabulário
+            if len(palavra) >= TAMANHO_NGRAMA:
+                for id_palavra in self.faixa_prefixo(palavra):
+                    prefixados.update(self.tokens[self.palavras[id_palavra]])
+            frequencia_documento = len(prefixados | exatos) or len(ids)
+            idf = math.log(1 + (total_itens - frequencia_documento + 0.5) / (frequencia_documento + 0.5))
+            pesos.append((idf, exatos, prefixados))
+
+        tamanhos = self.tamanhos
+        normalizacao = BM25_K1 / self.media_tamanho
+
+        def pontuar(id_item: int) -> float:
+            pontos = 0.0
+            fator = BM25_K1 * (1 - BM25_B) + normalizacao * BM25_B * tamanhos[id_item]
+            for idf, exatos, prefixados in pesos:
+                if id_item in exatos:
+                    frequencia = PESO_PALAVRA_EXATA
+                elif id_item in prefixados:
+                    frequencia = PESO_PREFIXO_PALAVRA
+                else:
+                    frequencia = PESO_SUBSTRING
+                pontos += idf * frequencia * (BM25_K1 + 1) / (frequencia + fator)
+            return pontos
+
+        return pontuar
+
+    def buscar_analisado_ids(self, termo: str) -> List[int]:
+        """
+        Acertos de buscar_ids somados às entradas que contêm todas as palavras
+        do termo em qualquer variante de singular/plural ("camisas" também
+        encontra "camisa"). Números de classe não passam pela análise.
+        """
+        ids = self.buscar_ids(termo)
+        palavras = extrair_palavras(dobrar_texto(termo))
+        if termo.isdigit() or not palavras:
+            return ids
+
+        analisados = None
+        for palavra in set(palavras):
+            encontrados = self.radicais.get(radical(palavra), ())
+            analisados = set(encontrados) if analisados is None else analisados.intersection(encontrados)
+            if not analisados:
+                return ids
+        return sorted(analisados.union(ids))
+
+    def buscar_ranqueado_ids(self, termo: str, limite: int = LIMITE_RESULTADOS,
+                             analisar: bool = True) -> Tuple[int, List[int]]:
+        """
+        Busca como buscar_ids (ou buscar_analisado_ids, com analisar=True), mas
+        devolve apenas os `limite` ids mais relevantes (via heap) e o total de
+        acertos. Buscas por número de classe mantêm a ordem do classificador.
+        """
+        ids = self.buscar_analisado_ids(termo) if analisar else self.buscar_ids(termo)
+        return len(ids), self.ranquear(ids, termo, limite)
+
+    def ranquear(self, ids: List[int], termo: str, limite: int = LIMITE_RESULTADOS) -> List[int]:
+        """Seleciona (via heap) os `limite` ids mais relevantes para o termo"""
+        if termo.isdigit() or len(ids) <= 1:
+            return ids[:limite]
+
+        pontuar = self._pontuar(ids, dobrar_texto(termo))
+        return heapq.nlargest(limite, ids, key=lambda i: (pontuar(i), -i))
+
+    def buscar_varios_ids(self, termos: Iterable[str], analisar: bool = True) -> Dict[str, List[int]]:
+        """
+        Resolve vários termos de uma vez, com a mesma semântica de
+        buscar_analisado_ids (ou buscar_ids, com analisar=False). Termos que
+        normalizam para o mesmo texto ("Bonés", "bones") são resolvidos uma
+        única vez e compartilham a lista de ids.
+        """
+        buscar = self.buscar_analisado_ids if analisar else self.buscar_ids
+        resultados = {}
+        por_termo_normalizado = {}
+        for termo in termos:
+            if not termo or termo in resultados:
+                continue
+            chave = (termo.isdigit(), dobrar_texto(termo))
+            if chave not in por_termo_normalizado:
+                por_termo_normalizado[chave] = buscar(termo)
+            resultados[termo] = por_termo_normalizado[chave]
+        return resultados
+
+    def buscar_aproximado_ids(self, termo: str, limiar: float = LIMIAR_SIMILARIDADE) -> List[int]:
+        """
+        Busca tolerante a erros de digitação: cada palavra do termo (com 3+
+        letras) é trocada pelas palavras similares do vocabulário e a entrada
+        precisa conter uma similar para cada palavra. Retorna os ids ordenados
+        pela soma das similaridades (maior primeiro).
+        """
+        palavras = [p for p in extrair_palavras(dobrar_texto(termo)) if len(p) >= TAMANHO_NGRAMA]
+        if not palavras:
+            return []
+
+        pontuacao = None
+        for palavra in palavras:
+            melhor = {}
+            for similar, similaridade in self.palavras_similares(palavra, limiar).items():
+                for id_item in self.tokens[similar]:
+                    if similaridade > melhor.get(id_item, 0.0):
+                        melhor[id_item] = similaridade
+            if pontuacao is None:
+                pontuacao = melhor
+            else:
+                pontuacao = {i: p + melhor[i] for i, p in pontuacao.items() if i in melhor}
+            if not pontuacao:
+                return []
+
+        return sorted(pontuacao, key=lambda i: (-pontuacao[i], i))
+
+
+def montar_secoes(especificacoes: Iterable[Dict[str, str]]) -> Dict[str, object]:
+    """
+    Converte a lista {classe, especificacao} do JSON nas tabelas do classificador:
+    classes internadas, classe de cada item, textos originais, textos
+    normalizados e as tabelas do índice.
+    """
+    classes = []
+    posicao_classe = {}
+    classe_item = []
+    originais = []
+    for item in especificacoes:
+        classe = item["classe"]
+        if classe not in posicao_classe:
+            posicao_classe[classe] = len(classes)
+            classes.append(classe)
+        classe_item.append(posicao_classe[classe])
+        originais.append(item["especificacao"])
+
+    textos = [dobrar_texto(texto) for texto in originais]
+    secoes = {
+        "classes": classes,
+        "classe_item": classe_item,
+        "especificacoes": originais,
+        "textos": textos,
+    }
+    secoes.update(IndiceClassificador.construir_secoes(textos, originais))
+    return secoes
+
+
+# ---------------------------------------------------------------------------
+# Snapshot binário do classificador
+#
+# Layout (inteiros na ordem de bytes nativa, marcada no cabeçalho):
+#   cabeçalho: MAGIC, versão, marcador de ordem, sha256 do JSON, nº de seções
+#   diretório: (nome, tipo, offset, tamanho) de cada seção
+#   seções, alinhadas em 8 bytes:
+#     textos   -> u32 n, u32 offsets[n+1], blob UTF-8
+#     inteiros -> u32 valores[]
+#     mapa     -> u32 n, u32 offsets_chaves[n+1], u32 offsets_valores[n+1],
+#                 u32 valores[], blob UTF-8 das chaves
+# ---------------------------------------------------------------------------
+
+SNAPSHOT_MAGIC = b"INPISNAP"
+# Incrementar sempre que o conteúdo ou o formato das seções mudar
+SNAPSHOT_VERSAO = 5
+_MARCADOR_ORDEM = 0x01020304
+_CABECALHO = struct.Struct("=8sII32sI")
+_ENTRADA_DIRETORIO = struct.Struct("=32sIQQ")
+_TIPO_TEXTOS, _TIPO_INTEIROS, _TIPO_MAPA = 1, 2, 3
+
+
+def _alinhar(dados: bytearray, alinhamento: int = 8):
+    dados.extend(b"\0" * (-len(dados) % alinhamento))
+
+
+def _serializar_textos(textos: Sequence) -> bytes:
+    blobs = [texto.encode("utf-8") for texto in textos]
+    offsets = array("I", [0])
+    for blob in blobs:
+        offsets.append(offsets[-1] + len(blob))
+    return array("I", [len(blobs)]).tobytes() + offsets.tobytes() + b"".join(blobs)
+
+
+def _serializar_mapa(mapa: Mapping[str, Sequence]) -> bytes:
+    chaves = sorted(mapa)
+    blobs = [chave.encode("utf-8") for chave in chaves]
+    offsets_chaves = array("I", [0])
+    offsets_valores = array("I", [0])
+    valores = array("I")
+    for chave, blob in zip(chaves, blobs):
+        offsets_chaves.append(offsets_chaves[-1] + len(blob))
+        valores.extend(mapa[chave])
+        offsets_valores.append(len(valores))
+    return (array("I", [len(chaves)]).tobytes() + offsets_chaves.tobytes()
+            + offsets_valores.tobytes() + valores.tobytes() + b"".join(blobs))
+
+
+def _tipo_secao(valor) -> int:
+    if isinstance(valor, Mapping):
+        return _TIPO_MAPA
+    if valor and isinstance(valor[0], int):
+        return _TIPO_INTEIROS
+    return _TIPO_TEXTOS
+
+
+def _hash_arquivo(caminho: str) -> bytes:
+    with open(caminho, "rb") as f:
+        return hashlib.sha256(f.read()).digest()
+
+
+def caminho_snapshot(json_path: str) -> str:
+    """Caminho do snapshot binário correspondente a um JSON do classificador"""
+    return os.path.splitext(json_path)[0] + ".snapshot"
+
+
+def compilar_snapshot(json_path: str = "classificador_inpi_corrigido.json", snapshot_path: str = None) -> str:
+    """
+    Compila o JSON do classificador em um snapshot binário compacto.
+    A escrita é atômica para que processos concorrentes nunca leiam um arquivo parcial.
+    """
+    snapshot_path = snapshot_path or caminho_snapshot(json_path)
+    with open(json_path, "r", encoding="utf-8") as f:
+        secoes = montar_secoes(json.load(f))
+
+    corpos = []
+    for nome, valor in secoes.items():
+        tipo = _tipo_secao(valor)
+        if tipo == _TIPO_MAPA:
+            corpo = _serializar_mapa(valor)
+        elif tipo == _TIPO_TEXTOS:
+            corpo = _serializar_textos(valor)
+        else:
+            corpo = array("I", valor).tobytes()
+        corpos.append((nome, tipo, corpo))
+
+    dados = bytearray(_CABECALHO.pack(
+        SNAPSHOT_MAGIC, SNAPSHOT_VERSAO, _MARCADOR_ORDEM, _hash_arquivo(json_path), len(corpos)))
+    inicio_diretorio = len(dados)
+    dados.extend(b"\0" * (_ENTRADA_DIRETORIO.size * len(corpos)))
+    _alinhar(dados)
+
+    for posicao, (nome, tipo, corpo) in enumerate(corpos):
+        offset = len(dados)
+        dados.extend(corpo)
+        _alinhar(dados)
+        _ENTRADA_DIRETORIO.pack_into(
+            dados, inicio_diretorio + posicao * _ENTRADA_DIRETORIO.size,
+            nome.encode("ascii"), tipo, offset, len(corpo))
+
+    temporario = f"{snapshot_path}.{os.getpid()}.tmp"
+    with open(temporario, "wb") as f:
+        f.write(dados)
+    os.replace(temporario, snapshot_path)
+    return snapshot_path
+
+
+class _TextosSnapshot(Sequence):
+    """Lista de textos lida sob demanda de um blob UTF-8 mapeado em memória"""
+
+    def __init__(self, dados: memoryview):
+        n = dados[:4].cast("I")[0]
+        self._offsets = dados[4:4 * (n + 2)].cast("I")
+        self._blob = dados[4 * (n + 2):]
+        self._n = n
+
+    def __len__(self) -> int:
+        return self._n
+
+    def __getitem__(self, posicao):
+        if isinstance(posicao, slice):
+            return [self[i] for i in range(*posicao.indices(self._n))]
+        if posicao < 0:
+            posicao += self._n
+        if not 0 <= posicao < self._n:
+            raise IndexError(posicao)
+        return str(self._blob[self._offsets[posicao]:self._offsets[posicao + 1]], "utf-8")
+
+    def ids_contendo(self, termo: str, candidatos: Iterable[int] = None) -> List[int]:
+        """
+        Procura o termo direto nos bytes do blob, sem decodificar os textos.
+        Sem candidatos, percorre o blob inteiro pulando para o próximo texto a cada acerto.
+        """
+        padrao = re.compile(re.escape(termo.encode("utf-8")))
+        blob, offsets = self._blob, self._offsets
+        if candidatos is not None:
+            return [i for i in candidatos if padrao.search(blob, offsets[i], offsets[i + 1])]
+
+        ids = []
+        posicao = 0
+        while True:
+            encontrado = padrao.search(blob, posicao)
+            if not encontrado:
+                return ids
+            id_item = bisect_right(offsets, encontrado.start()) - 1
+            if encontrado.end() > offsets[id_item + 1]:
+                # Acerto atravessando dois textos: continua logo após o início
+                posicao = encontrado.start() + 1
+                continue
+            ids.append(id_item)
+            posicao = offsets[id_item + 1]
+
+
+class _MapaSnapshot(Mapping):
+    """Mapa texto -> ids cujas listas são fatias do snapshot (sem cópia)"""
+
+    def __init__(self, dados: memoryview):
+        n = dados[:4].cast("I")[0]
+        fim_offsets = 4 * (1 + 2 * (n + 1))
+        offsets = dados[4:fim_offsets].cast("I")
+        offsets_chaves = offsets[:n + 1]
+        self._offsets_valores = offsets[n + 1:]
+        fim_valores = fim_offsets + 4 * self._offsets_valores[n]
+        self._valores = dados[fim_offsets:fim_valores].cast("I")
+        blob = bytes(dados[fim_valores:])
+        self._posicoes = {
+            blob[offsets_chaves[i]:offsets_chaves[i + 1]].decode("utf-8"): i
+            for i in range(n)
+        }
+
+    def __getitem__(self, chave):
+        posicao = self._posicoes[chave]
+        return self._valores[self._offsets_valores[posicao]:self._offsets_valores[posicao + 1]]
+
+    def __iter__(self):
+        return iter(self._posicoes)
+
+    def __len__(self) -> int:
+        return len(self._posicoes)
+
+
+def abrir_snapshot(snapshot_path: str, hash_fonte: bytes = None) -> Dict[str, object]:
+    """
+    Mapeia o snapshot em memória e devolve as seções como visões sem cópia.
+    Levanta ValueError se o arquivo estiver em formato antigo ou desatualizado.
+    """
+    with open(snapshot_path, "rb") as f:
+        mapeado = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+    dados = memoryview(mapeado)
+    magic, versao, marcador, hash_snapshot, n_secoes = _CABECALHO.unpack_from(dados)
+    if magic != SNAPSHOT_MAGIC or versao != SNAPSHOT_VERSAO or marcador != _MARCADOR_ORDEM:
+        raise ValueError("Snapshot do classificador em formato incompatível")
+    if hash_fonte is not None and hash_snapshot != hash_fonte:
+        raise ValueError("Snapshot do classificador desatualizado")
+
+    secoes = {"_mmap": mapeado}
+    for posicao in range(n_secoes):
+        nome, tipo, offset, tamanho = _ENTRADA_DIRETORIO.unpack_from(
+            dados, _CABECALHO.size + posicao * _ENTRADA_DIRETORIO.size)
+        corpo = dados[offset:offset + tamanho]
+        nome = nome.rstrip(b"\0").decode("ascii")
+        if tipo == _TIPO_MAPA:
+            secoes[nome] = _MapaSnapshot(corpo)
+        elif tipo == _TIPO_TEXTOS:
+            secoes[nome] = _TextosSnapshot(corpo)
+        else:
+            secoes[nome] = corpo.cast("I")
+    return secoes
+
+
+class ClassificadorINPI(Sequence):
+    """
+    Tabela do classificador INPI (sequência de {classe, especificacao}) com o
+    índice de busca construído uma única vez no carregamento. As seções podem
+    vir de listas em memória ou de um snapshot mapeado com mmap.
+    """
+
+    def __init__(self, secoes: Mapping[str, object]):
+        # Mantém o mmap vivo enquanto as visões do snapshot estiverem em uso
+        self._mmap = secoes.get("_mmap")
+        self.classes = secoes["classes"]
+        self.classe_item = secoes["classe_item"]
+        self.especificacoes = secoes["especificacoes"]
+        self.indice = IndiceClassificador(secoes)
+
+    @classmethod
+    def de_especificacoes(cls, especificacoes: Iterable[Dict[str, str]]) -> "ClassificadorINPI":
+        """Constrói o classificador em memória a partir da lista do JSON"""
+        return cls(montar_secoes(especificacoes))
+
+    def classe(self, id_item: int) -> str:
+        """Classe da entrada, sem materializar o dicionário"""
+        return self.classes[self.classe_item[id_item]]
+
+    def __getitem__(self, posicao):
+        if isinstance(posicao, slice):
+            return [self[i] for i in range(*posicao.indices(len(self)))]
+        if posicao < 0:
+            posicao += len(self)
+        return {"classe": self.classe(posicao), "especificacao": self.especificacoes[posicao]}
+
+    def __len__(self) -> int:
+        return len(self.classe_item)
+
+    def buscar(self, termo: str) -> List[Dict[str, str]]:
+        """Retorna as entradas que casam com o termo, na ordem do classificador"""
+        return [self[i] for i in self.indice.buscar_ids(termo)]
+
+    def buscar_aproximado(self, termo: str, limiar: float = LIMIAR_SIMILARIDADE) -> List[Dict[str, str]]:
+        """Retorna as entradas com palavras parecidas com o termo, mais similares primeiro"""
+        return [self[i] for i in self.indice.buscar_aproximado_ids(termo, limiar)]
+
+    def sugerir(self, texto: str, limite: int = LIMITE_SUGESTOES) -> List[str]:
+        """Sugestões de termos para o texto digitado até agora"""
+        return self.indice.sugerir(texto, limite)
+
+    def entrada(self, id_item: int) -> Dict[str, object]:
+        """Entrada {id, classe, especificacao}; o id identifica o item nas seleções"""
+        return {"id": id_item, "classe": self.classe(id_item), "especificacao": self.especificacoes[id_item]}
+
+    def agrupar_por_classe(self, ids: Iterable[int]) -> Dict[str, List[Dict[str, object]]]:
+        """Agrupa as entradas (com id) por classe, mantendo a ordem recebida"""
+        grupos = {}
+        for id_item in ids:
+            grupos.setdefault(self.classe(id_item), []).append(self.entrada(id_item))
+        return grupos
+
+    def buscar_varios_ids(self, termos: Iterable[str], limite: int = LIMITE_RESULTADOS) -> Dict[str, Tuple[int, List[int]]]:
+        """Busca em lote: {termo: (total de acertos, ids dos `limite` mais relevantes)}"""
+        return {
+            termo: (len(ids), self.indice.ranquear(ids, termo, limite))
+            for termo, ids in self.indice.buscar_varios_ids(termos).items()
+        }
+
+    def buscar_varios(self, termos: Iterable[str],
+                      limite: int = LIMITE_RESULTADOS) -> Dict[str, Tuple[int, Dict[str, List[Dict[str, str]]]]]:
+        """
+        Busca uma lista de termos de uma só vez. Para cada termo retorna o
+        total de acertos e as `limite` entradas mais relevantes agrupadas por classe.
+        """
+        return {
+            termo: (total, self.agrupar_por_classe(ids))
+            for termo, (total, ids) in self.buscar_varios_ids(termos, limite).items()
+        }
+
+    def buscar_ranqueado_ids(self, termo: str, limite: int = LIMITE_RESULTADOS,
+                             aproximado: bool = False) -> Tuple[int, List[int]]:
+        """
+        Retorna o total de acertos e os ids das `limite` entradas mais
+        relevantes. Ids são compactos e podem ser guardados na sessão, sendo
+        resolvidos com entrada() apenas na renderização.
+        """
+        if aproximado:
+            ids = self.indice.buscar_aproximado_ids(termo)
+            return len(ids), ids[:limite]
+        return self.indice.buscar_ranqueado_ids(termo, limite)
+
+    def buscar_ranqueado(self, termo: str, limite: int = LIMITE_RESULTADOS,
+                         aproximado: bool = False) -> Tuple[int, List[Dict[str, object]]]:
+        """
+        Retorna o total de acertos e somente as `limite` entradas (com id)
+        mais relevantes, já na ordem de relevância.
+        """
+        total, ids = self.buscar_ranqueado_ids(termo, limite, aproximado)
+        return total, [self.entrada(i) for i in ids]
+
+
+def _carregar_classificador(json_path: str) -> ClassificadorINPI:
+    """
+    Abre o snapshot binário do JSON, compilando-o quando ausente ou desatualizado.
+    Sem permissão de escrita, monta o classificador em memória a partir do JSON.
+    """
+    snapshot_path = caminho_snapshot(json_path)
+    hash_fonte = _hash_arquivo(json_path)
+    try:
+        return ClassificadorINPI(abrir_snapshot(snapshot_path, hash_fonte))
+    except (OSError, ValueError, struct.error):
+        pass
+
+    try:
+        compilar_snapshot(json_path, snapshot_path)
+        return ClassificadorINPI(abrir_snapshot(snapshot_path, hash_fonte))
+    except OSError as e:
+        logging.warning(f"Não foi possível gravar o snapshot do classificador: {e}")
+
+    with open(json_path, "r", encoding="utf-8") as f:
+        return ClassificadorINPI.de_especificacoes(json.load(f))
+
+
+@st.cache_resource(ttl=3600)  # Cache por 1 hora
+def carregar_classificador_inpi_json(json_path: str = "classificador_inpi_corrigido.json") -> ClassificadorINPI:
+    """Carrega o classificador INPI (snapshot mapeado em memória) com índice de busca"""
+    try:
+        return _carregar_classificador(json_path)
+    except Exception as e:
+        st.error(f"Erro ao carregar classificador: {e}")
+        return ClassificadorINPI.de_especificacoes([])
+
+
 def buscar_no_classificador(termo: str, especificacoes: List[Dict[str, str]]) -> List[Dict[str, str]]:
     """
     Busca um termo nas especificações do classificador INPI.
     Retorna uma lista de dicionários [{classe, especificacao}] com o texto exato do JSON.
     Agora ignora acentos e maiúsculas/minúsculas.
+    Usa o índice quando recebe o classificador carregado; listas avulsas são varridas.
     """
     if not termo or len(termo) < 1:
         return []
 
-    termo_normalizado = remover_acentos(termo.lower())
+    if isinstance(especificacoes, ClassificadorINPI):
+        return especificacoes.buscar(termo)
+
+    termo_normalizado = dobrar_texto(termo)
     resultados = []
 
     for item in especificacoes:
-        especificacao_normalizada = remover_acentos(
-            item["especificacao"].lower())
+        especificacao_normalizada = dobrar_texto(item["especificacao"])
 
         # Se o termo é um número, buscar por "número - " ou "número " no início
         if termo.isdigit():
@@ -49,3 +795,71 @@ def buscar_no_classificador(termo: str, especificacoes: List[Dict[str, str]]) ->
                 resultados.append(item)
 
     return resultados
+
+
+def buscar_aproximado_no_classificador(termo: str, especificacoes: List[Dict[str, str]],
+                                       limiar: float = LIMIAR_SIMILARIDADE) -> List[Dict[str, str]]:
+    """
+    Busca tolerante a erros de digitação ("computdor", "sofware"), usada como
+    alternativa quando a busca exata não encontra nada.
+    """
+    if not termo or not isinstance(especificacoes, ClassificadorINPI):
+        return []
+    return especificacoes.buscar_aproximado(termo, limiar)
+
+
+def buscar_ranqueado_no_classificador(termo: str, especificacoes: List[Dict[str, str]],
+                                      limite: int = LIMITE_RESULTADOS,
+                                      aproximado: bool = False) -> Tuple[int, List[Dict[str, str]]]:
+    """
+    Busca ranqueada por relevância: retorna (total de acertos, top `limite`).
+    Com aproximado=True usa a busca tolerante a erros de digitação.
+    """
+    if not termo:
+        return 0, []
+    if not isinstance(especificacoes, ClassificadorINPI):
+        especificacoes = ClassificadorINPI.de_especificacoes(especificacoes)
+    return especificacoes.buscar_ranqueado(termo, limite, aproximado)
+
+
+def separar_termos(texto: str) -> List[str]:
+    """Separa uma lista colada (linhas, ponto e vírgula ou vírgulas) em termos únicos"""
+    termos = []
+    for termo in re.split(r"[\n;,]", texto or ""):
+        termo = termo.strip()
+        if termo and termo not in termos:
+            termos.append(termo)
+    return termos
+
+
+def buscar_varios_no_classificador(termos: Iterable[str], especificacoes: List[Dict[str, str]],
+                                   limite: int = LIMITE_RESULTADOS) -> Dict[str, Tuple[int, Dict[str, List[Dict[str, str]]]]]:
+    """
+    Busca em lote: resolve todos os termos numa única passada pelo índice.
+    Retorna {termo: (total de acertos, {classe: [entradas mais relevantes]})}.
+    """
+    if not isinstance(especificacoes, ClassificadorINPI):
+        especificacoes = ClassificadorINPI.de_especificacoes(especificacoes)
+    return especificacoes.buscar_varios(termos, limite)
+
+
+def sugerir_termos_classificador(texto: str, especificacoes: List[Dict[str, str]] = None,
+                                 limite: int = LIMITE_SUGESTOES) -> List[str]:
+    """
+    Sugestões de autocompletar para o texto digitado (a cada tecla).
+    Sem classificador informado, usa o carregado em cache pelo processo.
+    """
+    if not texto:
+        return []
+    if especificacoes is None:
+        especificacoes = carregar_classificador_inpi_json()
+    if not isinstance(especificacoes, ClassificadorINPI):
+        return []
+    return especificacoes.sugerir(texto, limite)
+
+
+if __name__ == "__main__":
+    import sys
+
+    # Etapa de build: python classificador_agent.py [json] [snapshot]
+    print(compilar_snapshot(*sys.argv[1:3]))
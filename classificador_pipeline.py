@@ -0,0 +1,225 @@
+"""
+Pipeline de reconstrução do classificador INPI a partir do PDF oficial.
+
+Extrai as páginas do PDF em paralelo (pool de processos), converte o texto no
+esquema {classe, especificacao}, regenera o JSON e compila o snapshot de busca
+em um único comando:
+
+    python classificador_pipeline.py [pdf] [json_saida]
+    python classificador_pipeline.py --verificar [pdf] [json]
+
+Cada página é identificada pelo hash do seu conteúdo; o resultado do parse fica
+em cache, então uma nova edição do INPI só reprocessa as páginas alteradas.
+
+As correções feitas à mão no texto extraído ficam em CORRECOES_PADRAO, por id
+(posição no classificador), e são aplicadas depois da extração. --verificar
+reconstrói em memória e falha se o resultado diferir do JSON versionado.
+"""
+import os
+import re
+import json
+import hashlib
+import logging
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Dict, Tuple
+
+import PyPDF2
+
+
+PDF_PADRAO = "Classificador INPI.pdf"
+JSON_PADRAO = "classificador_inpi_corrigido.json"
+CORRECOES_PADRAO = "classificador_correcoes.json"
+
+# Incrementar quando a lógica de parse mudar, invalidando o cache de páginas
+VERSAO_PARSER = 1
+
+# Páginas enviadas a cada processo por vez
+PAGINAS_POR_LOTE = 16
+
+_PADRAO_ITEM = re.compile(r"^(\d{1,2}) - (.+)$")
+_PADRAO_CLASSE = re.compile(r"^Classe \d{1,2}\s*-")
+_PADRAO_CABECALHO = re.compile(r"^(CLASSIFICADOR DO INPI|\d+$)")
+
+
+def caminho_cache(json_path: str) -> str:
+    """Arquivo com o parse das páginas já processadas, indexado pelo hash da página"""
+    return os.path.splitext(json_path)[0] + ".paginas.json"
+
+
+def _limpar_linha(linha: str) -> str:
+    return re.sub(r"\s+", " ", linha).strip()
+
+
+def parsear_pagina(texto: str) -> Dict[str, list]:
+    """
+    Converte o texto de uma página em itens [classe, especificacao].
+
+    Linhas antes do primeiro item que não são cabeçalho continuam o último
+    item da página anterior e vão em "continuacao". O título de cada classe
+    ("Classe 1 - ...") e suas linhas quebradas são descartados.
+    """
+    continuacao = []
+    itens = []
+    no_titulo = False
+    for linha in texto.splitlines():
+        linha = _limpar_linha(linha)
+        if not linha or _PADRAO_CABECALHO.match(linha):
+            continue
+        if _PADRAO_CLASSE.match(linha):
+            no_titulo = True
+            continue
+
+        item = _PADRAO_ITEM.match(linha)
+        if item:
+            no_titulo = False
+            itens.append([item.group(1), f"{item.group(1)} - {item.group(2)}"])
+        elif no_titulo:
+            continue
+        elif itens:
+            itens[-1][1] = f"{itens[-1][1]} {linha}"
+        else:
+            continuacao.append(linha)
+    return {"continuacao": continuacao, "itens": itens}
+
+
+def _processar_lote(pdf_path: str, paginas: List[int]) -> List[Tuple[int, Dict[str, list]]]:
+    """Executado nos processos do pool: extrai e parseia um lote de páginas"""
+    leitor = PyPDF2.PdfReader(pdf_path)
+    return [(numero, parsear_pagina(leitor.pages[numero].extract_text() or "")) for numero in paginas]
+
+
+def hash_pagina(pagina) -> str:
+    """Hash do conteúdo de uma página (stream de desenho), sem extrair o texto"""
+    conteudo = pagina.get_contents()
+    dados = conteudo.get_data() if conteudo is not None else b""
+    return hashlib.sha256(dados).hexdigest()
+
+
+def _carregar_cache(path: str) -> Dict[str, dict]:
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            cache = json.load(f)
+        if cache.get("versao") == VERSAO_PARSER:
+            return cache.get("paginas", {})
+    except (OSError, ValueError):
+        pass
+    return {}
+
+
+def extrair_paginas(pdf_path: str, cache_path: str, max_workers: int = None) -> List[Dict[str, list]]:
+    """
+    Retorna o parse de todas as páginas do PDF, reprocessando em paralelo
+    apenas as páginas cujo hash não está no cache.
+    """
+    leitor = PyPDF2.PdfReader(pdf_path)
+    hashes = [hash_pagina(pagina) for pagina in leitor.pages]
+    cache = _carregar_cache(cache_path)
+
+    pendentes = [numero for numero, h in enumerate(hashes) if h not in cache]
+    if pendentes:
+        lotes = [pendentes[i:i + PAGINAS_POR_LOTE] for i in range(0, len(pendentes), PAGINAS_POR_LOTE)]
+        with ProcessPoolExecutor(max_workers=max_workers) as executor:
+            for resultado in executor.map(_processar_lote, [pdf_path] * len(lotes), lotes):
+                for numero, parse in resultado:
+                    cache[hashes[numero]] = parse
+
+    logging.info(f"Classificador: {len(pendentes)} de {len(hashes)} página(s) reprocessada(s)")
+
+    # Descarta páginas que não existem mais na edição atual
+    atuais = set(hashes)
+    cache = {h: parse for h, parse in cache.items() if h in atuais}
+    temporario = f"{cache_path}.{os.getpid()}.tmp"
+    with open(temporario, "w", encoding="utf-8") as f:
+        json.dump({"versao": VERSAO_PARSER, "paginas": cache}, f, ensure_ascii=False)
+    os.replace(temporario, cache_path)
+
+    return [cache[h] for h in hashes]
+
+
+def carregar_correcoes(path: str = CORRECOES_PADRAO) -> Dict[int, Dict[str, str]]:
+    """Tabela de correções: id -> {"extraido": texto do PDF, "corrigido": texto final}"""
+    if not os.path.exists(path):
+        return {}
+    with open(path, "r", encoding="utf-8") as f:
+        return {int(id_item): correcao for id_item, correcao in json.load(f).items()}
+
+
+def montar_especificacoes(paginas: List[Dict[str, list]],
+                          correcoes: Dict[int, Dict[str, str]] = None) -> List[Dict[str, str]]:
+    """
+    Junta as páginas na lista {classe, especificacao}, emendando itens que
+    quebram de uma página para a outra, e aplica as correções por id.
+
+    A extração do PDF insere espaços espúrios ("Acel eradores") e os textos
+    foram revisados à mão. Cada correção só vale se o texto extraído ainda for
+    o registrado na tabela; numa nova edição, as que não conferem são listadas
+    no log para revisão.
+    """
+    itens = []
+    for pagina in paginas:
+        if pagina["continuacao"] and itens:
+            itens[-1][1] = " ".join([itens[-1][1]] + pagina["continuacao"])
+        itens.extend([classe, texto] for classe, texto in pagina["itens"])
+
+    especificacoes = [{"classe": classe, "especificacao": texto} for classe, texto in itens]
+    descartadas = []
+    for id_item, correcao in (correcoes or {}).items():
+        if id_item < len(especificacoes) and especificacoes[id_item]["especificacao"] == correcao["extraido"]:
+            especificacoes[id_item]["especificacao"] = correcao["corrigido"]
+        else:
+            descartadas.append(id_item)
+    if descartadas:
+        logging.warning(f"Classificador: {len(descartadas)} correção(ões) não conferem com o texto extraído "
+                        f"(ids {descartadas[:20]}); revise {CORRECOES_PADRAO}")
+    return especificacoes
+
+
+def _especificacoes_do_pdf(pdf_path: str, json_path: str, max_workers: int = None) -> List[Dict[str, str]]:
+    paginas = extrair_paginas(pdf_path, caminho_cache(json_path), max_workers)
+    especificacoes = montar_especificacoes(paginas, carregar_correcoes())
+    if not especificacoes:
+        raise ValueError(f"Nenhuma especificação encontrada em {pdf_path}")
+    return especificacoes
+
+
+def verificar_classificador(pdf_path: str = PDF_PADRAO, json_path: str = JSON_PADRAO,
+                            max_workers: int = None) -> List[int]:
+    """Reconstrói em memória e retorna os ids que diferem do JSON versionado (vazio se igual)"""
+    with open(json_path, "r", encoding="utf-8") as f:
+        versionado = json.load(f)
+    reconstruido = _especificacoes_do_pdf(pdf_path, json_path, max_workers)
+    diferentes = [id_item for id_item, (novo, atual) in enumerate(zip(reconstruido, versionado)) if novo != atual]
+    # Itens a mais ou a menos também contam como diferença
+    diferentes.extend(range(min(len(reconstruido), len(versionado)), max(len(reconstruido), len(versionado))))
+    return diferentes
+
+
+def reconstruir_classificador(pdf_path: str = PDF_PADRAO, json_path: str = JSON_PADRAO,
+                              max_workers: int = None) -> List[Dict[str, str]]:
+    """Regenera o JSON do classificador a partir do PDF e recompila o snapshot de busca"""
+    from classificador_agent import compilar_snapshot
+
+    especificacoes = _especificacoes_do_pdf(pdf_path, json_path, max_workers)
+
+    temporario = f"{json_path}.{os.getpid()}.tmp"
+    with open(temporario, "w", encoding="utf-8") as f:
+        json.dump(especificacoes, f, ensure_ascii=False, indent=2)
+    os.replace(temporario, json_path)
+
+    compilar_snapshot(json_path)
+    return especificacoes
+
+
+if __name__ == "__main__":
+    import sys
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s %(levelname)s %(message)s')
+    if sys.argv[1:2] == ["--verificar"]:
+        diferentes = verificar_classificador(*sys.argv[2:4])
+        if diferentes:
+            print(f"{len(diferentes)} especificação(ões) diferem do JSON versionado (ids {diferentes[:20]})")
+            sys.exit(1)
+        print("Reconstrução idêntica ao JSON versionado")
+    else:
+        resultado = reconstruir_classificador(*sys.argv[1:3])
+        print(f"{len(resultado)} especificações geradas")
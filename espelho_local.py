@@ -0,0 +1,378 @@
+"""
+Espelho local (SQLite) das tabelas buscas, objecao e deposito_patente.
+
+Opcional: ativado com SUPABASE_ESPELHO (caminho do arquivo) e SUPABASE_SERVICE_KEY.
+Uma thread em segundo plano mantém o arquivo atualizado pela sincronização delta
+(updated_at e registros_excluidos, ver supabase/migrations) e as listagens do
+SupabaseAgent leem dele, sem esperar a rede. Como o espelho é lido com a chave de
+serviço, a visibilidade por usuário é aplicada aqui: o espelho só responde o que
+as políticas RLS mostrariam ao dono do token (confirmado pelo Supabase Auth); o
+resto continua indo ao Supabase.
+O arquivo contém todas as linhas das tabelas e deve ficar protegido como o banco.
+"""
+import os
+import json
+import time
+import base64
+import hashlib
+import sqlite3
+import logging
+import threading
+from datetime import timedelta
+from typing import Any, Dict, List, Optional
+
+from supabase_agent import (
+    COLUNAS_RESUMO, DONOS_LISTAS, SUPABASE_DELTA_MARGEM, SUPABASE_DELTA_RESSINCRONIZAR,
+    _ler_instante, _sem_acento, diretorio_usuarios, ler_em_ordem, sessao_http,
+)
+
+
+# Arquivo do espelho; vazio desativa
+SUPABASE_ESPELHO = os.getenv("SUPABASE_ESPELHO", "")
+# Segundos entre as sincronizações da thread do espelho
+SUPABASE_ESPELHO_INTERVALO = int(os.getenv("SUPABASE_ESPELHO_INTERVALO", 15))
+# Segundos em que um token confirmado pelo Supabase Auth vale sem nova verificação
+SUPABASE_ESPELHO_VERIFICACAO = int(os.getenv("SUPABASE_ESPELHO_VERIFICACAO", 300))
+
+# Coluna de status de cada tabela (índice status + created_at)
+COLUNAS_STATUS = {
+    "buscas": "status_busca",
+    "objecao": "status_objecao",
+    "deposito_patente": "status_patente",
+}
+
+# Cadastro cujo is_admin libera todas as linhas da tabela; os demais usuários
+# veem só as linhas em que aparecem numa coluna de DONOS_LISTAS
+CADASTROS_ADMIN = {
+    "buscas": "perfil",
+    "objecao": "juridico_marca",
+    "deposito_patente": "funcionario",
+}
+
+
+# Tokens já verificados: hash do token -> (válido até, id do usuário ou None)
+_tokens_verificados = {}
+_tokens_lock = threading.Lock()
+
+
+def _expiracao_do_token(jwt_token: str) -> float:
+    """Claim exp do JWT (só lida depois que o Supabase Auth aceitou o token)"""
+    try:
+        carga = jwt_token.split(".")[1]
+        return float(json.loads(base64.urlsafe_b64decode(carga + "=" * (-len(carga) % 4))).get("exp"))
+    except (AttributeError, IndexError, TypeError, ValueError):
+        return float("inf")
+
+
+def usuario_do_token(jwt_token: str) -> Optional[str]:
+    """
+    Id do usuário do JWT, confirmado pelo Supabase Auth (GET /auth/v1/user, o
+    mesmo de auth.get_user). O espelho é lido com a chave de serviço, então o
+    claim sub de um token não verificado não pode decidir quais linhas aparecem.
+    O resultado fica em cache por SUPABASE_ESPELHO_VERIFICACAO segundos, sem
+    passar da expiração do token; falhas de rede não entram no cache.
+    """
+    if not jwt_token:
+        return None
+    chave = hashlib.sha256(jwt_token.encode()).hexdigest()
+    agora = time.time()
+    with _tokens_lock:
+        entrada = _tokens_verificados.get(chave)
+    if entrada and entrada[0] > agora:
+        return entrada[1]
+
+    try:
+        resp = sessao_http().get(f"{os.getenv('SUPABASE_URL')}/auth/v1/user", headers={
+            "apikey": os.getenv("SUPABASE_KEY"), "Authorization": f"Bearer {jwt_token}"})
+    except Exception as e:
+        logging.error(f"Erro ao verificar o token no espelho local: {str(e)}")
+        return None
+    if resp.status_code == 200:
+        usuario = resp.json().get("id")
+        validade = min(agora + SUPABASE_ESPELHO_VERIFICACAO, _expiracao_do_token(jwt_token))
+    elif resp.status_code in (401, 403):
+        usuario, validade = None, agora + SUPABASE_ESPELHO_VERIFICACAO
+    else:
+        logging.error(f"Erro ao verificar o token no espelho local: {resp.text}")
+        return None
+    with _tokens_lock:
+        # Descarta os vencidos antes de crescer
+        if len(_tokens_verificados) > 1000:
+            for token in [t for t, (ate, _) in _tokens_verificados.items() if ate <= agora]:
+                del _tokens_verificados[token]
+        _tokens_verificados[chave] = (validade, usuario)
+    return usuario
+
+
+def ve_todas(tabela: str, jwt_token: str, avisar: bool = True) -> bool:
+    """
+    Se o dono do token é admin no cadastro da tabela (CADASTROS_ADMIN) e vê todas
+    as linhas. avisar=False para chamadas fora de um script (feed de alterações)
+    """
+    usuario = usuario_do_token(jwt_token)
+    if not usuario:
+        return False
+    registro = diretorio_usuarios().registro(CADASTROS_ADMIN[tabela], usuario, jwt_token, avisar)
+    return bool(registro and registro.get("is_admin"))
+
+
+class EspelhoLocal:
+    """
+    Cópia SQLite das tabelas de listagem, indexada por dono, status e created_at.
+
+    Cada tabela guarda as colunas de filtro, o texto de busca (buscas), a linha
+    de resumo (COLUNAS_RESUMO) e a linha completa em JSON. A marca d'água de cada
+    tabela fica no próprio arquivo, então um reinício continua do delta e as
+    listas já abrem com os dados da última sincronização (inclusive offline).
+    """
+
+    TABELAS = ("buscas", "objecao", "deposito_patente")
+
+    def __init__(self, caminho: str, chave_servico: str, intervalo: int = SUPABASE_ESPELHO_INTERVALO,
+                 margem: int = SUPABASE_DELTA_MARGEM, ressincronizar: int = SUPABASE_DELTA_RESSINCRONIZAR):
+        self.intervalo = intervalo
+        self.margem = timedelta(seconds=margem)
+        self.ressincronizar = ressincronizar
+        self._headers = {"apikey": chave_servico, "Authorization": f"Bearer {chave_servico}"}
+        self._conexao = sqlite3.connect(caminho, check_same_thread=False)
+        self._lock = threading.Lock()
+        self._locks_tabela = {tabela: threading.Lock() for tabela in self.TABELAS}
+        self._desativadas = set()
+        self._parar = threading.Event()
+        # Tipo SQLite do id de cada tabela já conferido com o Supabase neste processo
+        self._tipos_id = {}
+        self._criar_esquema()
+        with self._lock:
+            self._prontas = {tabela for (tabela,) in self._conexao.execute(
+                "select tabela from sincronizacao where carregada_em is not null")}
+        self._thread = threading.Thread(target=self._executar, name="espelho-supabase", daemon=True)
+        self._thread.start()
+
+    def _criar_esquema(self):
+        with self._lock, self._conexao:
+            self._conexao.execute("pragma journal_mode=wal")
+            self._conexao.execute(
+                "create table if not exists sincronizacao ("
+                "tabela text primary key, marca text, marca_exclusoes text, carregada_em real)")
+
+    def _tipos_id_no_supabase(self) -> Optional[Dict[str, str]]:
+        """
+        Tipo SQLite (integer ou text) da coluna id de cada tabela, lido da
+        descrição OpenAPI do PostgREST; None se o Supabase não respondeu.
+        """
+        try:
+            resp = sessao_http().get(f"{os.getenv('SUPABASE_URL')}/rest/v1/",
+                                     headers=dict(self._headers, Accept="application/openapi+json"))
+            if resp.status_code != 200:
+                logging.error(f"Erro ao ler os tipos das tabelas para o espelho local: {resp.text}")
+                return None
+            definicoes = resp.json().get("definitions", {})
+        except Exception as e:
+            logging.error(f"Erro ao ler os tipos das tabelas para o espelho local: {str(e)}")
+            return None
+        return {tabela: "integer" if definicoes.get(tabela, {}).get("properties", {}).get("id", {}).get("type")
+                == "integer" else "text" for tabela in self.TABELAS}
+
+    def _preparar_tabela(self, tabela: str) -> bool:
+        """
+        Cria a tabela do espelho com o tipo de id da tabela de origem. Um arquivo
+        criado com outro tipo é refeito e recarregado. False se o tipo não pôde ser lido.
+        """
+        if tabela in self._tipos_id:
+            return True
+        tipos = self._tipos_id_no_supabase()
+        if tipos is None:
+            return False
+        tipo_id = tipos[tabela]
+        donos = DONOS_LISTAS[tabela]
+        with self._lock, self._conexao:
+            atual = {nome: tipo.lower() for _, nome, tipo, *_ in self._conexao.execute(f"pragma table_info({tabela})")}
+            if atual and atual.get("id") != tipo_id:
+                logging.warning(f"Espelho local: id de {tabela} mudou para {tipo_id}; recarregando a tabela")
+                self._conexao.execute(f"drop table {tabela}")
+                self._conexao.execute("delete from sincronizacao where tabela = ?", (tabela,))
+                self._prontas.discard(tabela)
+            self._conexao.execute(
+                f"create table if not exists {tabela} (id {tipo_id} primary key, created_at text, "
+                f"status text, {', '.join(f'{dono} text' for dono in donos)}, texto text, "
+                f"resumo text not null, dados text not null)")
+            self._conexao.execute(
+                f"create index if not exists {tabela}_created_at on {tabela} (created_at desc, id desc)")
+            self._conexao.execute(
+                f"create index if not exists {tabela}_status on {tabela} (status, created_at desc, id desc)")
+            for dono in donos:
+                self._conexao.execute(
+                    f"create index if not exists {tabela}_{dono} on {tabela} ({dono}, created_at desc, id desc)")
+        self._tipos_id[tabela] = tipo_id
+        return True
+
+    def _executar(self):
+        while not self._parar.is_set():
+            for tabela in self.TABELAS:
+                if tabela not in self._desativadas:
+                    try:
+                        self.sincronizar(tabela)
+                    except Exception as e:
+                        logging.error(f"Erro no espelho local de {tabela}: {str(e)}")
+            self._parar.wait(self.intervalo)
+
+    def parar(self):
+        self._parar.set()
+
+    def _ler(self, tabela: str, lista: str, params: Dict[str, str], coluna: str) -> Optional[List[Dict[str, Any]]]:
+        linhas, status = ler_em_ordem(tabela, self._headers, params, coluna)
+        if status in (400, 404):
+            self._desativadas.add(lista)
+            logging.warning(f"Espelho local desativado para {lista}; "
+                            "aplique a migração de sincronização (supabase/migrations)")
+        return linhas
+
+    def _desde(self, marca: str) -> str:
+        return f"gte.{(_ler_instante(marca) - self.margem).isoformat()}"
+
+    def _valores(self, tabela: str, linha: Dict[str, Any]) -> tuple:
+        donos = [linha.get(dono) for dono in DONOS_LISTAS[tabela]]
+        texto = None
+        if tabela == "buscas":
+            texto = _sem_acento(f"{linha.get('marca') or ''}\n{linha.get('nome_consultor') or ''}")
+        resumo = {coluna: linha.get(coluna) for coluna in COLUNAS_RESUMO[tabela].split(",")}
+        return (linha["id"], linha.get("created_at"), linha.get(COLUNAS_STATUS[tabela]),
+                *[None if dono is None else str(dono) for dono in donos], texto,
+                json.dumps(resumo, ensure_ascii=False), json.dumps(linha, ensure_ascii=False))
+
+    def sincronizar(self, tabela: str) -> bool:
+        """Aplica o delta da tabela (ou a recarrega por inteiro); False se o Supabase falhou"""
+        with self._locks_tabela[tabela]:
+            if not self._preparar_tabela(tabela):
+                return False
+            with self._lock:
+                meta = self._conexao.execute(
+                    "select marca, marca_exclusoes, carregada_em from sincronizacao where tabela = ?",
+                    (tabela,)).fetchone()
+            marca, marca_exclusoes, carregada_em = meta or (None, None, None)
+            completa = marca is None or carregada_em is None or time.time() - carregada_em > self.ressincronizar
+
+            params = {"select": "*"}
+            if not completa:
+                params["updated_at"] = self._desde(marca)
+            linhas = self._ler(tabela, tabela, params, "updated_at")
+            if linhas is None:
+                return False
+
+            exclusoes = []
+            if not completa and marca_exclusoes:
+                exclusoes = self._ler("registros_excluidos", tabela, {
+                    "select": "id,registro_id,excluido_em",
+                    "tabela": f"eq.{tabela}",
+                    "excluido_em": self._desde(marca_exclusoes),
+                }, "excluido_em")
+                if exclusoes is None:
+                    return False
+
+            # As leituras vêm em ordem crescente: a última linha tem a maior marca
+            if completa:
+                marca = linhas[-1]["updated_at"] if linhas else None
+                marca_exclusoes = marca
+                carregada_em = time.time()
+            elif linhas and _ler_instante(linhas[-1]["updated_at"]) > _ler_instante(marca):
+                marca = linhas[-1]["updated_at"]
+            if exclusoes and _ler_instante(exclusoes[-1]["excluido_em"]) > _ler_instante(marca_exclusoes):
+                marca_exclusoes = exclusoes[-1]["excluido_em"]
+
+            colunas = 6 + len(DONOS_LISTAS[tabela])
+            with self._lock, self._conexao:
+                if completa:
+                    self._conexao.execute(f"delete from {tabela}")
+                self._conexao.executemany(
+                    f"insert or replace into {tabela} values ({', '.join('?' * colunas)})",
+                    [self._valores(tabela, linha) for linha in linhas])
+                self._conexao.executemany(f"delete from {tabela} where id = ?",
+                                          [(exclusao["registro_id"],) for exclusao in exclusoes])
+                self._conexao.execute(
+                    "insert or replace into sincronizacao values (?, ?, ?, ?)",
+                    (tabela, marca, marca_exclusoes, carregada_em))
+            self._prontas.add(tabela)
+            return True
+
+    def apos_escrita(self, tabela: str):
+        """
+        Traz a escrita do app para o espelho antes da próxima leitura. Se o delta
+        falhar, a tabela deixa de ser servida até a thread conseguir sincronizar.
+        """
+        self._prontas.discard(tabela)
+        if tabela not in self._desativadas:
+            self.sincronizar(tabela)
+
+    def aplicar(self, tabela: str, tipo: str, registro: Dict[str, Any]):
+        """Grava no espelho uma alteração recebida do feed (ver feed_alteracoes.py)"""
+        if tabela not in self._prontas:
+            return
+        with self._lock, self._conexao:
+            if tipo == "DELETE":
+                self._conexao.execute(f"delete from {tabela} where id = ?", (registro.get("id"),))
+            else:
+                valores = self._valores(tabela, registro)
+                self._conexao.execute(
+                    f"insert or replace into {tabela} values ({', '.join('?' * len(valores))})", valores)
+
+    def _autorizado(self, tabela: str, jwt_token: str, dono: tuple) -> bool:
+        """O que o RLS mostraria: admins do cadastro da tabela veem tudo, os demais só as próprias linhas"""
+        usuario = usuario_do_token(jwt_token)
+        if not usuario:
+            return False
+        if dono and dono[0] in DONOS_LISTAS[tabela] and str(dono[1]) == usuario:
+            return True
+        return ve_todas(tabela, jwt_token)
+
+    def listar(self, tabela: str, jwt_token: str, dono: tuple = None, resumo: bool = False,
+               status: List[str] = None, termo: str = None) -> Optional[List[Dict[str, Any]]]:
+        """
+        Linhas da tabela, mais recentes primeiro. dono=(coluna, id) restringe às
+        linhas do usuário; status filtra pela coluna de status e termo (só buscas)
+        pela marca ou consultor, sem diferenciar acentos. None quando o espelho não
+        pode responder (tabela ainda não carregada ou fora da visibilidade do token).
+        """
+        if tabela not in self._prontas or not self._autorizado(tabela, jwt_token, dono):
+            return None
+
+        condicoes, params = [], []
+        if dono:
+            condicoes.append(f"{dono[0]} = ?")
+            params.append(str(dono[1]))
+        if status:
+            condicoes.append(f"status in ({', '.join('?' * len(status))})")
+            params.extend(status)
+        if termo and termo.strip() and tabela == "buscas":
+            condicoes.append("instr(texto, ?) > 0")
+            params.append(_sem_acento(termo.strip()))
+        sql = f"select {'resumo' if resumo else 'dados'} from {tabela}"
+        if condicoes:
+            sql += " where " + " and ".join(condicoes)
+        sql += " order by created_at desc, id desc"
+
+        with self._lock:
+            # A tabela pode ter sido refeita (ver _preparar_tabela) depois da verificação acima
+            if tabela not in self._prontas:
+                return None
+            return [json.loads(dados) for (dados,) in self._conexao.execute(sql, params)]
+
+
+# None: ainda não criado; False: configuração incompleta
+_espelho = None
+_espelho_lock = threading.Lock()
+
+
+def espelho_local() -> Optional[EspelhoLocal]:
+    """Espelho único do processo, criado no primeiro uso; None se não configurado"""
+    global _espelho
+    if not SUPABASE_ESPELHO:
+        return None
+    with _espelho_lock:
+        if _espelho is None:
+            chave = os.getenv("SUPABASE_SERVICE_KEY")
+            if chave:
+                _espelho = EspelhoLocal(SUPABASE_ESPELHO, chave)
+            else:
+                logging.warning("SUPABASE_ESPELHO definido sem SUPABASE_SERVICE_KEY; espelho local desativado")
+                _espelho = False
+        return _espelho or None
@@ -0,0 +1,164 @@
+"""
+Feed de alterações de buscas, objecao e deposito_patente.
+
+Uma fonte (Supabase Realtime ou FonteLocal, para testes) entrega cada INSERT,
+UPDATE e DELETE; o feed aplica a alteração às listagens compartilhadas do
+processo (cópias delta, cache de leitura e espelho local) e incrementa a versão
+da tabela. As páginas abertas acompanham a versão (ver
+ui_components.render_atualizacao_automatica) e só fazem rerun quando algo muda,
+lendo as listas já atualizadas em memória.
+
+Ativado com SUPABASE_FEED=realtime (requer SUPABASE_SERVICE_KEY e a migração
+supabase/migrations/*_feed_alteracoes.sql) ou SUPABASE_FEED=local.
+"""
+import os
+import asyncio
+import logging
+import threading
+from typing import Any, Callable, Dict, Iterable, Optional
+
+from supabase_agent import DONOS_LISTAS, cache_listas, snapshots_listas
+from espelho_local import espelho_local, ve_todas
+
+
+# Fonte do feed: "realtime", "local" ou vazio (desativado)
+SUPABASE_FEED = os.getenv("SUPABASE_FEED", "").strip().lower()
+# Segundos entre as verificações de versão feitas pelas páginas abertas
+SUPABASE_FEED_VERIFICAR = int(os.getenv("SUPABASE_FEED_VERIFICAR", 5))
+
+TABELAS = tuple(DONOS_LISTAS)
+
+
+class FonteLocal:
+    """Fonte em processo, para testes e desenvolvimento: publicar() entrega o evento na hora"""
+
+    def __init__(self):
+        self._entregar = None
+
+    def iniciar(self, entregar: Callable[[Dict[str, Any]], None], conectado: Callable[[bool], None]):
+        self._entregar = entregar
+        conectado(True)
+
+    def publicar(self, tabela: str, tipo: str, registro: Dict[str, Any]):
+        """Simula uma alteração no banco; tipo é INSERT, UPDATE ou DELETE"""
+        self._entregar({"tabela": tabela, "tipo": tipo, "registro": registro})
+
+
+class FonteRealtime:
+    """
+    Supabase Realtime (postgres_changes) das tabelas, ouvido com a chave de serviço
+    em uma thread com loop asyncio próprio. O cliente reconecta sozinho; a cada
+    (re)inscrição ou queda do canal o feed é avisado por conectado().
+    """
+
+    def __init__(self, url: str, chave: str, tabelas: Iterable[str] = TABELAS):
+        self.url = url
+        self.chave = chave
+        self.tabelas = tuple(tabelas)
+
+    def iniciar(self, entregar: Callable[[Dict[str, Any]], None], conectado: Callable[[bool], None]):
+        threading.Thread(target=asyncio.run, args=(self._ouvir(entregar, conectado),),
+                         name="feed-realtime", daemon=True).start()
+
+    @staticmethod
+    def _evento(payload: Dict[str, Any]) -> Dict[str, Any]:
+        dados = payload["data"]
+        # DELETE traz só a chave primária em old_record
+        registro = dados.get("record") or dados.get("old_record") or {}
+        return {"tabela": dados["table"], "tipo": dados["type"], "registro": registro}
+
+    async def _ouvir(self, entregar, conectado):
+        from realtime import AsyncRealtimeClient, RealtimeSubscribeStates
+
+        def ao_mudar_estado(estado, erro=None):
+            if erro:
+                logging.error(f"Feed de alterações: {str(erro)}")
+            conectado(estado == RealtimeSubscribeStates.SUBSCRIBED)
+
+        try:
+            cliente = AsyncRealtimeClient(f"{self.url}/realtime/v1", self.chave)
+            await cliente.connect()
+            canal = cliente.channel("listagens")
+            for tabela in self.tabelas:
+                canal.on_postgres_changes("*", schema="public", table=tabela,
+                                          callback=lambda payload: entregar(self._evento(payload)))
+            await canal.subscribe(ao_mudar_estado)
+            # Os eventos chegam pela tarefa de escuta do cliente
+            await asyncio.Event().wait()
+        except Exception as e:
+            logging.error(f"Feed de alterações desconectado: {str(e)}")
+            conectado(False)
+
+
+class FeedAlteracoes:
+    """
+    Aplica as alterações da fonte às listagens compartilhadas e mantém uma versão
+    por tabela. Enquanto a fonte está conectada, as cópias delta não são relidas
+    por TTL (ver SnapshotsListas.definir_ao_vivo).
+    """
+
+    def __init__(self, fonte):
+        self.fonte = fonte
+        self._versoes = {tabela: 0 for tabela in TABELAS}
+        self._lock = threading.Lock()
+
+    def iniciar(self):
+        self.fonte.iniciar(self._aplicar, self._conectado)
+
+    def _conectado(self, conectado: bool):
+        for tabela in TABELAS:
+            snapshots_listas().definir_ao_vivo(tabela, conectado)
+        if conectado:
+            logging.info("Feed de alterações conectado")
+        else:
+            logging.warning("Feed de alterações fora do ar; listagens voltam à releitura por TTL")
+
+    def _aplicar(self, evento: Dict[str, Any]):
+        tabela, tipo, registro = evento["tabela"], evento["tipo"], evento["registro"]
+        if tabela not in self._versoes or not registro.get("id"):
+            return
+        try:
+            snapshots_listas().aplicar(
+                tabela, tipo, registro, lambda jwt_token: ve_todas(tabela, jwt_token, avisar=False))
+            # O cache guarda respostas prontas: as listas dos donos da linha são descartadas.
+            # Sem as colunas de dono (DELETE) não há como saber quais, então cai a tabela
+            donos = [registro[coluna] for coluna in DONOS_LISTAS[tabela] if coluna in registro]
+            cache_listas().invalidar(tabela, donos if len(donos) == len(DONOS_LISTAS[tabela]) else None)
+            espelho = espelho_local()
+            if espelho:
+                espelho.aplicar(tabela, tipo, registro)
+        except Exception as e:
+            logging.error(f"Erro ao aplicar alteração de {tabela}: {str(e)}")
+        with self._lock:
+            self._versoes[tabela] += 1
+
+    def versao(self, tabelas: Iterable[str]) -> tuple:
+        """Versões das tabelas: mudam a cada alteração recebida"""
+        with self._lock:
+            return tuple(self._versoes[tabela] for tabela in tabelas)
+
+
+# None: ainda não criado; False: configuração incompleta
+_feed = None
+_feed_lock = threading.Lock()
+
+
+def feed_alteracoes() -> Optional[FeedAlteracoes]:
+    """Feed único do processo, iniciado no primeiro uso; None se desativado"""
+    global _feed
+    if not SUPABASE_FEED:
+        return None
+    with _feed_lock:
+        if _feed is None:
+            if SUPABASE_FEED == "local":
+                fonte = FonteLocal()
+            elif SUPABASE_FEED == "realtime" and os.getenv("SUPABASE_SERVICE_KEY"):
+                fonte = FonteRealtime(os.getenv("SUPABASE_URL"), os.getenv("SUPABASE_SERVICE_KEY"))
+            else:
+                logging.warning(f"SUPABASE_FEED={SUPABASE_FEED} inválido ou sem SUPABASE_SERVICE_KEY; "
+                                "feed de alterações desativado")
+                _feed = False
+                return None
+            _feed = FeedAlteracoes(fonte)
+            _feed.iniciar()
+        return _feed or None
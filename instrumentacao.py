@@ -0,0 +1,343 @@
+"""
+Instrumentação das chamadas HTTP ao Supabase (REST, Storage e Auth).
+
+Cada chamada registra o modelo do endpoint (método, caminho sem ids/arquivos e
+nomes dos parâmetros), status, bytes enviados e recebidos e latência. As
+chamadas são agregadas em histogramas por endpoint e, por rerun do Streamlit,
+em histogramas por página (chamadas, latência e bytes por rerun).
+
+Uso no app: main() roda dentro de medir_rerun() e a página escolhida é
+informada com definir_pagina(). Com SUPABASE_ORCAMENTO_CHAMADAS=1 (depuração)
+cada rerun que passa do orçamento da página (ORCAMENTOS_PAGINAS) falha com
+AssertionError na própria tela. Em testes, verificar_orcamento("Minhas Buscas")
+confere o último rerun da página e orcamento_chamadas(3) um trecho de código.
+"""
+import os
+import re
+import time
+import logging
+import threading
+from bisect import bisect_left
+from collections import Counter
+from contextlib import contextmanager
+from typing import Any, Dict, List, Optional
+from urllib.parse import parse_qsl, urlsplit
+
+from streamlit.runtime.scriptrunner import get_script_run_ctx
+
+
+# Limites superiores das faixas de cada histograma (a última faixa é "acima de")
+LIMITES_LATENCIA_MS = (5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000)
+LIMITES_BYTES = (1_000, 10_000, 100_000, 1_000_000, 10_000_000)
+LIMITES_CHAMADAS = (0, 1, 2, 3, 5, 8, 13, 21, 34)
+
+# Falha os reruns acima do orçamento (modo de depuração)
+SUPABASE_ORCAMENTO_CHAMADAS = os.getenv("SUPABASE_ORCAMENTO_CHAMADAS", "") in ("1", "true")
+
+# Página do rerun antes do login (ver app.py)
+PAGINA_LOGIN = "Login"
+
+# Chamadas ao Supabase por rerun de cada página do menu. Não vale para o rerun
+# que abre a sessão (o primeiro depois do login), que também carrega os
+# cadastros do usuário (perfil, juridico_marca e funcionario)
+ORCAMENTOS_PAGINAS = {
+    "Solicitar Busca": 3,
+    "Minhas Buscas": 3,
+    "Solicitar Serviço de Patente": 3,
+    "Minhas Patentes": 3,
+    "Solicitação para o Jurídico": 3,
+    "Minhas Solicitações Jurídicas": 3,
+    "Relatório de Custos": 3,
+}
+
+# Segmentos do Storage mantidos no modelo antes do bucket
+_PREFIXOS_STORAGE = ("public", "sign", "authenticated", "info", "list")
+# Segmentos de caminho que são ids (números ou UUIDs)
+_PADRAO_ID = re.compile(r"^(\d+|[0-9a-fA-F]{8}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{12})$")
+
+
+def modelo_endpoint(metodo: str, url: str) -> str:
+    """
+    Modelo da chamada para agregação: ids e nomes de arquivo viram marcadores e
+    a query string fica só com os nomes dos parâmetros, ex.:
+    GET /rest/v1/buscas?consultor_id&limit&order&select
+    """
+    partes = urlsplit(url)
+    segmentos = [segmento for segmento in partes.path.split("/") if segmento]
+    if segmentos[:3] == ["storage", "v1", "object"]:
+        # storage/v1/object/[public/]<bucket>/<caminho do arquivo>
+        fixos = 5 if len(segmentos) > 3 and segmentos[3] in _PREFIXOS_STORAGE else 4
+        if len(segmentos) > fixos:
+            segmentos = segmentos[:fixos] + ["{arquivo}"]
+    else:
+        segmentos = ["{id}" if _PADRAO_ID.match(segmento) else segmento for segmento in segmentos]
+    parametros = sorted({chave for chave, _ in parse_qsl(partes.query, keep_blank_values=True)})
+    return f"{metodo.upper()} /{'/'.join(segmentos)}" + (f"?{'&'.join(parametros)}" if parametros else "")
+
+
+class Histograma:
+    """Contagem por faixas fixas, com total, soma e percentis aproximados (limite da faixa)"""
+
+    def __init__(self, limites):
+        self.limites = tuple(limites)
+        self.contagens = [0] * (len(self.limites) + 1)
+        self.total = 0
+        self.soma = 0.0
+
+    def registrar(self, valor: float):
+        self.contagens[bisect_left(self.limites, valor)] += 1
+        self.total += 1
+        self.soma += valor
+
+    def percentil(self, p: float) -> Optional[float]:
+        """Limite superior da faixa que contém o percentil p (0-100); None se vazio"""
+        if not self.total:
+            return None
+        alvo = self.total * p / 100
+        acumulado = 0
+        for indice, contagem in enumerate(self.contagens):
+            acumulado += contagem
+            if acumulado >= alvo and contagem:
+                return self.limites[indice] if indice < len(self.limites) else float("inf")
+        return float("inf")
+
+    def como_dict(self) -> Dict[str, Any]:
+        faixas = [f"<={limite}" for limite in self.limites] + [f">{self.limites[-1]}"]
+        return {
+            "faixas": dict(zip(faixas, self.contagens)),
+            "total": self.total,
+            "media": self.soma / self.total if self.total else None,
+            "p50": self.percentil(50),
+            "p95": self.percentil(95),
+        }
+
+
+def _escopo_atual():
+    """Sessão do Streamlit da thread (as threads de leitura herdam o contexto) ou a própria thread"""
+    ctx = get_script_run_ctx(suppress_warning=True)
+    return ctx.session_id if ctx else threading.get_ident()
+
+
+class MedidorChamadas:
+    """
+    Registro das chamadas HTTP do processo. Guarda o rerun em andamento de cada
+    sessão, o último rerun concluído de cada sessão e de cada página e os
+    histogramas por endpoint e por página.
+    """
+
+    # Sessões cujo último rerun fica guardado
+    LIMITE_SESSOES = 1000
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._reruns = {}
+        self._ultimo_da_sessao = {}
+        self._ultimo_da_pagina = {}
+        self._coletores = []
+        self._endpoints = {}
+        self._paginas = {}
+
+    def registrar(self, metodo: str, url: str, status: Optional[int], enviados: int, recebidos: int,
+                  duracao: float):
+        """Registra uma chamada; duracao em segundos, status None para erro de conexão"""
+        chamada = {
+            "modelo": modelo_endpoint(metodo, url),
+            "status": status,
+            "enviados": enviados,
+            "recebidos": recebidos,
+            "duracao_ms": duracao * 1000,
+        }
+        escopo = _escopo_atual()
+        with self._lock:
+            endpoint = self._endpoints.get(chamada["modelo"])
+            if endpoint is None:
+                endpoint = self._endpoints[chamada["modelo"]] = {
+                    "latencia_ms": Histograma(LIMITES_LATENCIA_MS),
+                    "bytes": Histograma(LIMITES_BYTES),
+                    "status": Counter(),
+                }
+            endpoint["latencia_ms"].registrar(chamada["duracao_ms"])
+            endpoint["bytes"].registrar(recebidos)
+            endpoint["status"][status] += 1
+
+            rerun = self._reruns.get(escopo)
+            if rerun is not None:
+                rerun["chamadas"].append(chamada)
+            for coletor in self._coletores:
+                if coletor["escopo"] == escopo:
+                    coletor["chamadas"].append(chamada)
+
+    def iniciar_rerun(self, pagina: str = None):
+        with self._lock:
+            self._reruns[_escopo_atual()] = {"pagina": pagina, "inicio": time.perf_counter(), "chamadas": []}
+
+    def definir_pagina(self, pagina: str):
+        """Página do rerun em andamento da sessão (a escolha do menu)"""
+        with self._lock:
+            rerun = self._reruns.get(_escopo_atual())
+            if rerun is not None:
+                rerun["pagina"] = pagina
+
+    def finalizar_rerun(self) -> Optional[Dict[str, Any]]:
+        """Encerra o rerun da sessão e o agrega nos histogramas da página"""
+        escopo = _escopo_atual()
+        with self._lock:
+            rerun = self._reruns.pop(escopo, None)
+            if rerun is None:
+                return None
+            rerun["duracao_ms"] = (time.perf_counter() - rerun.pop("inicio")) * 1000
+            rerun["pagina"] = rerun["pagina"] or "(sem página)"
+            anterior = self._ultimo_da_sessao.get(escopo)
+            rerun["abertura"] = anterior is None or anterior["pagina"] == PAGINA_LOGIN
+            chamadas = rerun["chamadas"]
+
+            pagina = self._paginas.get(rerun["pagina"])
+            if pagina is None:
+                pagina = self._paginas[rerun["pagina"]] = {
+                    "chamadas": Histograma(LIMITES_CHAMADAS),
+                    "latencia_ms": Histograma(LIMITES_LATENCIA_MS),
+                    "bytes": Histograma(LIMITES_BYTES),
+                    "endpoints": Counter(),
+                }
+            pagina["chamadas"].registrar(len(chamadas))
+            pagina["latencia_ms"].registrar(sum(chamada["duracao_ms"] for chamada in chamadas))
+            pagina["bytes"].registrar(sum(chamada["recebidos"] for chamada in chamadas))
+            pagina["endpoints"].update(chamada["modelo"] for chamada in chamadas)
+
+            # Mantém só as sessões mais recentes (a ordem do dict é a de inserção)
+            self._ultimo_da_sessao.pop(escopo, None)
+            self._ultimo_da_sessao[escopo] = rerun
+            if len(self._ultimo_da_sessao) > self.LIMITE_SESSOES:
+                del self._ultimo_da_sessao[next(iter(self._ultimo_da_sessao))]
+            self._ultimo_da_pagina[rerun["pagina"]] = rerun
+
+        logging.info(f"Rerun de {rerun['pagina']}: {len(chamadas)} chamada(s) ao Supabase, "
+                     f"{sum(chamada['duracao_ms'] for chamada in chamadas):.0f} ms em rede, "
+                     f"{sum(chamada['recebidos'] for chamada in chamadas)} bytes")
+        return rerun
+
+    def ultimo_rerun(self, pagina: str = None) -> Optional[Dict[str, Any]]:
+        """Último rerun concluído da página ou, sem página, da sessão atual"""
+        with self._lock:
+            if pagina is not None:
+                return self._ultimo_da_pagina.get(pagina)
+            return self._ultimo_da_sessao.get(_escopo_atual())
+
+    def resumo(self) -> Dict[str, Any]:
+        """Histogramas por página e por endpoint, prontos para exibir ou serializar"""
+        with self._lock:
+            return {
+                "paginas": {
+                    nome: {
+                        "reruns": pagina["chamadas"].total,
+                        "chamadas_por_rerun": pagina["chamadas"].como_dict(),
+                        "latencia_ms_por_rerun": pagina["latencia_ms"].como_dict(),
+                        "bytes_por_rerun": pagina["bytes"].como_dict(),
+                        "endpoints": dict(pagina["endpoints"].most_common()),
+                    }
+                    for nome, pagina in self._paginas.items()
+                },
+                "endpoints": {
+                    modelo: {
+                        "latencia_ms": endpoint["latencia_ms"].como_dict(),
+                        "bytes": endpoint["bytes"].como_dict(),
+                        "status": dict(endpoint["status"]),
+                    }
+                    for modelo, endpoint in self._endpoints.items()
+                },
+            }
+
+    @contextmanager
+    def coletar(self):
+        """Coleta numa lista as chamadas feitas pela sessão (ou thread) atual dentro do bloco"""
+        coletor = {"escopo": _escopo_atual(), "chamadas": []}
+        with self._lock:
+            self._coletores.append(coletor)
+        try:
+            yield coletor["chamadas"]
+        finally:
+            with self._lock:
+                self._coletores.remove(coletor)
+
+
+_medidor = MedidorChamadas()
+
+
+def medidor_chamadas() -> MedidorChamadas:
+    """Medidor único do processo (ver MedidorChamadas)"""
+    return _medidor
+
+
+def registrar_chamada(metodo: str, url: str, status: Optional[int], enviados: int, recebidos: int,
+                      duracao: float):
+    _medidor.registrar(metodo, url, status, enviados, recebidos, duracao)
+
+
+@contextmanager
+def medir_rerun(pagina: str = None):
+    """
+    Envolve uma execução do script: as chamadas feitas dentro dela formam um rerun.
+    Com SUPABASE_ORCAMENTO_CHAMADAS, um rerun concluído acima do orçamento da
+    página falha (ver ORCAMENTOS_PAGINAS).
+    """
+    _medidor.iniciar_rerun(pagina)
+    try:
+        yield
+    finally:
+        rerun = _medidor.finalizar_rerun()
+    if SUPABASE_ORCAMENTO_CHAMADAS and rerun and not rerun["abertura"]:
+        _conferir_orcamento(rerun, ORCAMENTOS_PAGINAS.get(rerun["pagina"]))
+
+
+def definir_pagina(pagina: str):
+    _medidor.definir_pagina(pagina)
+
+
+def _descrever(chamadas: List[Dict[str, Any]]) -> str:
+    return "\n".join(f"  {chamada['modelo']} -> {chamada['status']} "
+                     f"({chamada['duracao_ms']:.0f} ms, {chamada['recebidos']} bytes)"
+                     for chamada in chamadas)
+
+
+def _conferir_orcamento(rerun: Dict[str, Any], maximo: Optional[int]) -> int:
+    chamadas = rerun["chamadas"]
+    assert maximo is None or len(chamadas) <= maximo, (
+        f"{rerun['pagina']}: {len(chamadas)} chamadas ao Supabase no rerun (máximo {maximo}):\n"
+        f"{_descrever(chamadas)}")
+    return len(chamadas)
+
+
+def verificar_orcamento(pagina: str, maximo: int = None) -> int:
+    """
+    Falha (AssertionError) se o último rerun concluído da página fez mais de
+    maximo chamadas ao Supabase (padrão: ORCAMENTOS_PAGINAS). Retorna o número de
+    chamadas. Pensado para testes com streamlit.testing (AppTest), que rodam o
+    app no mesmo processo.
+    """
+    rerun = _medidor.ultimo_rerun(pagina)
+    assert rerun is not None, f"Nenhum rerun registrado para a página {pagina!r}"
+    return _conferir_orcamento(rerun, ORCAMENTOS_PAGINAS.get(pagina) if maximo is None else maximo)
+
+
+@contextmanager
+def orcamento_chamadas(maximo: int, descricao: str = "trecho"):
+    """Falha (AssertionError) se o bloco fizer mais de maximo chamadas ao Supabase"""
+    with _medidor.coletar() as chamadas:
+        yield chamadas
+    assert len(chamadas) <= maximo, (
+        f"{descricao}: {len(chamadas)} chamadas ao Supabase (máximo {maximo}):\n{_descrever(chamadas)}")
+
+
+def instrumentar_httpx(cliente):
+    """Registra as chamadas feitas por um httpx.Client (clientes da biblioteca supabase)"""
+    def ao_responder(resposta):
+        resposta.read()
+        try:
+            enviados = len(resposta.request.content)
+        except Exception:
+            enviados = 0
+        registrar_chamada(resposta.request.method, str(resposta.request.url), resposta.status_code,
+                          enviados, len(resposta.content), resposta.elapsed.total_seconds())
+
+    cliente.event_hooks["response"].append(ao_responder)
+    return cliente
@@ -295,17 +295,35 @@ class BuscaManager:
             logging.error(f"Erro ao enviar busca: {e}")
             return False
 
-    def buscar_buscas_usuario(self, user_id: str = "", is_admin: bool = False) -> List[Dict[str, Any]]:
+    def buscar_buscas_usuario(self, user_id: str = "", is_admin: bool = False, resumo: bool = False,
+                              status: Optional[List[str]] = None, termo: Optional[str] = None) -> List[Dict[str, Any]]:
         """
         Busca as buscas do usuário ou todas as buscas do sistema se is_admin=True.
+        Com resumo=True traz só as colunas exibidas nos cards fechados; status e
+        termo (marca ou consultor, sem diferenciar acentos) filtram no Supabase.
         """
         if "jwt_token" not in st.session_state or not st.session_state.jwt_token:
             st.error("Você precisa estar logado para acessar esta funcionalidade.")
             st.stop()
         if is_admin:
-            return self.supabase_agent.get_all_buscas_rest(st.session_state.jwt_token)
+            return self.supabase_agent.get_all_buscas_rest(st.session_state.jwt_token, resumo=resumo,
+                                                           status=status, termo=termo)
         else:
-            return self.supabase_agent.get_buscas_rest(user_id or "", st.session_state.jwt_token)
+            return self.supabase_agent.get_buscas_rest(user_id or "", st.session_state.jwt_token, resumo=resumo,
+                                                       status=status, termo=termo)
+
+    def iterar_buscas_usuario(self, user_id: str = "", is_admin: bool = False, colunas: str = "*"):
+        """
+        Como buscar_buscas_usuario, mas devolve um gerador paginado (mais recentes
+        primeiro) para quem consome as buscas aos poucos, como o relatório de custos.
+        """
+        if "jwt_token" not in st.session_state or not st.session_state.jwt_token:
+            st.error("Você precisa estar logado para acessar esta funcionalidade.")
+            st.stop()
+        if is_admin:
+            return self.supabase_agent.iter_all_buscas_rest(st.session_state.jwt_token, colunas)
+        else:
+            return self.supabase_agent.iter_buscas_rest(user_id or "", st.session_state.jwt_token, colunas)
 
     def filtrar_buscas(self, buscas: List[Dict[str, Any]],
                        busca_marca: Optional[str] = None,
@@ -348,6 +366,23 @@ class BuscaManager:
             st.error("Erro ao atualizar status da busca!")
             return False
 
+    def atualizar_status_buscas(self, busca_ids: List[str], novo_status: str) -> int:
+        """
+        Move várias buscas para novo_status em uma única requisição.
+        Retorna quantas buscas foram alteradas.
+        """
+        if "jwt_token" not in st.session_state or not st.session_state.jwt_token:
+            st.error("Você precisa estar logado para acessar esta funcionalidade.")
+            st.stop()
+        alteradas = self.supabase_agent.update_buscas_status(
+            busca_ids, novo_status, st.session_state.jwt_token)
+        if alteradas:
+            status_text = self.get_status_display(novo_status)
+            st.success(f"{alteradas} busca(s) atualizada(s) para: {status_text}")
+        else:
+            st.error("Erro ao atualizar status das buscas!")
+        return alteradas
+
     def get_status_display(self, status: str) -> str:
         """Retorna o texto de exibição para cada status"""
         status_map = {
@@ -404,7 +439,13 @@ class BuscaManager:
                         fila_info = f" ({pos} na fila)"
             expander_label = f"{status_icon} {busca.get('marca', '')} - {busca.get('data', '')} - {status_text}{fila_info}"
 
-        with st.expander(expander_label):
+        with st.expander(expander_label, key=f"card_busca_{busca['id']}", on_change="rerun") as card:
+            if not card.open:
+                return
+            # Linha completa (dados_completos, arquivos) só é baixada com o card aberto
+            busca = self.supabase_agent.carregar_registro_completo(
+                "buscas", busca)
+
             st.write(f"Tipo: {busca.get('tipo_busca', '')}")
             st.write(f"Consultor: {busca.get('nome_consultor', '')}")
             st.write(f"Status: {status_text}")
@@ -2,10 +2,14 @@ import streamlit as st
 import json
 import logging
 from datetime import datetime, date, timedelta
-from typing import Dict, List, Any, Optional, Tuple
+from typing import Dict, Any, Optional, Tuple, Iterable
 from marcas.busca_manager import get_user_attr, get_user_id
 
 
+# Colunas usadas no cálculo do relatório (dados_completos só entra como fallback das classes)
+COLUNAS_RELATORIO = "id,created_at,marca,nome_consultor,status_busca,classes,dados_completos"
+
+
 class RelatorioCustos:
     """Gerencia relatórios de custos de análise de marca por consultor"""
 
@@ -83,12 +87,13 @@ class RelatorioCustos:
                 f"Erro ao calcular custo da busca {busca.get('id', 'N/A')}: {e}")
             return 0.0
 
-    def gerar_relatorio_custos(self, buscas: List[Dict[str, Any]], filtro_consultor: str = None, filtro_periodo: Tuple[date, date] = None) -> Dict[str, Any]:
+    def gerar_relatorio_custos(self, buscas: Iterable[Dict[str, Any]], filtro_consultor: str = None, filtro_periodo: Tuple[date, date] = None) -> Dict[str, Any]:
         """
         Gera relatório de custos por consultor.
+        As buscas são consumidas uma a uma, então aceita o gerador paginado do agente.
 
         Args:
-            buscas: Lista de buscas
+            buscas: Lista ou gerador de buscas
             filtro_consultor: Nome do consultor para filtrar (opcional)
             filtro_periodo: Tupla (data_inicio, data_fim) para filtrar por período (opcional)
 
@@ -97,28 +102,29 @@ class RelatorioCustos:
         """
         # Filtrar por consultor se especificado
         if filtro_consultor:
-            buscas = [b for b in buscas if filtro_consultor.lower() in b.get(
-                'nome_consultor', '').lower()]
+            buscas = (b for b in buscas if filtro_consultor.lower() in b.get(
+                'nome_consultor', '').lower())
 
         # Filtrar por período se especificado
         if filtro_periodo:
             data_inicio, data_fim = filtro_periodo
-            buscas_filtradas = []
-            for busca in buscas:
+
+            def no_periodo(busca):
                 try:
                     data_busca = datetime.fromisoformat(
                         busca.get('created_at', '').replace('Z', '+00:00'))
-                    if data_inicio <= data_busca.date() <= data_fim:
-                        buscas_filtradas.append(busca)
+                    return data_inicio <= data_busca.date() <= data_fim
                 except:
-                    continue
-            buscas = buscas_filtradas
+                    return False
+            buscas = (b for b in buscas if no_periodo(b))
 
         # Agrupar por consultor e mês
         custos_por_consultor_mes = {}
         total_geral = 0.0
+        total_buscas = 0
 
         for busca in buscas:
+            total_buscas += 1
             consultor = busca.get(
                 'nome_consultor', 'Consultor não identificado')
             custo = self.calcular_custo_busca(busca)
@@ -156,7 +162,7 @@ class RelatorioCustos:
         return {
             'custos_por_consultor_mes': custos_por_consultor_mes,
             'total_geral': total_geral,
-            'total_buscas': len(buscas),
+            'total_buscas': total_buscas,
             'periodo': filtro_periodo,
             'consultor_filtro': filtro_consultor
         }
@@ -199,22 +205,23 @@ class RelatorioCustos:
 
         # Buscar buscas com tratamento de erro melhorado
         try:
+            # Gerador paginado: o relatório agrega página a página, sem manter a tabela em memória
             if is_admin:
-                buscas = self.busca_manager.buscar_buscas_usuario(
-                    is_admin=True)
+                buscas = self.busca_manager.iterar_buscas_usuario(
+                    is_admin=True, colunas=COLUNAS_RELATORIO)
             else:
                 # Para consultores, buscar apenas suas próprias buscas
-                buscas = self.busca_manager.buscar_buscas_usuario(
-                    user_id, is_admin=False)
+                buscas = self.busca_manager.iterar_buscas_usuario(
+                    user_id, is_admin=False, colunas=COLUNAS_RELATORIO)
 
-            if not buscas:
+            # Gerar relatório sem filtros (mostrar todos)
+            relatorio = self.gerar_relatorio_custos(buscas, None, None)
+
+            if not relatorio['total_buscas']:
                 st.info("📊 Nenhuma busca encontrada para gerar o relatório.")
                 st.info("As buscas aparecerão aqui após serem concluídas.")
                 return
 
-            # Gerar relatório sem filtros (mostrar todos)
-            relatorio = self.gerar_relatorio_custos(buscas, None, None)
-
             # Verificar se há dados no relatório
             if not relatorio['custos_por_consultor_mes']:
                 st.info("📊 Nenhum dado encontrado com os filtros aplicados.")
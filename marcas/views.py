@@ -2,6 +2,7 @@ from marcas.busca_manager import get_user_attr
 import streamlit as st
 from datetime import datetime
 from collections import defaultdict
+from ui_components import render_alteracao_status_em_lote, render_atualizacao_automatica
 
 MODULO_INFO = {
     "nome": "Marcas",
@@ -191,6 +192,8 @@ def minhas_buscas(busca_manager, is_admin, todas_buscas_fila=None):
         st.error("Você precisa estar logado para acessar esta funcionalidade.")
         st.stop()
     st.markdown("<h2>Buscas Solicitadas</h2>", unsafe_allow_html=True)
+    # Novas buscas e mudanças de status aparecem sem recarregar a página
+    render_atualizacao_automatica(("buscas",), "minhas_buscas")
 
     # Campo de busca unificado
     busca_geral = st.text_input(
@@ -203,164 +206,82 @@ def minhas_buscas(busca_manager, is_admin, todas_buscas_fila=None):
         return getattr(user, 'id', None)
     user_id = get_user_id(st.session_state.user)
 
-    # Se é admin, buscar todas as buscas
-    if is_admin:
-        buscas = busca_manager.buscar_buscas_usuario(is_admin=True)
-    else:
-        # Para não-admin, buscar apenas buscas do consultor
-        buscas = busca_manager.buscar_buscas_usuario(user_id, is_admin=False)
-
-    # Filtro unificado
-    if busca_geral:
-        termo = busca_geral.lower()
-        buscas = [
-            b for b in buscas
-            if termo in b.get('marca', '').lower() or termo in b.get('nome_consultor', '').lower()
-        ]
-
-    # Ordenar por prioridade
-    buscas = busca_manager.ordenar_buscas_prioridade(buscas)
-
-    # Buscar todas as buscas para a fila global (apenas se necessário)
-    todas_buscas_fila = None
-    if not is_admin:
-        # Para não-admin, buscar todas as buscas apenas para calcular posição na fila
-        todas_buscas_fila = busca_manager.buscar_buscas_usuario(is_admin=True)
-        if busca_geral:
-            termo = busca_geral.lower()
-            todas_buscas_fila = [
-                b for b in todas_buscas_fila
-                if termo in b.get('marca', '').lower() or termo in b.get('nome_consultor', '').lower()
-            ]
-        todas_buscas_fila = busca_manager.ordenar_buscas_prioridade(
-            todas_buscas_fila)
-    else:
-        # Para admin, usar as mesmas buscas já filtradas
-        todas_buscas_fila = buscas
+    # Status que ainda estão na fila de análise (usados para a posição na fila)
+    status_fila = [busca_manager.STATUS_PENDENTE,
+                   busca_manager.STATUS_RECEBIDA, busca_manager.STATUS_EM_EXECUCAO]
 
-    # Organizar buscas por status
-    buscas_por_status = busca_manager.separar_buscas_por_status(buscas)
+    def carregar(status, todas=False):
+        # Filtro de status e texto aplicados no Supabase (coluna busca_texto)
+        buscas = busca_manager.buscar_buscas_usuario(
+            user_id, is_admin=is_admin or todas, resumo=True, status=status, termo=busca_geral)
+        return busca_manager.ordenar_buscas_prioridade(buscas)
 
-    # Inicializar variáveis de session_state necessárias
-    if 'aba_atual' not in st.session_state:
-        st.session_state.aba_atual = 0
-    if 'admin_aba_atual' not in st.session_state:
-        st.session_state.admin_aba_atual = 0
-
-    if is_admin:
-        # Usar lógica FIXA como os consultores para evitar problemas de redirecionamento
-        pendentes = buscas_por_status[busca_manager.STATUS_PENDENTE]
-        recebidas = buscas_por_status[busca_manager.STATUS_RECEBIDA]
-        em_execucao = buscas_por_status[busca_manager.STATUS_EM_EXECUCAO]
-        concluidas = buscas_por_status[busca_manager.STATUS_CONCLUIDA]
-
-        # Criar abas em ordem FIXA
-        abas = []
-        labels = []
-
-        # Sempre criar todas as abas em ordem fixa
-        labels.append("Pendentes")
-        abas.append(pendentes)
-        labels.append("Recebidas")
-        abas.append(recebidas)
-        labels.append("Em Execução")
-        abas.append(em_execucao)
-        labels.append("Concluídas")
-        abas.append(concluidas)
-
-        if not any(abas):  # Se todas as abas estão vazias
-            st.info("Nenhuma busca realizada ainda.")
+    def renderizar_concluidas(buscas_concluidas, agrupar_consultor):
+        if not buscas_concluidas:
+            st.info("Nenhuma busca concluída ainda.")
             return
-
-        # Usar tabs sem key (st.tabs não aceita key)
-        tabs = st.tabs(labels)
-
-        # Detectar qual aba está ativa e manter estado
-        for i, tab in enumerate(tabs):
-            with tab:
-                # Manter estado da aba ativa
-                if 'aba_atual' not in st.session_state:
-                    st.session_state.aba_atual = i
-
-                if labels[i] == "Concluídas":
-                    # Organizar por mês primeiro, depois por consultor (apenas para Concluídas)
-                    buscas_concluidas = abas[i]
-                    if buscas_concluidas:
-                        buscas_por_mes = organizar_buscas_por_mes(
-                            buscas_concluidas)
-
-                        for mes_ano, buscas_do_mes in buscas_por_mes.items():
-                            with st.expander(f"📅 {mes_ano} ({len(buscas_do_mes)} buscas)"):
-                                # Agrupar por consultor dentro do mês
-                                buscas_por_consultor = defaultdict(list)
-                                for busca in buscas_do_mes:
-                                    nome = busca.get(
-                                        'nome_consultor', 'Sem Consultor')
-                                    buscas_por_consultor[nome].append(busca)
-
-                                # Ordenar consultores alfabeticamente
-                                for consultor in sorted(buscas_por_consultor.keys()):
-                                    buscas_do_consultor = buscas_por_consultor[consultor]
-                                    with st.expander(f"👤 {consultor} ({len(buscas_do_consultor)})"):
-                                        for busca in buscas_do_consultor:
-                                            busca_manager.renderizar_busca(
-                                                busca, is_admin, todas_buscas=todas_buscas_fila)
-                    else:
-                        st.info("Nenhuma busca concluída ainda.")
-                else:
-                    # Para outros status, manter organização normal
-                    buscas_status = abas[i]
-                    if buscas_status:
-                        for busca in buscas_status:
-                            busca_manager.renderizar_busca(
-                                busca, is_admin, todas_buscas=todas_buscas_fila)
-                    else:
-                        st.info(f"Nenhuma busca {labels[i].lower()} ainda.")
-
+        # Organizar por mês primeiro (e por consultor, para admin)
+        buscas_por_mes = organizar_buscas_por_mes(buscas_concluidas)
+        for mes_ano, buscas_do_mes in buscas_por_mes.items():
+            with st.expander(f"📅 {mes_ano} ({len(buscas_do_mes)} buscas)"):
+                if not agrupar_consultor:
+                    for busca in buscas_do_mes:
+                        busca_manager.renderizar_busca(busca, is_admin)
+                    continue
+                # Agrupar por consultor dentro do mês
+                buscas_por_consultor = defaultdict(list)
+                for busca in buscas_do_mes:
+                    nome = busca.get('nome_consultor', 'Sem Consultor')
+                    buscas_por_consultor[nome].append(busca)
+
+                # Ordenar consultores alfabeticamente
+                for consultor in sorted(buscas_por_consultor.keys()):
+                    buscas_do_consultor = buscas_por_consultor[consultor]
+                    with st.expander(f"👤 {consultor} ({len(buscas_do_consultor)})"):
+                        for busca in buscas_do_consultor:
+                            busca_manager.renderizar_busca(busca, is_admin)
+
+    # Abas em ordem FIXA; só a aba aberta consulta o Supabase
+    if is_admin:
+        labels = ["Pendentes", "Recebidas", "Em Execução", "Concluídas"]
+        status_abas = status_fila + [busca_manager.STATUS_CONCLUIDA]
     else:
-        enviadas = buscas_por_status[busca_manager.STATUS_PENDENTE] + \
-            buscas_por_status[busca_manager.STATUS_RECEBIDA] + \
-            buscas_por_status[busca_manager.STATUS_EM_EXECUCAO]
-        concluidas = buscas_por_status[busca_manager.STATUS_CONCLUIDA]
-        abas = []
-        labels = []
-        if enviadas:
-            labels.append("Enviadas")
-            abas.append(enviadas)
-        if concluidas:
-            labels.append("Concluídas")
-            abas.append(concluidas)
-
-        if not abas:
-            st.info("Nenhuma busca realizada ainda.")
-            return
-
-        # Usar tabs sem key (st.tabs não aceita key)
-        tabs = st.tabs(labels)
-
-        # Detectar qual aba está ativa e manter estado
-        for i, tab in enumerate(tabs):
-            with tab:
-                # Manter estado da aba ativa
-                if 'aba_atual' not in st.session_state:
-                    st.session_state.aba_atual = i
-
-                if labels[i] == "Concluídas":
-                    # Organizar por mês apenas para Concluídas (usuários não-admin)
-                    buscas_concluidas = abas[i]
-                    if buscas_concluidas:
-                        buscas_por_mes = organizar_buscas_por_mes(
-                            buscas_concluidas)
-
-                        for mes_ano, buscas_do_mes in buscas_por_mes.items():
-                            with st.expander(f"📅 {mes_ano} ({len(buscas_do_mes)} buscas)"):
-                                for busca in buscas_do_mes:
-                                    busca_manager.renderizar_busca(
-                                        busca, is_admin, todas_buscas=todas_buscas_fila)
-                    else:
-                        st.info("Nenhuma busca concluída ainda.")
-                else:
-                    # Para outros status, manter organização normal
-                    for busca in abas[i]:
+        labels = ["Enviadas", "Concluídas"]
+    tabs = st.tabs(labels, key="abas_minhas_buscas" if is_admin else "abas_minhas_buscas_consultor",
+                   on_change="rerun")
+
+    for i, tab in enumerate(tabs):
+        with tab:
+            if not tab.open:
+                continue
+
+            if labels[i] == "Concluídas":
+                renderizar_concluidas(carregar([busca_manager.STATUS_CONCLUIDA]), is_admin)
+            elif is_admin:
+                # Uma consulta traz a fila inteira; a aba mostra só o seu status
+                todas_buscas_fila = carregar(status_fila)
+                buscas_status = [
+                    b for b in todas_buscas_fila if b.get('status_busca') == status_abas[i]]
+                proximo = status_abas[i + 1]
+                render_alteracao_status_em_lote(
+                    buscas_status,
+                    lambda b: f"{b.get('marca', '')} - {b.get('nome_consultor', '')}",
+                    [(proximo, busca_manager.get_status_display(proximo))],
+                    busca_manager.atualizar_status_buscas,
+                    f"buscas_{status_abas[i]}")
+                if buscas_status:
+                    for busca in buscas_status:
                         busca_manager.renderizar_busca(
                             busca, is_admin, todas_buscas=todas_buscas_fila)
+                else:
+                    st.info(f"Nenhuma busca {labels[i].lower()} ainda.")
+            else:
+                enviadas = carregar(status_fila)
+                if not enviadas:
+                    st.info("Nenhuma busca enviada no momento.")
+                    continue
+                # Fila global, apenas para calcular a posição de cada busca
+                todas_buscas_fila = carregar(status_fila, todas=True)
+                for busca in enviadas:
+                    busca_manager.renderizar_busca(
+                        busca, is_admin, todas_buscas=todas_buscas_fila)
@@ -5,6 +5,7 @@ import json
 import unicodedata
 import re
 from collections import defaultdict
+from ui_components import render_alteracao_status_em_lote, render_atualizacao_automatica
 
 
 class ObjecaoManager:
@@ -38,6 +39,24 @@ class ObjecaoManager:
             st.error("Erro ao atualizar status da objeção!")
             return False
 
+    def atualizar_status_objecoes(self, objecao_ids: list, novo_status: str) -> int:
+        """
+        Move várias objeções para novo_status em uma única requisição.
+        Retorna quantas objeções foram alteradas.
+        """
+        if "jwt_token" not in st.session_state or not st.session_state.jwt_token:
+            st.error("Você precisa estar logado para acessar esta funcionalidade.")
+            st.stop()
+        alteradas = self.supabase_agent.update_objecoes_status(
+            objecao_ids, novo_status, st.session_state.jwt_token)
+        if alteradas:
+            status_text = self.supabase_agent.get_objecao_status_display(
+                novo_status)
+            st.success(f"{alteradas} objeção(ões) atualizada(s) para: {status_text}")
+        else:
+            st.error("Erro ao atualizar status das objeções!")
+        return alteradas
+
     def get_status_atual(self, objecao: dict) -> str:
         """
         Determina o status atual baseado em status_objecao persistente no banco.
@@ -662,6 +681,9 @@ def minhas_objecoes(email_agent):
         st.error("Você precisa estar logado para acessar esta funcionalidade.")
         st.stop()
 
+    # Novas objeções e mudanças de status aparecem sem recarregar a página
+    render_atualizacao_automatica(("objecao",), "minhas_objecoes")
+
     # Verificar se é admin usando o permission_manager
     from permission_manager import CargoPermissionManager
     from app import get_user_id
@@ -682,7 +704,7 @@ def minhas_objecoes(email_agent):
     if is_admin:
         # Admin vê todas as objeções
         objecoes = st.session_state.supabase_agent.get_all_objecoes(
-            st.session_state.jwt_token)
+            st.session_state.jwt_token, resumo=True)
     else:
         # Verificar se é usuário jurídico ou consultor
         # Buscar dados específicos para determinar o tipo de usuário
@@ -766,6 +788,14 @@ def minhas_objecoes(email_agent):
     for i, status in enumerate(status_list):
         with tabs[i]:
             objecoes_list = objecoes_por_status.get(status, [])
+            if is_admin and status != objecao_manager.STATUS_CONCLUIDO:
+                proximo = status_list[i + 1]
+                render_alteracao_status_em_lote(
+                    objecoes_list,
+                    lambda o: f"{o.get('marca', '')} - {o.get('name_consultor', '') or o.get('nomecliente', '')}",
+                    [(proximo, objecao_manager.supabase_agent.get_objecao_status_display(proximo))],
+                    objecao_manager.atualizar_status_objecoes,
+                    f"objecoes_{status}")
             if not objecoes_list:
                 st.info(f"Nenhuma objeção {status}.")
                 continue
@@ -820,7 +850,13 @@ def renderizar_objecao(objecao, objecao_manager, is_admin):
     if consultor and consultor != 'N/A':
         titulo_card += f" | {consultor}"
 
-    with st.expander(titulo_card):
+    with st.expander(titulo_card, key=f"card_objecao_{objecao['id']}", on_change="rerun") as card:
+        if not card.open:
+            return
+        # Linha completa (documentos, petições) só é baixada com o card aberto
+        objecao = objecao_manager.supabase_agent.carregar_registro_completo(
+            "objecao", objecao)
+
         # Informações básicas organizadas (uma abaixo da outra)
         st.write(f"**Marca:** {objecao.get('marca', 'N/A')}")
         st.write(f"**Cliente:** {objecao.get('nomecliente', 'N/A')}")
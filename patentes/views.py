@@ -1,10 +1,11 @@
 import streamlit as st
-from supabase_agent import SupabaseAgent
+from supabase_agent import obter_supabase_agent, SupabaseAgentAsync, executar_em_paralelo
 from datetime import datetime
 import json
 import unicodedata
 import re
 from collections import defaultdict
+from ui_components import render_alteracao_status_em_lote, render_atualizacao_automatica
 
 
 class PatenteManager:
@@ -96,6 +97,37 @@ class PatenteManager:
             st.error("Erro ao atualizar status da patente!")
             return False
 
+    def atualizar_status_patentes(self, patente_ids: list, novo_status: str) -> int:
+        """
+        Move várias patentes para novo_status em uma única requisição
+        (apenas engenheiros administradores). Retorna quantas foram alteradas.
+        """
+        if "jwt_token" not in st.session_state or not st.session_state.jwt_token:
+            st.error("Você precisa estar logado para acessar esta funcionalidade.")
+            st.stop()
+
+        user_id = st.session_state.user['id'] if isinstance(
+            st.session_state.user, dict) else st.session_state.user.id
+        if not self.verificar_permissao_status_patente(user_id):
+            st.error(
+                "Você não tem permissão para alterar o status de patentes em lote. Apenas engenheiros administradores podem fazer esta alteração.")
+            return 0
+
+        alteradas = self.supabase_agent.update_patentes_status(
+            patente_ids, novo_status, st.session_state.jwt_token)
+        if alteradas:
+            status_text = self.supabase_agent.get_patente_status_display(
+                novo_status)
+            st.success(f"{alteradas} patente(s) atualizada(s) para: {status_text}")
+
+            # Mesmo aviso por e-mail da alteração individual
+            if novo_status == self.STATUS_AGUARDANDO_INFORMACOES:
+                for patente_id in patente_ids:
+                    self._enviar_email_aguardando_informacoes(patente_id)
+        else:
+            st.error("Erro ao atualizar status das patentes!")
+        return alteradas
+
     def get_status_atual(self, patente: dict) -> str:
         """
         Determina o status atual baseado em status_patente persistente no banco.
@@ -268,38 +300,9 @@ class PatenteManager:
             engenheiro_nome = engenheiro.get(
                 'name', 'Engenheiro') if engenheiro else 'Engenheiro'
 
-            # Buscar dados da patente usando as funções existentes
-            # Primeiro, buscar todas as patentes do funcionário
-            patentes_funcionario = self.supabase_agent.get_depositos_patente_para_funcionario(
-                user_id, st.session_state.jwt_token)
-
-            # Procurar a patente específica pelo ID
-            patente = None
-            if patentes_funcionario:
-                for p in patentes_funcionario:
-                    if p.get('id') == patente_id:
-                        patente = p
-                        break
-
-            # Se não encontrou, buscar nas patentes de consultor
-            if not patente:
-                patentes_consultor = self.supabase_agent.get_depositos_patente_para_consultor(
-                    user_id, st.session_state.jwt_token)
-                if patentes_consultor:
-                    for p in patentes_consultor:
-                        if p.get('id') == patente_id:
-                            patente = p
-                            break
-
-            # Se ainda não encontrou, buscar em todas as patentes (para admin)
-            if not patente:
-                todas_patentes = self.supabase_agent.get_all_depositos_patente(
-                    st.session_state.jwt_token)
-                if todas_patentes:
-                    for p in todas_patentes:
-                        if p.get('id') == patente_id:
-                            patente = p
-                            break
+            # Buscar a linha completa da patente pelo ID
+            patente = self.supabase_agent.get_deposito_patente_by_id(
+                patente_id, st.session_state.jwt_token)
 
             if not patente:
                 st.warning(
@@ -384,9 +387,42 @@ def solicitar_busca():
     st.info("Funcionalidade de solicitação de busca de patente em breve!")
 
 
+def _carregar_patentes(supabase_agent, user_id):
+    """
+    Papéis do usuário e as patentes que ele vê: (funcionario, is_admin, patentes).
+    Os papéis vêm juntos; depois só são lidas as listas que a página exibe
+    (todas, para admin; senão as do funcionário e/ou do consultor, juntas).
+    """
+    agente_async = SupabaseAgentAsync(supabase_agent)
+    jwt_token = st.session_state.jwt_token
+    funcionario, perfil = executar_em_paralelo(
+        agente_async.get_funcionario_by_id(user_id),
+        agente_async.get_profile(user_id))
+
+    # Verificar se é admin (APENAS funcionário com is_admin = True)
+    is_admin = bool(funcionario and funcionario.get('is_admin', False))
+
+    # Se for administrador (funcionário com is_admin=true), mostra todas as patentes
+    if is_admin:
+        return funcionario, is_admin, supabase_agent.get_all_depositos_patente(jwt_token, resumo=True) or []
+
+    listas = []
+    # Se for funcionário, busca patentes cadastradas por ele
+    if funcionario:
+        listas.append(agente_async.get_depositos_patente_para_funcionario(user_id, jwt_token))
+    # Se for consultor (perfil existe), busca patentes associadas a ele
+    if perfil:
+        listas.append(agente_async.get_depositos_patente_para_consultor(user_id, jwt_token))
+
+    patentes = []
+    for lista in executar_em_paralelo(*listas) if listas else []:
+        patentes.extend(lista or [])
+    return funcionario, is_admin, patentes
+
+
 def minhas_buscas():
     st.header("Minhas Buscas de Patente")
-    supabase_agent = SupabaseAgent()
+    supabase_agent = obter_supabase_agent()
 
     if "user" not in st.session_state:
         st.error("Usuário não autenticado.")
@@ -395,41 +431,10 @@ def minhas_buscas():
     user_id = st.session_state.user['id'] if isinstance(
         st.session_state.user, dict) else st.session_state.user.id
 
-    # Verificar se é funcionário e se tem permissões de admin
-    funcionario = supabase_agent.get_funcionario_by_id(user_id)
-
-    # Verificar se é admin (APENAS funcionário com is_admin = True)
-    is_admin = False
-    if funcionario and funcionario.get('is_admin', False):
-        is_admin = True
-
-    perfil = supabase_agent.get_profile(user_id)
+    # Novas buscas de patente e mudanças de status aparecem sem recarregar a página
+    render_atualizacao_automatica(("deposito_patente",), "minhas_buscas_patente")
 
-    # Verificar se tem permissão para ver todas as patentes (apenas funcionários admin)
-    pode_ver_todas_patentes = is_admin
-
-    patentes = []
-
-    # Se for funcionário, busca patentes cadastradas por ele
-    if funcionario:
-        patentes_funcionario = supabase_agent.get_depositos_patente_para_funcionario(
-            user_id, st.session_state.jwt_token)
-        if patentes_funcionario:
-            patentes.extend(patentes_funcionario)
-
-    # Se for consultor (perfil existe), busca patentes associadas a ele
-    if perfil:
-        patentes_consultor = supabase_agent.get_depositos_patente_para_consultor(
-            user_id, st.session_state.jwt_token)
-        if patentes_consultor:
-            patentes.extend(patentes_consultor)
-
-    # Se for administrador (funcionário com is_admin=true), mostra todas as patentes
-    if pode_ver_todas_patentes:
-        todas_patentes = supabase_agent.get_all_depositos_patente(
-            st.session_state.jwt_token)
-        if todas_patentes:
-            patentes = todas_patentes
+    funcionario, is_admin, patentes = _carregar_patentes(supabase_agent, user_id)
 
     # Filtrar apenas patentes com serviço "Busca de Patente"
     patentes_busca = []
@@ -453,7 +458,7 @@ def solicitar_patente():
 
 def minhas_patentes(email_agent):
     st.header("Minhas Patentes")
-    supabase_agent = SupabaseAgent()
+    supabase_agent = obter_supabase_agent()
     patente_manager = PatenteManager(supabase_agent, email_agent)
 
     if "user" not in st.session_state:
@@ -463,44 +468,14 @@ def minhas_patentes(email_agent):
     user_id = st.session_state.user['id'] if isinstance(
         st.session_state.user, dict) else st.session_state.user.id
 
-    # Verificar se é funcionário e se tem permissões de admin
-    funcionario = supabase_agent.get_funcionario_by_id(user_id)
-
-    # Verificar se é admin (APENAS funcionário com is_admin = True)
-    is_admin = False
-    if funcionario and funcionario.get('is_admin', False):
-        is_admin = True
+    # Novas patentes e mudanças de status aparecem sem recarregar a página
+    render_atualizacao_automatica(("deposito_patente",), "minhas_patentes")
 
-    perfil = supabase_agent.get_profile(user_id)
-    juridico = supabase_agent.get_juridico_by_id(user_id)
+    funcionario, is_admin, patentes = _carregar_patentes(supabase_agent, user_id)
 
     # Verificar se tem permissão para ver todas as patentes (apenas funcionários admin)
     pode_ver_todas_patentes = is_admin
 
-    patentes = []
-
-    # Se for funcionário, busca patentes cadastradas por ele
-    if funcionario:
-        patentes_funcionario = supabase_agent.get_depositos_patente_para_funcionario(
-            user_id, st.session_state.jwt_token)
-        if patentes_funcionario:
-            patentes.extend(patentes_funcionario)
-
-    # Se for consultor (perfil existe), busca patentes associadas a ele
-    perfil = supabase_agent.get_profile(user_id)
-    if perfil:
-        patentes_consultor = supabase_agent.get_depositos_patente_para_consultor(
-            user_id, st.session_state.jwt_token)
-        if patentes_consultor:
-            patentes.extend(patentes_consultor)
-
-    # Se for administrador (funcionário com is_admin=true), mostra todas as patentes
-    if pode_ver_todas_patentes:
-        todas_patentes = supabase_agent.get_all_depositos_patente(
-            st.session_state.jwt_token)
-        if todas_patentes:
-            patentes = todas_patentes
-
     if pode_ver_todas_patentes:
         # Adicionar filtro por consultor para administradores
         st.subheader("Filtros")
@@ -558,11 +533,29 @@ def minhas_patentes(email_agent):
         labels.append(label_with_count)
         abas.append(patentes_status)
 
+    # Transições que o engenheiro administrador pode aplicar em lote, por aba
+    is_engenheiro_admin = (funcionario and
+                           funcionario.get('cargo_func', '') == 'engenheiro' and
+                           funcionario.get('is_admin', False))
+    destinos_em_lote = {
+        patente_manager.STATUS_PENDENTE: [patente_manager.STATUS_AGUARDANDO_INFORMACOES,
+                                          patente_manager.STATUS_RELATORIO_SENDO_ELABORADO],
+        patente_manager.STATUS_AGUARDANDO_INFORMACOES: [patente_manager.STATUS_RELATORIO_SENDO_ELABORADO],
+    }
+
     # Criar abas para todos os status
     tabs = st.tabs(labels)
     for i, tab in enumerate(tabs):
         with tab:
             patentes_na_aba = abas[i]
+            if is_engenheiro_admin and status_keys[i][0] in destinos_em_lote:
+                render_alteracao_status_em_lote(
+                    patentes_na_aba,
+                    lambda p: f"{p.get('titulo', '')} - {p.get('name_consultor', '')}",
+                    [(destino, supabase_agent.get_patente_status_display(destino))
+                     for destino in destinos_em_lote[status_keys[i][0]]],
+                    patente_manager.atualizar_status_patentes,
+                    f"patentes_{status_keys[i][0]}")
             if patentes_na_aba:
                 # Verificar se é a aba "Concluído"
                 if status_keys[i][0] == patente_manager.STATUS_CONCLUIDO:
@@ -617,8 +610,6 @@ def renderizar_patente(patente, patente_manager, is_admin, funcionario=None):
             if patente.get('consultor') == user_id:
                 is_consultor = True
                 # Buscar nome do consultor
-                from supabase_agent import SupabaseAgent
-                supabase_agent = SupabaseAgent()
                 consultor_info = supabase_agent.get_consultor_by_id(user_id)
                 if consultor_info:
                     consultor_nome = consultor_info.get('name', '')
@@ -649,7 +640,13 @@ def renderizar_patente(patente, patente_manager, is_admin, funcionario=None):
         expander_label += f" - {consultor}"
     expander_label += f" - {status_text}"
 
-    with st.expander(expander_label):
+    with st.expander(expander_label, key=f"card_patente_{patente['id']}", on_change="rerun") as card:
+        if not card.open:
+            return
+        # Linha completa (relatório, arquivos) só é baixada com o card aberto
+        patente = supabase_agent.carregar_registro_completo(
+            "deposito_patente", patente)
+
         # Exibir dados da patente organizados verticalmente
         st.markdown(f"**Título:** {patente.get('titulo', '')}")
         st.markdown(f"**Cliente:** {patente.get('cliente', '')}")
@@ -997,7 +994,13 @@ def renderizar_busca_patente(patente, supabase_agent, is_admin, funcionario=None
     if consultor:
         expander_label += f" - {consultor}"
 
-    with st.expander(expander_label):
+    with st.expander(expander_label, key=f"card_busca_patente_{patente['id']}", on_change="rerun") as card:
+        if not card.open:
+            return
+        # Linha completa (relatório, arquivos) só é baixada com o card aberto
+        patente = supabase_agent.carregar_registro_completo(
+            "deposito_patente", patente)
+
         # Exibir dados da patente organizados verticalmente
         st.markdown(f"**Título:** {patente.get('titulo', '')}")
         st.markdown(f"**Cliente:** {patente.get('cliente', '')}")
@@ -1086,10 +1089,9 @@ def renderizar_busca_patente(patente, supabase_agent, is_admin, funcionario=None
 def _enviar_documentos_consultor_patente(patente, uploaded_files, consultor_nome, patente_manager):
     """Envia documentos complementares do consultor para patente"""
     try:
-        from supabase_agent import SupabaseAgent
         import datetime
 
-        supabase_agent = SupabaseAgent()
+        supabase_agent = patente_manager.supabase_agent
 
         pdf_urls = []
 
@@ -1207,9 +1209,7 @@ def _enviar_documentos_consultor_patente(patente, uploaded_files, consultor_nome
 def _enviar_documentos_funcionario_patente(patente, uploaded_files, patente_manager):
     """Envia documentos do funcionário para patente"""
     try:
-        from supabase_agent import SupabaseAgent
-
-        supabase_agent = SupabaseAgent()
+        supabase_agent = patente_manager.supabase_agent
 
         pdf_urls = []
 
@@ -1414,7 +1414,7 @@ def deposito_patente(email_agent):
     from config import carregar_configuracoes
     config = carregar_configuracoes()
     destinatario_enge = config.get("destinatario_enge", "")
-    supabase_agent = SupabaseAgent()
+    supabase_agent = obter_supabase_agent()
 
     # Verifica se há usuário na sessão e JWT token
     if "user" not in st.session_state or "jwt_token" not in st.session_state:
@@ -0,0 +1,32 @@
+-- Filtro de texto de "Minhas Buscas" no servidor.
+-- busca_texto guarda marca e consultor sem acentos e em minúsculas; o app
+-- normaliza o termo do mesmo jeito e filtra com busca_texto=ilike.*termo*.
+
+create extension if not exists unaccent with schema extensions;
+create extension if not exists pg_trgm with schema extensions;
+
+-- unaccent não é IMMUTABLE; o dicionário fixo permite usá-la em coluna gerada
+create or replace function public.sem_acento(texto text)
+returns text
+language sql
+immutable
+parallel safe
+strict
+as $$
+    select lower(extensions.unaccent('extensions.unaccent'::regdictionary, texto))
+$$;
+
+-- Separador de linha: o campo de pesquisa não aceita quebra de linha, então
+-- um termo nunca casa atravessando marca e consultor
+alter table public.buscas
+    add column if not exists busca_texto text
+    generated always as (
+        public.sem_acento(coalesce(marca, '') || E'\n' || coalesce(nome_consultor, ''))
+    ) stored;
+
+create index if not exists buscas_busca_texto_trgm
+    on public.buscas using gin (busca_texto extensions.gin_trgm_ops);
+
+-- Abas por status, mais recentes primeiro (mesma ordem da paginação por chave)
+create index if not exists buscas_status_created_at
+    on public.buscas (status_busca, created_at desc, id desc);
@@ -0,0 +1,93 @@
+-- Anexa arquivos às colunas de PDFs (listas jsonb) em uma única operação.
+-- Substitui o GET + merge no app + PATCH + GET de verificação: o append
+-- acontece dentro do UPDATE, então dois uploads simultâneos não se
+-- sobrescrevem. Chamado pelo app em POST /rest/v1/rpc/anexar_arquivos.
+--
+-- security invoker: as políticas RLS do usuário continuam valendo; se ele
+-- não puder alterar o registro, a função retorna null.
+
+-- Valor atual da coluna como lista: valores antigos podem ser null, a lista
+-- gravada como texto JSON ('["url"]') ou uma URL solta
+create or replace function public.lista_de_arquivos(valor jsonb)
+returns jsonb
+language plpgsql
+immutable
+as $$
+declare
+    convertido jsonb;
+begin
+    if valor is null or jsonb_typeof(valor) = 'null' then
+        return '[]'::jsonb;
+    elsif jsonb_typeof(valor) = 'array' then
+        return valor;
+    elsif jsonb_typeof(valor) = 'string' then
+        if btrim(valor #>> '{}') = '' then
+            return '[]'::jsonb;
+        end if;
+        begin
+            convertido := (valor #>> '{}')::jsonb;
+            if jsonb_typeof(convertido) = 'array' then
+                return convertido;
+            end if;
+        exception when invalid_text_representation then
+            -- Não é JSON: uma URL solta
+            null;
+        end;
+    end if;
+    return jsonb_build_array(valor);
+end;
+$$;
+
+-- registro_id chega como texto e é convertido para o tipo da coluna id da tabela
+create or replace function public.anexar_arquivos(
+    tabela text,
+    registro_id text,
+    coluna text,
+    arquivos jsonb
+)
+returns jsonb
+language plpgsql
+security invoker
+set search_path = public
+as $$
+declare
+    tipo_id text;
+    resultado jsonb;
+begin
+    -- Só as colunas de arquivos podem ser alteradas por aqui
+    if (tabela, coluna) not in (
+        ('deposito_patente', 'pdf_patente'),
+        ('deposito_patente', 'aguardando_info'),
+        ('deposito_patente', 'para_aprovacao'),
+        ('deposito_patente', 'pdf_pendente')
+    ) then
+        raise exception 'Coluna % da tabela % não aceita anexos', coluna, tabela
+            using errcode = '22023';
+    end if;
+
+    if jsonb_typeof(arquivos) <> 'array' then
+        raise exception 'arquivos deve ser uma lista' using errcode = '22023';
+    end if;
+
+    select format_type(atttypid, atttypmod)
+      into tipo_id
+      from pg_attribute
+     where attrelid = format('public.%I', tabela)::regclass
+       and attname = 'id';
+
+    execute format(
+        'update public.%1$I
+            set %2$I = public.lista_de_arquivos(%2$I) || $1
+          where id = $2::%3$s
+      returning %2$I',
+        tabela, coluna, tipo_id
+    )
+    into resultado
+    using arquivos, registro_id;
+
+    return resultado;
+end;
+$$;
+
+grant execute on function public.lista_de_arquivos(jsonb) to authenticated;
+grant execute on function public.anexar_arquivos(text, text, text, jsonb) to authenticated;
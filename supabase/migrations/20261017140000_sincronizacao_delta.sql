@@ -0,0 +1,120 @@
+-- Sincronização incremental (delta) das listagens.
+-- O app guarda uma cópia local de buscas, objecao e deposito_patente e, a cada
+-- atualização, lê só as linhas com updated_at posterior à última sincronização
+-- (marca d'água) e as exclusões registradas em registros_excluidos (tombstones).
+
+-- Momento da última alteração de cada linha, mantido pelo banco
+create or replace function public.tocar_updated_at()
+returns trigger
+language plpgsql
+as $$
+begin
+    new.updated_at := clock_timestamp();
+    return new;
+end;
+$$;
+
+-- Exclusões ficam registradas para que as cópias locais também removam a linha.
+-- security definer: o usuário que exclui não precisa de permissão na tabela de exclusões.
+-- registro_id é o id da linha como texto (vale para qualquer tipo de chave) e donos
+-- guarda as colunas de dono da linha (DONOS_LISTAS no app), para a política de leitura
+create table if not exists public.registros_excluidos (
+    id bigserial primary key,
+    tabela text not null,
+    registro_id text not null,
+    donos text[] not null default '{}',
+    excluido_em timestamptz not null default clock_timestamp()
+);
+
+create index if not exists registros_excluidos_tabela_excluido_em
+    on public.registros_excluidos (tabela, excluido_em);
+
+alter table public.registros_excluidos enable row level security;
+
+-- Quem vê todas as linhas da tabela: admin no cadastro correspondente
+-- (CADASTROS_ADMIN no app). security definer: não depende do RLS dos cadastros
+create or replace function public.ve_todas_as_linhas(tabela text)
+returns boolean
+language sql
+stable
+security definer
+set search_path = public
+as $$
+    select case tabela
+        when 'buscas' then exists (
+            select 1 from public.perfil where id = auth.uid() and is_admin)
+        when 'objecao' then exists (
+            select 1 from public.juridico_marca where id = auth.uid() and is_admin)
+        when 'deposito_patente' then exists (
+            select 1 from public.funcionario where id = auth.uid() and is_admin)
+        else false
+    end;
+$$;
+
+-- Só ids, e só das linhas que o usuário via: as próprias ou, para admins, todas
+drop policy if exists "Leitura das exclusões" on public.registros_excluidos;
+create policy "Leitura das exclusões"
+    on public.registros_excluidos for select
+    to authenticated
+    using (auth.uid()::text = any (donos) or public.ve_todas_as_linhas(tabela));
+
+-- Argumentos do gatilho: as colunas de dono da tabela
+create or replace function public.registrar_exclusao()
+returns trigger
+language plpgsql
+security definer
+set search_path = public
+as $$
+begin
+    insert into public.registros_excluidos (tabela, registro_id, donos)
+    values (
+        tg_table_name,
+        old.id::text,
+        array(
+            select to_jsonb(old) ->> coluna
+              from unnest(tg_argv) as coluna
+             where to_jsonb(old) ->> coluna is not null
+        )
+    );
+    return old;
+end;
+$$;
+
+do $$
+declare
+    tabela text;
+    donos text;
+begin
+    foreach tabela in array array['buscas', 'objecao', 'deposito_patente'] loop
+        -- Colunas de dono, passadas como argumentos do gatilho de exclusão
+        donos := case tabela
+            when 'buscas' then '''consultor_id'''
+            when 'objecao' then '''consultor_objecao'', ''juridico_id'''
+            when 'deposito_patente' then '''consultor'', ''funcionario_id'''
+        end;
+
+        execute format(
+            'alter table public.%I add column if not exists updated_at timestamptz not null default clock_timestamp()',
+            tabela);
+        execute format(
+            'create index if not exists %I on public.%I (updated_at, id)',
+            tabela || '_updated_at_id', tabela);
+
+        execute format('drop trigger if exists tocar_updated_at on public.%I', tabela);
+        execute format(
+            'create trigger tocar_updated_at before update on public.%I
+                for each row execute function public.tocar_updated_at()',
+            tabela);
+
+        execute format('drop trigger if exists registrar_exclusao on public.%I', tabela);
+        execute format(
+            'create trigger registrar_exclusao after delete on public.%I
+                for each row execute function public.registrar_exclusao(%s)',
+            tabela, donos);
+    end loop;
+end;
+$$;
+
+-- Exclusões mais antigas que o intervalo de ressincronização completa do app
+-- (SUPABASE_DELTA_RESSINCRONIZAR) já não são lidas e podem ser apagadas, ex.:
+--   delete from public.registros_excluidos where excluido_em < now() - interval '1 day';
@@ -0,0 +1,18 @@
+-- Feed de alterações das listagens (SUPABASE_FEED=realtime, ver feed_alteracoes.py).
+-- Publica buscas, objecao e deposito_patente no Supabase Realtime; o app ouve
+-- INSERT, UPDATE e DELETE e atualiza as listas em memória sem reler a tabela.
+
+do $$
+declare
+    tabela text;
+begin
+    foreach tabela in array array['buscas', 'objecao', 'deposito_patente'] loop
+        if not exists (
+            select 1 from pg_publication_tables
+             where pubname = 'supabase_realtime' and schemaname = 'public' and tablename = tabela
+        ) then
+            execute format('alter publication supabase_realtime add table public.%I', tabela);
+        end if;
+    end loop;
+end;
+$$;
@@ -1,16 +1,622 @@
 import os
+import asyncio
+from concurrent.futures import Future, ThreadPoolExecutor
 from supabase import create_client, Client
 from dotenv import load_dotenv
-from typing import Optional, List, Dict, Any
+from typing import Callable, Optional, List, Dict, Any, Tuple
 import streamlit as st
 import logging
 import requests
 import re
+import socket
+import threading
+import time
+import hashlib
 import unicodedata
+from datetime import datetime, timedelta
+from requests.adapters import HTTPAdapter
+from urllib3.connection import HTTPConnection
+from streamlit.runtime.scriptrunner import add_script_run_ctx, get_script_run_ctx
+from streamlit.runtime.scriptrunner_utils.script_run_context import SCRIPT_RUN_CONTEXT_ATTR_NAME
+from instrumentacao import instrumentar_httpx, registrar_chamada
 
 # Carrega variáveis do .env (caso não tenha sido carregado no app principal)
 load_dotenv()
 
+# Conexões HTTP mantidas abertas com o Supabase (REST e Storage)
+SUPABASE_POOL_SIZE = int(os.getenv("SUPABASE_POOL_SIZE", 20))
+# Segundos ociosos até o envio de keep-alive TCP (0 desativa)
+SUPABASE_KEEPALIVE = int(os.getenv("SUPABASE_KEEPALIVE", 60))
+# Linhas por requisição nas listagens paginadas (iter_*)
+SUPABASE_PAGE_SIZE = int(os.getenv("SUPABASE_PAGE_SIZE", 500))
+# Segundos que nomes, e-mails e cadastros de usuários ficam no cache do diretório
+SUPABASE_DIRETORIO_TTL = int(os.getenv("SUPABASE_DIRETORIO_TTL", 60))
+# Segundos que as listagens ficam no cache de leitura (escritas do app invalidam antes)
+SUPABASE_CACHE_TTL = int(os.getenv("SUPABASE_CACHE_TTL", 120))
+# Segundos relidos antes da marca d'água em cada sincronização delta das listagens
+SUPABASE_DELTA_MARGEM = int(os.getenv("SUPABASE_DELTA_MARGEM", 30))
+# Segundos até a cópia local de uma listagem ser baixada de novo por inteiro
+SUPABASE_DELTA_RESSINCRONIZAR = int(os.getenv("SUPABASE_DELTA_RESSINCRONIZAR", 900))
+
+# Colunas que os cards das listas exibem fechados (modo resumo). A linha
+# completa é carregada com carregar_registro_completo quando o card é aberto.
+COLUNAS_RESUMO = {
+    "buscas": "id,created_at,marca,data,tipo_busca,nome_consultor,consultor_id,status_busca",
+    "objecao": "id,created_at,marca,nomecliente,servico,name_consultor,consultor_objecao,juridico_id,status_objecao",
+    "deposito_patente": "id,created_at,titulo,cliente,processo,servico,name_consultor,consultor,funcionario_id,status_patente",
+}
+
+# Colunas pelas quais as listagens por usuário filtram cada tabela; usadas
+# para invalidar no cache apenas as listas que podem conter a linha alterada
+DONOS_LISTAS = {
+    "buscas": ("consultor_id",),
+    "objecao": ("consultor_objecao", "juridico_id"),
+    "deposito_patente": ("consultor", "funcionario_id"),
+}
+
+_sessao_http = None
+_sessao_lock = threading.Lock()
+
+
+class _AdaptadorKeepAlive(HTTPAdapter):
+    """HTTPAdapter que liga o keep-alive TCP nos sockets do pool"""
+
+    def init_poolmanager(self, *args, **kwargs):
+        if SUPABASE_KEEPALIVE > 0:
+            opcoes = [(socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1)]
+            for nome, valor in (("TCP_KEEPIDLE", SUPABASE_KEEPALIVE),
+                                ("TCP_KEEPINTVL", max(SUPABASE_KEEPALIVE // 4, 1))):
+                if hasattr(socket, nome):
+                    opcoes.append((socket.IPPROTO_TCP, getattr(socket, nome), valor))
+            kwargs["socket_options"] = HTTPConnection.default_socket_options + opcoes
+        super().init_poolmanager(*args, **kwargs)
+
+
+class _SessaoInstrumentada(requests.Session):
+    """Session que registra cada chamada na instrumentação (ver instrumentacao.py)"""
+
+    def request(self, method, url, *args, **kwargs):
+        inicio = time.perf_counter()
+        try:
+            resp = super().request(method, url, *args, **kwargs)
+        except Exception:
+            registrar_chamada(method, url, None, 0, 0, time.perf_counter() - inicio)
+            raise
+        corpo = resp.request.body
+        enviados = len(corpo) if isinstance(corpo, (bytes, str)) else 0
+        registrar_chamada(method, resp.request.url, resp.status_code, enviados,
+                          len(resp.content), time.perf_counter() - inicio)
+        return resp
+
+
+def sessao_http() -> requests.Session:
+    """
+    Sessão HTTP única do processo, compartilhada por todas as chamadas ao Supabase.
+    Reaproveita conexões (sem novo handshake TCP/TLS a cada requisição) e é segura
+    para uso entre threads das sessões do Streamlit.
+    """
+    global _sessao_http
+    if _sessao_http is None:
+        with _sessao_lock:
+            if _sessao_http is None:
+                sessao = _SessaoInstrumentada()
+                adaptador = _AdaptadorKeepAlive(
+                    pool_connections=SUPABASE_POOL_SIZE, pool_maxsize=SUPABASE_POOL_SIZE)
+                sessao.mount("https://", adaptador)
+                sessao.mount("http://", adaptador)
+                _sessao_http = sessao
+    return _sessao_http
+
+
+_leituras_em_voo = {}
+_leituras_lock = threading.Lock()
+
+
+def _escopo_leitura(headers: Optional[Dict[str, str]]) -> str:
+    """Hash dos headers da requisição: o token exato define o que o RLS devolve"""
+    return hashlib.sha256(repr(sorted((headers or {}).items())).encode()).hexdigest()
+
+
+def _escopo_token(headers: Optional[Dict[str, str]]) -> str:
+    return hashlib.sha256((headers or {}).get("Authorization", "").encode()).hexdigest()
+
+
+class CacheListas:
+    """
+    Cache de leitura (read-through) das listagens, compartilhado pelo processo.
+
+    Guarda as respostas 200 das leituras marcadas com cache=(tabela, dono), pela
+    mesma chave da coalescência (URL + headers, ou seja, por usuário). dono é o
+    id pelo qual a listagem filtra (consultor, funcionário...) ou None para
+    listas de todos; assim uma escrita invalida só as listas que podem conter
+    a linha alterada, em todas as sessões.
+    """
+
+    # Entradas a partir das quais as expiradas são descartadas
+    LIMITE = 2000
+
+    def __init__(self, ttl: int = SUPABASE_CACHE_TTL):
+        self.ttl = ttl
+        self._entradas = {}
+        # Incrementada a cada invalidação: leitura iniciada antes não é guardada
+        self._geracao = {}
+        self._lock = threading.Lock()
+
+    def geracao(self, tabela: str) -> int:
+        with self._lock:
+            return self._geracao.get(tabela, 0)
+
+    def obter(self, chave) -> Optional[requests.Response]:
+        with self._lock:
+            entrada = self._entradas.get(chave)
+            if entrada and entrada["expira"] > time.monotonic():
+                return entrada["resposta"]
+        return None
+
+    def guardar(self, chave, tabela: str, dono, token: str, geracao: int, resposta: requests.Response):
+        agora = time.monotonic()
+        with self._lock:
+            if self._geracao.get(tabela, 0) != geracao:
+                return
+            if len(self._entradas) > self.LIMITE:
+                self._entradas = {k: e for k, e in self._entradas.items() if e["expira"] > agora}
+            self._entradas[chave] = {"expira": agora + self.ttl, "tabela": tabela,
+                                     "dono": None if dono is None else str(dono),
+                                     "token": token, "resposta": resposta}
+
+    def invalidar(self, tabela: str, donos=None):
+        """
+        Descarta as listagens da tabela que podem conter linhas dos donos
+        informados (as de todos sempre); donos=None descarta a tabela inteira.
+        """
+        donos = None if donos is None else {str(d) for d in donos if d}
+        with self._lock:
+            self._geracao[tabela] = self._geracao.get(tabela, 0) + 1
+            self._entradas = {
+                k: e for k, e in self._entradas.items()
+                if not (e["tabela"] == tabela and (donos is None or e["dono"] is None or e["dono"] in donos))
+            }
+
+    def invalidar_token(self, jwt_token: str):
+        """Descarta as listagens lidas com o token (logout)"""
+        token = _escopo_token({"Authorization": f"Bearer {jwt_token}"})
+        with self._lock:
+            self._entradas = {k: e for k, e in self._entradas.items() if e["token"] != token}
+
+
+_cache_listas = CacheListas()
+
+
+def cache_listas() -> CacheListas:
+    """Cache de listagens único do processo (ver CacheListas)"""
+    return _cache_listas
+
+
+def ler_compartilhado(url: str, headers: Optional[Dict[str, str]] = None, params=None,
+                      cache: tuple = None, **kwargs) -> requests.Response:
+    """
+    GET com coalescência (single-flight): leituras idênticas simultâneas no processo,
+    vindas de qualquer sessão, esperam a mesma requisição em andamento e recebem a
+    mesma resposta. A chave é a URL completa mais os headers (token JWT incluído),
+    então usuários diferentes nunca compartilham resultado.
+
+    Com cache=(tabela, dono) a resposta também fica no cache de listagens
+    (ver CacheListas) e é reaproveitada até expirar ou ser invalidada.
+    """
+    chave = (requests.Request("GET", url, params=params).prepare().url, _escopo_leitura(headers))
+    if cache:
+        resposta = _cache_listas.obter(chave)
+        if resposta is not None:
+            return resposta
+        geracao = _cache_listas.geracao(cache[0])
+
+    with _leituras_lock:
+        futuro = _leituras_em_voo.get(chave)
+        lider = futuro is None
+        if lider:
+            futuro = _leituras_em_voo[chave] = Future()
+    if not lider:
+        return futuro.result()
+
+    try:
+        resp = sessao_http().get(url, headers=headers, params=params, **kwargs)
+        # Lê o corpo antes de compartilhar; cada chamador faz o próprio resp.json()
+        resp.content
+        if cache and resp.status_code == 200:
+            _cache_listas.guardar(chave, cache[0], cache[1], _escopo_token(headers), geracao, resp)
+        futuro.set_result(resp)
+        return resp
+    except BaseException as e:
+        futuro.set_exception(e)
+        raise
+    finally:
+        with _leituras_lock:
+            _leituras_em_voo.pop(chave, None)
+
+
+def _sem_acento(texto: str) -> str:
+    """Texto sem acentos e em minúsculas, como public.sem_acento no banco"""
+    texto = unicodedata.normalize('NFD', (texto or "").lower())
+    return ''.join(c for c in texto if unicodedata.category(c) != 'Mn')
+
+
+def _ler_instante(valor: str) -> datetime:
+    """Timestamp do PostgREST (fração de 0 a 9 dígitos, Z ou +00:00) como datetime"""
+    texto = valor.strip().replace(" ", "T", 1).replace("Z", "+00:00")
+    base, fracao, fuso = re.match(r"^(.*?T\d{2}:\d{2}:\d{2})(?:\.(\d+))?(.*)$", texto).groups()
+    return datetime.fromisoformat(f"{base}.{(fracao or '')[:6].ljust(6, '0')}{fuso}")
+
+
+def ler_em_ordem(tabela: str, headers: Dict[str, str], params: Dict[str, str],
+                 coluna: str) -> Tuple[Optional[List[Dict[str, Any]]], Optional[int]]:
+    """
+    Lê as linhas da tabela em ordem crescente de (coluna, id), paginando por chave.
+    Retorna (linhas, None) ou, em caso de erro, (None, status HTTP da falha).
+    """
+    url = f"{os.getenv('SUPABASE_URL')}/rest/v1/{tabela}"
+    params = dict(params, order=f"{coluna}.asc,id.asc", limit=SUPABASE_PAGE_SIZE)
+    linhas = []
+    while True:
+        try:
+            resp = ler_compartilhado(url, headers=headers, params=params)
+        except Exception as e:
+            logging.error(f"Erro na sincronização de {tabela}: {str(e)}")
+            return None, None
+        if resp.status_code != 200:
+            logging.error(f"Erro na sincronização de {tabela}: {resp.text}")
+            return None, resp.status_code
+        pagina = resp.json()
+        linhas.extend(pagina)
+        if len(pagina) < SUPABASE_PAGE_SIZE:
+            return linhas, None
+        ultima = pagina[-1]
+        params["or"] = (f'({coluna}.gt."{ultima[coluna]}",'
+                        f'and({coluna}.eq."{ultima[coluna]}",id.gt.{ultima["id"]}))')
+
+
+class SnapshotsListas:
+    """
+    Cópias locais das listagens de buscas, objecao e deposito_patente, mantidas
+    por sincronização delta e compartilhadas pelo processo.
+
+    A primeira leitura baixa a tabela inteira (colunas de resumo e updated_at).
+    As seguintes pedem só as linhas com updated_at a partir da marca d'água (a
+    maior updated_at já vista, menos SUPABASE_DELTA_MARGEM segundos para cobrir
+    transações confirmadas com atraso) e as exclusões registradas em
+    registros_excluidos. Dentro de SUPABASE_CACHE_TTL a cópia é usada sem ir ao
+    Supabase, a não ser que uma escrita do app a marque como desatualizada; a
+    cada SUPABASE_DELTA_RESSINCRONIZAR segundos ela é baixada de novo, o que
+    também descarta linhas que deixaram de ser visíveis pelo RLS.
+
+    Cada cópia é separada por token, dono e filtros da listagem, como no
+    CacheListas. Os filtros (status, texto) vão para o servidor na carga
+    completa; o delta é lido só pelo dono e filtrado aqui, o que também tira da
+    cópia as linhas que deixaram de casar com o filtro. Sem a migração supabase/migrations/*_sincronizacao_delta.sql a
+    tabela é desativada e as listagens voltam para a leitura paginada.
+    """
+
+    COLUNA_MARCA = "updated_at"
+
+    def __init__(self, ttl: int = SUPABASE_CACHE_TTL, margem: int = SUPABASE_DELTA_MARGEM,
+                 ressincronizar: int = SUPABASE_DELTA_RESSINCRONIZAR):
+        self.ttl = ttl
+        self.margem = timedelta(seconds=margem)
+        self.ressincronizar = ressincronizar
+        self._copias = {}
+        self._desativadas = set()
+        # Tabelas cujas alterações chegam pelo feed (ver feed_alteracoes.py): sem releitura por TTL
+        self._ao_vivo = set()
+        self._lock = threading.Lock()
+
+    def _ler(self, lista: str, tabela: str, headers: Dict[str, str], params: Dict[str, str],
+             coluna: str) -> Optional[List[Dict[str, Any]]]:
+        """Como ler_em_ordem; 400/404 (migração ausente) desativam a listagem"""
+        linhas, status = ler_em_ordem(tabela, headers, params, coluna)
+        if status in (400, 404):
+            self._desativadas.add(lista)
+            logging.warning(f"Sincronização delta desativada para {lista}; "
+                            "aplique a migração de sincronização (supabase/migrations)")
+        return linhas
+
+    def _desde(self, marca: str) -> str:
+        return f"gte.{(_ler_instante(marca) - self.margem).isoformat()}"
+
+    def _sincronizar(self, copia: Dict[str, Any], tabela: str, headers: Dict[str, str],
+                     filtros: Dict[str, str]) -> bool:
+        """Atualiza a cópia (delta ou carga completa); False se o Supabase falhou"""
+        agora = time.monotonic()
+        completa = copia["marca"] is None or agora - copia["carregada"] > self.ressincronizar
+        params = dict(filtros, select=f"{COLUNAS_RESUMO[tabela]},{self.COLUNA_MARCA}")
+        if completa:
+            params.update(copia["filtros"])
+        else:
+            params[self.COLUNA_MARCA] = self._desde(copia["marca"])
+
+        linhas = self._ler(tabela, tabela, headers, params, self.COLUNA_MARCA)
+        if linhas is None:
+            return False
+
+        exclusoes = []
+        if not completa and copia["marca_exclusoes"]:
+            exclusoes = self._ler(tabela, "registros_excluidos", headers, {
+                "select": "id,registro_id,excluido_em",
+                "tabela": f"eq.{tabela}",
+                "excluido_em": self._desde(copia["marca_exclusoes"]),
+            }, "excluido_em")
+            if exclusoes is None:
+                return False
+
+        if completa:
+            copia["linhas"] = {}
+            copia["carregada"] = agora
+        for linha in linhas:
+            if completa or self._no_filtro(copia, linha):
+                copia["linhas"][linha["id"]] = linha
+            else:
+                copia["linhas"].pop(linha["id"], None)
+        # registro_id vem como texto (qualquer tipo de chave)
+        excluidos = {str(exclusao["registro_id"]) for exclusao in exclusoes}
+        for registro_id in [i for i in copia["linhas"] if str(i) in excluidos]:
+            del copia["linhas"][registro_id]
+
+        # As leituras vêm em ordem crescente: a última linha tem a maior marca
+        if completa:
+            copia["marca"] = linhas[-1][self.COLUNA_MARCA] if linhas else None
+            # Exclusões anteriores à carga completa já estão refletidas nela
+            copia["marca_exclusoes"] = copia["marca"]
+        elif linhas and _ler_instante(linhas[-1][self.COLUNA_MARCA]) > _ler_instante(copia["marca"]):
+            copia["marca"] = linhas[-1][self.COLUNA_MARCA]
+        if exclusoes and _ler_instante(exclusoes[-1]["excluido_em"]) > _ler_instante(copia["marca_exclusoes"]):
+            copia["marca_exclusoes"] = exclusoes[-1]["excluido_em"]
+        if linhas or exclusoes or completa:
+            copia["ordenadas"] = None
+        copia["sincronizada"] = agora
+        copia["desatualizada"] = False
+        return True
+
+    @staticmethod
+    def _no_filtro(copia: Dict[str, Any], linha: Dict[str, Any]) -> bool:
+        return copia["filtro_local"] is None or copia["filtro_local"](linha)
+
+    def linhas(self, tabela: str, jwt_token: str, dono: tuple = None, filtros: Dict[str, str] = None,
+               filtro_local: Callable[[Dict[str, Any]], bool] = None) -> Optional[List[Dict[str, Any]]]:
+        """
+        Linhas da listagem (colunas de resumo), mais recentes primeiro. dono=(coluna, id)
+        restringe a cópia às linhas do usuário. filtros são filtros PostgREST da
+        carga completa e filtro_local o mesmo filtro sobre uma linha, aplicado ao
+        delta. None se a sincronização não está disponível: o chamador deve usar
+        a leitura paginada.
+        """
+        if tabela in self._desativadas:
+            return None
+        filtros = filtros or {}
+        token = _escopo_token({"Authorization": f"Bearer {jwt_token}"})
+        chave = (tabela, token, dono, tuple(sorted(filtros.items())))
+        agora = time.monotonic()
+        with self._lock:
+            copia = self._copias.get(chave)
+            if copia is None:
+                # Cópias sem uso há mais tempo que a ressincronização (tokens expirados)
+                self._copias = {k: c for k, c in self._copias.items()
+                                if agora - c["usada"] <= self.ressincronizar}
+                copia = self._copias[chave] = {
+                    "linhas": {}, "ordenadas": None, "marca": None, "marca_exclusoes": None,
+                    "carregada": 0.0, "sincronizada": 0.0, "desatualizada": True,
+                    "token": token, "jwt": jwt_token, "tabela": tabela, "dono": dono, "usada": agora,
+                    "filtros": filtros, "filtro_local": filtro_local, "lock": threading.Lock(),
+                }
+            copia["usada"] = agora
+
+        # Uma sessão sincroniza; as outras com o mesmo token esperam e usam o resultado
+        with copia["lock"]:
+            expirada = tabela not in self._ao_vivo and time.monotonic() - copia["sincronizada"] > self.ttl
+            if copia["desatualizada"] or expirada:
+                headers = {"apikey": os.getenv("SUPABASE_KEY"), "Authorization": f"Bearer {jwt_token}"}
+                filtros = {dono[0]: f"eq.{dono[1]}"} if dono else {}
+                try:
+                    sincronizou = self._sincronizar(copia, tabela, headers, filtros)
+                except (KeyError, ValueError, AttributeError) as e:
+                    # Resposta sem updated_at ou em formato inesperado
+                    logging.error(f"Erro na sincronização de {tabela}: {str(e)}")
+                    sincronizou = False
+                if not sincronizou:
+                    with self._lock:
+                        self._copias.pop(chave, None)
+                    return None
+            if copia["ordenadas"] is None:
+                copia["ordenadas"] = sorted(copia["linhas"].values(),
+                                            key=lambda l: (l.get("created_at") or "", l["id"]), reverse=True)
+            # updated_at é só da sincronização: fora dela a linha tem as colunas de resumo
+            # (ver carregar_registro_completo)
+            return [{coluna: valor for coluna, valor in linha.items() if coluna != self.COLUNA_MARCA}
+                    for linha in copia["ordenadas"]]
+
+    def marcar_desatualizada(self, tabela: str):
+        """Após uma escrita: a próxima leitura de cada cópia da tabela busca o delta"""
+        with self._lock:
+            for copia in self._copias.values():
+                if copia["tabela"] == tabela:
+                    copia["desatualizada"] = True
+
+    def definir_ao_vivo(self, tabela: str, ao_vivo: bool):
+        """
+        Liga ou desliga a releitura por TTL da tabela conforme o feed de alterações
+        está conectado. Nas duas transições as cópias buscam o delta, cobrindo o
+        que mudou enquanto o feed estava fora.
+        """
+        with self._lock:
+            if ao_vivo:
+                self._ao_vivo.add(tabela)
+            else:
+                self._ao_vivo.discard(tabela)
+        self.marcar_desatualizada(tabela)
+
+    def aplicar(self, tabela: str, tipo: str, registro: Dict[str, Any], ve_todas: Callable[[str], bool] = None):
+        """
+        Aplica às cópias da tabela uma alteração recebida do feed (INSERT, UPDATE
+        ou DELETE), sem consultar o Supabase. Nas cópias de um dono a linha entra
+        ou sai conforme a coluna do dono e, nas filtradas, conforme o filtro. Nas cópias sem dono uma linha nova só
+        entra se ve_todas(jwt) confirma que o token vê a tabela inteira; senão a
+        cópia busca o delta e o RLS decide se ela aparece.
+        """
+        colunas = COLUNAS_RESUMO[tabela].split(",") + [self.COLUNA_MARCA]
+        registro_id = registro.get("id")
+        with self._lock:
+            copias = [copia for copia in self._copias.values() if copia["tabela"] == tabela]
+        linha = {coluna: registro.get(coluna) for coluna in colunas}
+        # ve_todas pode ir ao Supabase: resolvida por token antes de travar as cópias,
+        # para as leituras delas não esperarem essas consultas
+        visiveis = {}
+        if ve_todas and tipo != "DELETE":
+            for copia in copias:
+                if (not copia["dono"] and copia["jwt"] not in visiveis
+                        and registro_id not in copia["linhas"] and self._no_filtro(copia, linha)):
+                    visiveis[copia["jwt"]] = ve_todas(copia["jwt"])
+        for copia in copias:
+            with copia["lock"]:
+                dono = copia["dono"]
+                if (tipo == "DELETE" or (dono and str(registro.get(dono[0])) != str(dono[1]))
+                        or not self._no_filtro(copia, linha)):
+                    if copia["linhas"].pop(registro_id, None) is not None:
+                        copia["ordenadas"] = None
+                elif dono or registro_id in copia["linhas"] or visiveis.get(copia["jwt"]):
+                    copia["linhas"][registro_id] = dict(linha)
+                    copia["ordenadas"] = None
+                else:
+                    copia["desatualizada"] = True
+
+    def descartar_token(self, jwt_token: str):
+        """Descarta as cópias lidas com o token (logout)"""
+        token = _escopo_token({"Authorization": f"Bearer {jwt_token}"})
+        with self._lock:
+            self._copias = {k: c for k, c in self._copias.items() if c["token"] != token}
+
+
+_snapshots_listas = SnapshotsListas()
+
+
+def snapshots_listas() -> SnapshotsListas:
+    """Cópias de listagens únicas do processo (ver SnapshotsListas)"""
+    return _snapshots_listas
+
+
+class DiretorioUsuarios:
+    """
+    Cadastro de usuários (perfil, funcionario, juridico_marca) com cache por id.
+
+    Os ids ainda não conhecidos viram uma única consulta id=in.(...) por tabela e
+    o resultado (inclusive "não encontrado") fica em cache por SUPABASE_DIRETORIO_TTL
+    segundos. O cache é separado por token, respeitando o que o RLS mostra a cada usuário.
+    """
+
+    TABELAS = ("perfil", "funcionario", "juridico_marca")
+    # Ids por consulta, para não estourar o tamanho da URL
+    LOTE = 100
+    # Entradas no cache a partir das quais as expiradas são descartadas
+    LIMITE_CACHE = 5000
+
+    def __init__(self, ttl: int = SUPABASE_DIRETORIO_TTL):
+        self.ttl = ttl
+        self._cache = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _token(jwt_token: str = None) -> Optional[str]:
+        return jwt_token or getattr(st.session_state, 'jwt_token', None)
+
+    @staticmethod
+    def _escopo(token: Optional[str]) -> str:
+        return hashlib.sha256(token.encode()).hexdigest() if token else ""
+
+    def _consultar(self, tabela: str, ids: List[str], token: Optional[str],
+                   avisar: bool = True) -> Optional[List[Dict[str, Any]]]:
+        headers = {"apikey": os.getenv("SUPABASE_KEY"), "Content-Type": "application/json"}
+        if token:
+            headers["Authorization"] = f"Bearer {token}"
+        url = f"{os.getenv('SUPABASE_URL')}/rest/v1/{tabela}"
+        try:
+            resp = ler_compartilhado(url, headers=headers, params={"id": f"in.({','.join(ids)})"})
+            if resp.status_code == 200:
+                return resp.json()
+            if avisar:
+                st.warning(f"Erro ao buscar usuários em {tabela}: {resp.text}")
+            logging.error(f"Erro ao buscar usuários em {tabela}: {resp.text}")
+        except Exception as e:
+            if avisar:
+                st.error(f"Erro ao buscar usuários em {tabela}: {str(e)}")
+            logging.error(f"Erro ao buscar usuários em {tabela}: {str(e)}")
+        return None
+
+    def buscar(self, tabela: str, ids, jwt_token: str = None, avisar: bool = True) -> Dict[str, Dict[str, Any]]:
+        """
+        Retorna {id: registro} dos ids encontrados na tabela. Só os ids fora do
+        cache vão ao Supabase, em uma consulta in.() por lote. avisar=False deixa
+        as falhas só no log, para chamadas fora de um script do Streamlit.
+        """
+        token = self._token(jwt_token)
+        escopo = self._escopo(token)
+        agora = time.monotonic()
+        encontrados, faltantes = {}, []
+        with self._lock:
+            for user_id in dict.fromkeys(str(i) for i in ids if i):
+                entrada = self._cache.get((escopo, tabela, user_id))
+                if entrada and entrada[0] > agora:
+                    if entrada[1] is not None:
+                        encontrados[user_id] = entrada[1]
+                else:
+                    faltantes.append(user_id)
+
+        for inicio in range(0, len(faltantes), self.LOTE):
+            lote = faltantes[inicio:inicio + self.LOTE]
+            registros = self._consultar(tabela, lote, token, avisar)
+            if registros is None:
+                # Falha não vai para o cache; a próxima chamada tenta de novo
+                continue
+            por_id = {str(r.get('id')): r for r in registros}
+            expira = time.monotonic() + self.ttl
+            with self._lock:
+                if len(self._cache) > self.LIMITE_CACHE:
+                    self._cache = {k: v for k, v in self._cache.items() if v[0] > agora}
+                for user_id in lote:
+                    self._cache[(escopo, tabela, user_id)] = (expira, por_id.get(user_id))
+            encontrados.update(por_id)
+        return encontrados
+
+    def registro(self, tabela: str, user_id, jwt_token: str = None, avisar: bool = True) -> Optional[Dict[str, Any]]:
+        """Registro de um usuário na tabela, ou None se não existir"""
+        if not user_id:
+            return None
+        return self.buscar(tabela, [user_id], jwt_token, avisar).get(str(user_id))
+
+    def email(self, user_id, tabelas=TABELAS, jwt_token: str = None) -> Optional[str]:
+        """E-mail do usuário na primeira tabela (na ordem dada) em que ele aparece"""
+        for tabela in tabelas:
+            registro = self.registro(tabela, user_id, jwt_token)
+            if registro and registro.get('email'):
+                return registro['email']
+        return None
+
+    def invalidar(self, tabela: str = None, user_id=None):
+        """Descarta do cache (de todos os escopos) a tabela e/ou o usuário informados"""
+        with self._lock:
+            self._cache = {
+                chave: valor for chave, valor in self._cache.items()
+                if not ((tabela is None or chave[1] == tabela) and (user_id is None or chave[2] == str(user_id)))
+            }
+
+
+_diretorio_usuarios = None
+
+
+def diretorio_usuarios() -> DiretorioUsuarios:
+    """Diretório de usuários único do processo (ver DiretorioUsuarios)"""
+    global _diretorio_usuarios
+    if _diretorio_usuarios is None:
+        with _sessao_lock:
+            if _diretorio_usuarios is None:
+                _diretorio_usuarios = DiretorioUsuarios()
+    return _diretorio_usuarios
+
 
 class SupabaseAgent:
     """
@@ -20,6 +626,7 @@ class SupabaseAgent:
     def __init__(self):
         """
         Inicializa o cliente Supabase usando variáveis de ambiente.
+        Prefira obter_supabase_agent(), que reaproveita a instância do processo.
         """
         url = os.getenv("SUPABASE_URL")
         key = os.getenv("SUPABASE_KEY")
@@ -27,13 +634,19 @@ class SupabaseAgent:
             raise ValueError(
                 "SUPABASE_URL e SUPABASE_KEY devem estar definidos no .env")
         self.client: Client = create_client(url, key)
+        instrumentar_httpx(self.client.postgrest.session)
 
     def login(self, email: str, password: str):
         """
         Realiza login no Supabase e retorna o usuário e o JWT token se bem-sucedido.
+        O login usa um cliente próprio: o cliente compartilhado nunca guarda a
+        sessão de um usuário, e o JWT segue em st.session_state, passado por chamada.
         """
         try:
-            resp = self.client.auth.sign_in_with_password(
+            cliente_auth = create_client(
+                os.getenv("SUPABASE_URL"), os.getenv("SUPABASE_KEY"))
+            instrumentar_httpx(cliente_auth.auth._http_client)
+            resp = cliente_auth.auth.sign_in_with_password(
                 {"email": email, "password": password})
             jwt_token = None
             if hasattr(resp, "session") and resp.session:
@@ -54,38 +667,8 @@ class SupabaseAgent:
                 raise Exception(f"Erro de conexão: {error_message}")
 
     def get_profile(self, user_id: str) -> Optional[Dict[str, Any]]:
-        try:
-            import requests
-
-            # Usar REST API com JWT token da sessão ou None
-            jwt_token = getattr(st.session_state, 'jwt_token', None)
-
-            # Se não há JWT token, usar apenas apikey (para casos de inicialização)
-            if jwt_token:
-                headers = {
-                    "apikey": os.getenv("SUPABASE_KEY"),
-                    "Authorization": f"Bearer {jwt_token}",
-                    "Content-Type": "application/json"
-                }
-            else:
-                headers = {
-                    "apikey": os.getenv("SUPABASE_KEY"),
-                    "Content-Type": "application/json"
-                }
-
-            url = f"{os.getenv('SUPABASE_URL')}/rest/v1/perfil?id=eq.{user_id}"
-            resp = requests.get(url, headers=headers)
-
-            if resp.status_code == 200:
-                data = resp.json()
-                return data[0] if data and len(data) > 0 else None
-            else:
-                st.warning(f"Erro ao buscar perfil: {resp.text}")
-                return None
-
-        except Exception as e:
-            st.error(f"Erro ao buscar perfil: {str(e)}")
-            return None
+        """Perfil (tabela perfil) do usuário, via diretório de usuários"""
+        return diretorio_usuarios().registro("perfil", user_id)
 
     def update_profile(self, user_id: str, data: Dict[str, Any]) -> bool:
         """
@@ -98,6 +681,7 @@ class SupabaseAgent:
             logging.error(
                 "Erro ao atualizar perfil: resposta vazia do Supabase.")
             return False
+        diretorio_usuarios().invalidar("perfil", user_id)
         return True
 
     def insert_busca(self, busca_data: Dict[str, Any]) -> bool:
@@ -116,6 +700,7 @@ class SupabaseAgent:
             logging.error(
                 "Erro ao inserir no Supabase: resposta vazia do Supabase.")
             return False
+        self._invalidar_listas("buscas", resp.data)
         return True
 
     def _get_headers(self, jwt_token: str, content_type: bool = False) -> dict:
@@ -130,11 +715,50 @@ class SupabaseAgent:
             headers["Content-Type"] = "application/json"
         return headers
 
+    @staticmethod
+    def _select_donos(tabela: str) -> Dict[str, str]:
+        """select de um PATCH com return=representation: id e as colunas de DONOS_LISTAS"""
+        return {"select": ",".join(("id",) + DONOS_LISTAS[tabela])}
+
+    def _invalidar_listas(self, tabela: str, linhas: List[Dict[str, Any]] = None):
+        """
+        Invalida no cache as listagens afetadas por uma escrita. Com as linhas
+        escritas (incluindo as colunas de DONOS_LISTAS) caem só as listas desses
+        donos e as de todos; sem elas, todas as listagens da tabela. As cópias
+        delta da tabela (SnapshotsListas) buscam as alterações na próxima leitura
+        e o espelho local, se ativo, sincroniza a tabela na hora.
+        """
+        snapshots_listas().marcar_desatualizada(tabela)
+        espelho = self._espelho()
+        if espelho:
+            try:
+                espelho.apos_escrita(tabela)
+            except Exception as e:
+                logging.error(f"Erro ao sincronizar o espelho local de {tabela}: {str(e)}")
+        colunas = DONOS_LISTAS[tabela]
+        if linhas is None or any(coluna not in linha for linha in linhas for coluna in colunas):
+            cache_listas().invalidar(tabela)
+        else:
+            cache_listas().invalidar(tabela, [linha[coluna] for linha in linhas for coluna in colunas])
+
+    @staticmethod
+    def _espelho():
+        """Espelho SQLite local, se configurado (ver espelho_local.py)"""
+        from espelho_local import espelho_local
+        return espelho_local()
+
+    def _listar_espelho(self, tabela: str, jwt_token: str, dono: tuple = None, resumo: bool = False,
+                        status: List[str] = None, termo: str = None) -> Optional[List[Dict[str, Any]]]:
+        """Listagem lida do espelho local; None se desativado ou se ele não pode responder"""
+        espelho = self._espelho()
+        if not espelho:
+            return None
+        return espelho.listar(tabela, jwt_token, dono, resumo, status, termo)
+
     def insert_busca_rest(self, busca_data: Dict[str, Any], jwt_token: str) -> bool:
         """
         Insere uma nova busca na tabela 'buscas' via REST API do Supabase.
         """
-        import requests
         # Garante que status_busca está presente
         if "status_busca" not in busca_data:
             busca_data["status_busca"] = "pendente"
@@ -158,13 +782,14 @@ class SupabaseAgent:
         url = f"{os.getenv('SUPABASE_URL')}/rest/v1/buscas"
         headers = self._get_headers(jwt_token, content_type=True)
 
-        resp = requests.post(url, headers=headers, json=busca_data)
+        resp = sessao_http().post(url, headers=headers, json=busca_data)
 
         if resp.status_code != 201:
             st.warning(f"Erro ao inserir no Supabase: {resp.text}")
             logging.error(f"Erro ao inserir no Supabase: {resp.text}")
             return False
 
+        self._invalidar_listas("buscas", [busca_data])
         return True
 
     def get_buscas_by_consultor(self, consultor_id: str) -> List[Dict[str, Any]]:
@@ -183,53 +808,217 @@ class SupabaseAgent:
             "*").order("created_at", desc=True).execute()
         return resp.data if resp.data else []
 
-    def get_buscas_rest(self, consultor_id: str, jwt_token: str) -> list:
+    def _colunas(self, tabela: str, resumo: bool) -> str:
+        """Colunas da consulta: as de resumo nas listas ou a linha inteira"""
+        return COLUNAS_RESUMO[tabela] if resumo else "*"
+
+    def _iterar_paginas(self, tabela: str, jwt_token: str, filtros: Dict[str, str] = None,
+                        colunas: str = "*", tamanho_pagina: int = None, descricao: str = None,
+                        dono: str = None):
         """
-        Busca todas as buscas associadas a um consultor via REST API do Supabase.
+        Percorre a tabela do mais recente para o mais antigo, uma página por requisição.
+
+        A paginação é por chave (created_at, id): cada página continua depois da
+        última linha da anterior, então o custo por página não cresce com o
+        histórico e linhas inseridas no meio não geram duplicatas. As colunas
+        pedidas precisam incluir id e created_at. As páginas passam pelo cache
+        de listagens; dono é o id pelo qual os filtros restringem a tabela.
         """
-        import requests
-        url = f"{os.getenv('SUPABASE_URL')}/rest/v1/buscas?consultor_id=eq.{consultor_id}&order=created_at.desc"
+        tamanho = tamanho_pagina or SUPABASE_PAGE_SIZE
+        url = f"{os.getenv('SUPABASE_URL')}/rest/v1/{tabela}"
         headers = self._get_headers(jwt_token)
-        resp = requests.get(url, headers=headers)
-        if resp.status_code == 200:
-            return resp.json()
-        else:
-            st.warning(f"Erro ao buscar buscas: {resp.text}")
-            logging.error(f"Erro ao buscar buscas: {resp.text}")
-            return []
+        params = dict(filtros or {})
+        params.update({"select": colunas, "order": "created_at.desc,id.desc", "limit": tamanho})
+
+        while True:
+            resp = ler_compartilhado(url, headers=headers, params=params, cache=(tabela, dono))
+            if resp.status_code != 200:
+                st.warning(f"Erro ao buscar {descricao or tabela}: {resp.text}")
+                logging.error(f"Erro ao buscar {descricao or tabela}: {resp.text}")
+                return
+            pagina = resp.json()
+            yield from pagina
+            if len(pagina) < tamanho:
+                return
+            ultima = pagina[-1]
+            params["or"] = (f'(created_at.lt."{ultima["created_at"]}",'
+                            f'and(created_at.eq."{ultima["created_at"]}",id.lt.{ultima["id"]}))')
+
+    @staticmethod
+    def _normalizar_termo(termo: str) -> str:
+        """Termo sem acentos e em minúsculas, como a coluna busca_texto (ver supabase/migrations)"""
+        termo = _sem_acento(termo.strip())
+        # % e _ são curingas do ilike; o termo deve casar literalmente
+        return termo.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+
+    def _filtros_buscas(self, consultor_id: str = None, status: List[str] = None, termo: str = None) -> Dict[str, str]:
+        """
+        Filtros PostgREST da tabela buscas: consultor, lista de status e texto
+        (marca ou consultor, sem diferenciar acentos e maiúsculas).
+        """
+        filtros = {}
+        if consultor_id is not None:
+            filtros["consultor_id"] = f"eq.{consultor_id}"
+        if status:
+            filtros["status_busca"] = f"in.({','.join(status)})"
+        if termo and termo.strip():
+            filtros["busca_texto"] = f"ilike.*{self._normalizar_termo(termo)}*"
+        return filtros
+
+    @staticmethod
+    def _filtro_local_buscas(status: List[str] = None, termo: str = None):
+        """Os filtros de _filtros_buscas como predicado sobre uma linha (delta da cópia); None sem filtro"""
+        termo = _sem_acento(termo.strip()) if termo and termo.strip() else None
+        if not status and not termo:
+            return None
 
-    def get_all_buscas_rest(self, jwt_token: str) -> list:
+        def casa(linha: Dict[str, Any]) -> bool:
+            if status and linha.get("status_busca") not in status:
+                return False
+            return not termo or termo in _sem_acento(
+                f"{linha.get('marca') or ''}\n{linha.get('nome_consultor') or ''}")
+        return casa
+
+    def _snapshot_buscas(self, jwt_token: str, dono: tuple = None, status: List[str] = None,
+                         termo: str = None) -> Optional[List[Dict[str, Any]]]:
+        """Cópia delta das buscas já filtrada no servidor (carga) e localmente (delta)"""
+        return snapshots_listas().linhas("buscas", jwt_token, dono, self._filtros_buscas(None, status, termo),
+                                         self._filtro_local_buscas(status, termo))
+
+    def iter_buscas_rest(self, consultor_id: str, jwt_token: str, colunas: str = "*", tamanho_pagina: int = None,
+                         status: List[str] = None, termo: str = None):
+        """
+        Gerador com as buscas de um consultor, paginado (ver _iterar_paginas).
+        status e termo filtram no servidor (ver _filtros_buscas).
+        """
+        return self._iterar_paginas("buscas", jwt_token, self._filtros_buscas(consultor_id, status, termo),
+                                    colunas, tamanho_pagina, "buscas", dono=consultor_id)
+
+    def iter_all_buscas_rest(self, jwt_token: str, colunas: str = "*", tamanho_pagina: int = None,
+                             status: List[str] = None, termo: str = None):
+        """
+        Gerador com todas as buscas cadastradas, paginado (ver _iterar_paginas).
+        status e termo filtram no servidor (ver _filtros_buscas).
+        """
+        return self._iterar_paginas("buscas", jwt_token, self._filtros_buscas(None, status, termo),
+                                    colunas, tamanho_pagina, "buscas")
+
+    def get_buscas_rest(self, consultor_id: str, jwt_token: str, resumo: bool = False,
+                        status: List[str] = None, termo: str = None) -> list:
+        """
+        Busca todas as buscas associadas a um consultor via REST API do Supabase.
+        Com resumo=True traz apenas as colunas de COLUNAS_RESUMO["buscas"], da
+        cópia delta (SnapshotsListas) quando disponível; status e termo filtram
+        no servidor (na cópia, também sobre o delta). Com o espelho local ativo, lê dele.
+        """
+        linhas = self._listar_espelho("buscas", jwt_token, ("consultor_id", consultor_id), resumo, status, termo)
+        if linhas is not None:
+            return linhas
+        if resumo:
+            linhas = self._snapshot_buscas(jwt_token, ("consultor_id", consultor_id), status, termo)
+            if linhas is not None:
+                return linhas
+        return list(self.iter_buscas_rest(consultor_id, jwt_token, self._colunas("buscas", resumo),
+                                          status=status, termo=termo))
+
+    def get_all_buscas_rest(self, jwt_token: str, resumo: bool = False,
+                            status: List[str] = None, termo: str = None) -> list:
         """
         Busca todas as buscas cadastradas via REST API do Supabase.
+        Com resumo=True traz apenas as colunas de COLUNAS_RESUMO["buscas"], da
+        cópia delta (SnapshotsListas) quando disponível; status e termo filtram
+        no servidor (na cópia, também sobre o delta). Com o espelho local ativo, lê dele.
         """
-        import requests
-        url = f"{os.getenv('SUPABASE_URL')}/rest/v1/buscas?order=created_at.desc"
-        headers = self._get_headers(jwt_token)
-        resp = requests.get(url, headers=headers)
+        linhas = self._listar_espelho("buscas", jwt_token, None, resumo, status, termo)
+        if linhas is not None:
+            return linhas
+        if resumo:
+            linhas = self._snapshot_buscas(jwt_token, None, status, termo)
+            if linhas is not None:
+                return linhas
+        return list(self.iter_all_buscas_rest(jwt_token, self._colunas("buscas", resumo),
+                                              status=status, termo=termo))
+
+    def get_busca_by_id(self, busca_id: str, jwt_token: str) -> Optional[Dict[str, Any]]:
+        """
+        Busca uma busca específica pelo ID (linha completa)
+        """
+        url = f"{os.getenv('SUPABASE_URL')}/rest/v1/buscas?id=eq.{busca_id}"
+        resp = ler_compartilhado(url, headers=self._get_headers(jwt_token))
         if resp.status_code == 200:
-            return resp.json()
-        else:
-            st.warning(f"Erro ao buscar buscas: {resp.text}")
-            logging.error(f"Erro ao buscar buscas: {resp.text}")
-            return []
+            data = resp.json()
+            return data[0] if data else None
+        st.warning(f"Erro ao buscar busca: {resp.text}")
+        logging.error(f"Erro ao buscar busca: {resp.text}")
+        return None
+
+    def carregar_registro_completo(self, tabela: str, registro: Dict[str, Any], jwt_token: str = None) -> Dict[str, Any]:
+        """
+        Completa um registro vindo de uma lista em modo resumo com todas as colunas.
+        Registros que já estão completos são devolvidos sem nova requisição.
+        """
+        if not set(registro) <= set(COLUNAS_RESUMO[tabela].split(",")):
+            return registro
+        token = jwt_token or st.session_state.get('jwt_token')
+        carregadores = {
+            "buscas": self.get_busca_by_id,
+            "objecao": self.get_objecao_by_id,
+            "deposito_patente": self.get_deposito_patente_by_id,
+        }
+        completo = carregadores[tabela](registro['id'], token)
+        return {**registro, **completo} if completo else registro
 
     def update_busca_status(self, busca_id: str, status: str, jwt_token: str) -> bool:
         """
         Atualiza o campo status_busca de uma busca pelo ID via REST API do Supabase.
         Apenas usuários autorizados podem executar essa ação.
         """
-        import requests
         url = f"{os.getenv('SUPABASE_URL')}/rest/v1/buscas?id=eq.{busca_id}"
         headers = self._get_headers(jwt_token, content_type=True)
+        headers["Prefer"] = "return=representation"
         data = {"status_busca": status}
-        resp = requests.patch(url, headers=headers, json=data)
+        resp = sessao_http().patch(url, headers=headers, params=self._select_donos("buscas"), json=data)
         if resp.status_code in (200, 204):
+            self._invalidar_listas("buscas", resp.json() if resp.status_code == 200 else None)
             return True
         else:
             st.warning(f"Erro ao atualizar status da busca: {resp.text}")
             logging.error(f"Erro ao atualizar status da busca: {resp.text}")
             return False
 
+    def _atualizar_status_em_lote(self, tabela: str, coluna: str, ids: List, status: str, jwt_token: str) -> int:
+        """
+        Atualiza a coluna de status de vários registros em um único PATCH (id=in.(...)).
+        Retorna quantos registros foram alterados (0 em caso de erro).
+        """
+        ids = list(dict.fromkeys(ids))
+        if not ids:
+            return 0
+        url = f"{os.getenv('SUPABASE_URL')}/rest/v1/{tabela}"
+        headers = self._get_headers(jwt_token, content_type=True)
+        headers["Prefer"] = "return=representation"
+        params = {"id": f"in.({','.join(str(i) for i in ids)})", **self._select_donos(tabela)}
+        try:
+            resp = sessao_http().patch(url, headers=headers, params=params, json={coluna: status})
+            if resp.status_code != 200:
+                st.warning(f"Erro ao atualizar status em lote: {resp.text}")
+                logging.error(f"Erro ao atualizar {coluna} em lote ({tabela}): {resp.text}")
+                return 0
+            alteradas = resp.json()
+            self._invalidar_listas(tabela, alteradas)
+            return len(alteradas)
+        except Exception as e:
+            st.error(f"Erro ao atualizar status em lote: {str(e)}")
+            logging.error(f"Erro ao atualizar {coluna} em lote ({tabela}): {str(e)}")
+            return 0
+
+    def update_buscas_status(self, busca_ids: List, status: str, jwt_token: str) -> int:
+        """
+        Atualiza o status_busca de várias buscas em uma requisição.
+        Retorna quantas buscas foram alteradas.
+        """
+        return self._atualizar_status_em_lote("buscas", "status_busca", busca_ids, status, jwt_token)
+
     def _sanitize_filename(self, filename: str) -> str:
         """
         Sanitiza o nome do arquivo removendo caracteres inválidos para armazenamento.
@@ -297,8 +1086,8 @@ class SupabaseAgent:
             logging.info(f"Nome do arquivo: {sanitized_filename}")
             logging.info(f"Content-Type: {content_type}")
 
-            resp = requests.post(url, headers=headers,
-                                 data=file_content, timeout=30)
+            resp = sessao_http().post(url, headers=headers,
+                                      data=file_content, timeout=30)
 
             # Log da resposta
             logging.info(f"Status code: {resp.status_code}")
@@ -349,8 +1138,6 @@ class SupabaseAgent:
         Verifica se o bucket existe e está acessível.
         """
         try:
-            import requests
-
             url = f"{os.getenv('SUPABASE_URL')}/storage/v1/bucket/{bucket_name}"
             headers = {
                 "apikey": os.getenv("SUPABASE_KEY"),
@@ -358,7 +1145,7 @@ class SupabaseAgent:
                 "Content-Type": "application/json"
             }
 
-            resp = requests.get(url, headers=headers)
+            resp = ler_compartilhado(url, headers=headers)
             if resp.status_code == 200:
                 logging.info(f"Bucket {bucket_name} está acessível")
                 return True
@@ -372,7 +1159,6 @@ class SupabaseAgent:
             return False
 
     def update_busca_pdf_url(self, busca_id, pdf_urls):
-        import requests
         url = f"{os.getenv('SUPABASE_URL')}/rest/v1/buscas?id=eq.{busca_id}"
 
         # Usar JWT token da sessão ou None
@@ -396,132 +1182,42 @@ class SupabaseAgent:
             data = {"pdf_buscas": [pdf_urls]}
         else:
             data = {"pdf_buscas": pdf_urls}
-        resp = requests.patch(url, headers=headers, json=data)
+        resp = sessao_http().patch(url, headers=headers, json=data)
         if resp.status_code not in (200, 204):
             st.warning(f"Erro ao atualizar pdf_buscas: {resp.text}")
             return False
+        self._invalidar_listas("buscas")
         return True
 
     def get_funcionario_by_id(self, user_id: str):
         """
-        Busca um funcionário pelo ID no Supabase usando REST API com JWT token.
+        Busca um funcionário pelo ID (via diretório de usuários, com cache curto).
         Args:
             user_id (str): ID do funcionário
         Returns:
             dict: Dados do funcionário ou None se não encontrado
         """
-        try:
-            import requests
-
-            # Usar REST API com JWT token da sessão ou None
-            jwt_token = getattr(st.session_state, 'jwt_token', None)
-
-            # Se não há JWT token, usar apenas apikey (para casos de inicialização)
-            if jwt_token:
-                headers = {
-                    "apikey": os.getenv("SUPABASE_KEY"),
-                    "Authorization": f"Bearer {jwt_token}",
-                    "Content-Type": "application/json"
-                }
-            else:
-                headers = {
-                    "apikey": os.getenv("SUPABASE_KEY"),
-                    "Content-Type": "application/json"
-                }
-
-            url = f"{os.getenv('SUPABASE_URL')}/rest/v1/funcionario?id=eq.{user_id}"
-            resp = requests.get(url, headers=headers)
-
-            if resp.status_code == 200:
-                data = resp.json()
-                return data[0] if data and len(data) > 0 else None
-            else:
-                st.warning(f"Erro ao buscar funcionário: {resp.text}")
-                return None
-
-        except Exception as e:
-            st.error(f"Erro ao buscar funcionário: {str(e)}")
-            return None
+        return diretorio_usuarios().registro("funcionario", user_id)
 
     def get_consultor_by_id(self, user_id: str):
         """
-        Busca um consultor pelo ID na tabela perfil usando REST API com JWT token.
+        Busca um consultor pelo ID na tabela perfil (via diretório de usuários).
         Args:
             user_id (str): ID do consultor
         Returns:
             dict: Dados do consultor ou None se não encontrado
         """
-        try:
-            import requests
-
-            # Usar REST API com JWT token da sessão ou None
-            jwt_token = getattr(st.session_state, 'jwt_token', None)
-
-            # Se não há JWT token, usar apenas apikey (para casos de inicialização)
-            if jwt_token:
-                headers = {
-                    "apikey": os.getenv("SUPABASE_KEY"),
-                    "Authorization": f"Bearer {jwt_token}",
-                    "Content-Type": "application/json"
-                }
-            else:
-                headers = {
-                    "apikey": os.getenv("SUPABASE_KEY"),
-                    "Content-Type": "application/json"
-                }
-
-            url = f"{os.getenv('SUPABASE_URL')}/rest/v1/perfil?id=eq.{user_id}"
-            resp = requests.get(url, headers=headers)
-
-            if resp.status_code == 200:
-                data = resp.json()
-                return data[0] if data and len(data) > 0 else None
-            else:
-                st.warning(f"Erro ao buscar consultor: {resp.text}")
-                return None
-
-        except Exception as e:
-            st.error(f"Erro ao buscar consultor: {str(e)}")
-            return None
+        return diretorio_usuarios().registro("perfil", user_id)
 
     def get_juridico_by_id(self, user_id: str):
         """
-        Busca um usuário da tabela juridico_marca pelo ID.
+        Busca um usuário da tabela juridico_marca pelo ID (via diretório de usuários).
         Args:
             user_id (str): ID do usuário
         Returns:
             dict: Dados do usuário ou None se não encontrado
         """
-        try:
-            import requests
-
-            jwt_token = getattr(st.session_state, 'jwt_token', None)
-
-            if jwt_token:
-                headers = {
-                    "apikey": os.getenv("SUPABASE_KEY"),
-                    "Authorization": f"Bearer {jwt_token}",
-                    "Content-Type": "application/json"
-                }
-            else:
-                headers = {
-                    "apikey": os.getenv("SUPABASE_KEY"),
-                    "Content-Type": "application/json"
-                }
-
-            url = f"{os.getenv('SUPABASE_URL')}/rest/v1/juridico_marca?id=eq.{user_id}"
-            resp = requests.get(url, headers=headers)
-
-            if resp.status_code == 200:
-                data = resp.json()
-                return data[0] if data and len(data) > 0 else None
-            else:
-                st.warning(f"Erro ao buscar usuário jurídico: {resp.text}")
-                return None
-
-        except Exception as e:
-            st.error(f"Erro ao buscar usuário jurídico: {str(e)}")
-            return None
+        return diretorio_usuarios().registro("juridico_marca", user_id)
 
     def get_juridicos_admin(self):
         """
@@ -530,8 +1226,6 @@ class SupabaseAgent:
             list: Lista de usuários jurídicos admin
         """
         try:
-            import requests
-
             jwt_token = getattr(st.session_state, 'jwt_token', None)
 
             if jwt_token:
@@ -547,7 +1241,7 @@ class SupabaseAgent:
                 }
 
             url = f"{os.getenv('SUPABASE_URL')}/rest/v1/juridico_marca?is_admin=eq.true"
-            resp = requests.get(url, headers=headers)
+            resp = ler_compartilhado(url, headers=headers)
 
             if resp.status_code == 200:
                 return resp.json() if resp.json() else []
@@ -569,8 +1263,6 @@ class SupabaseAgent:
             list: Lista de usuários jurídicos com o cargo especificado
         """
         try:
-            import requests
-
             jwt_token = getattr(st.session_state, 'jwt_token', None)
 
             if jwt_token:
@@ -586,7 +1278,7 @@ class SupabaseAgent:
                 }
 
             url = f"{os.getenv('SUPABASE_URL')}/rest/v1/juridico_marca?cargo=eq.{cargo}"
-            resp = requests.get(url, headers=headers)
+            resp = ler_compartilhado(url, headers=headers)
 
             if resp.status_code == 200:
                 return resp.json() if resp.json() else []
@@ -673,101 +1365,29 @@ class SupabaseAgent:
         """
         Busca o nome do consultor pelo ID
         """
-        try:
-            import requests
-
-            headers = {
-                "apikey": os.getenv("SUPABASE_KEY"),
-                "Authorization": f"Bearer {jwt_token}",
-                "Content-Type": "application/json"
-            }
-
-            url = f"{os.getenv('SUPABASE_URL')}/rest/v1/perfil?id=eq.{consultor_id}"
-            resp = requests.get(url, headers=headers)
-
-            if resp.status_code == 200:
-                data = resp.json()
-                if data and len(data) > 0:
-                    return data[0].get('name', 'N/A')
-            return 'N/A'
-        except Exception as e:
-            st.error(f"Erro ao buscar nome do consultor: {str(e)}")
-            return 'N/A'
+        registro = diretorio_usuarios().registro("perfil", consultor_id, jwt_token)
+        return registro.get('name', 'N/A') if registro else 'N/A'
 
     def get_juridico_name_by_id(self, juridico_id: str, jwt_token: str) -> str:
         """
         Busca o nome do usuário jurídico pelo ID
         """
-        try:
-            import requests
-
-            headers = {
-                "apikey": os.getenv("SUPABASE_KEY"),
-                "Authorization": f"Bearer {jwt_token}",
-                "Content-Type": "application/json"
-            }
-
-            url = f"{os.getenv('SUPABASE_URL')}/rest/v1/juridico_marca?id=eq.{juridico_id}"
-            resp = requests.get(url, headers=headers)
-
-            if resp.status_code == 200:
-                data = resp.json()
-                if data and len(data) > 0:
-                    return data[0].get('name', 'N/A')
-            return 'N/A'
-        except Exception as e:
-            st.error(f"Erro ao buscar nome do usuário jurídico: {str(e)}")
-            return 'N/A'
+        registro = diretorio_usuarios().registro("juridico_marca", juridico_id, jwt_token)
+        return registro.get('name', 'N/A') if registro else 'N/A'
 
     def get_consultor_email_by_id(self, consultor_id: str, jwt_token: str) -> str:
         """
         Busca o email do consultor pelo ID
         """
-        try:
-            import requests
-
-            headers = {
-                "apikey": os.getenv("SUPABASE_KEY"),
-                "Authorization": f"Bearer {jwt_token}",
-                "Content-Type": "application/json"
-            }
-
-            url = f"{os.getenv('SUPABASE_URL')}/rest/v1/perfil?id=eq.{consultor_id}"
-            resp = requests.get(url, headers=headers)
-
-            if resp.status_code == 200:
-                data = resp.json()
-                if data and len(data) > 0:
-                    return data[0].get('email', 'N/A')
-            return 'N/A'
-        except Exception as e:
-            st.error(f"Erro ao buscar email do consultor: {str(e)}")
-            return 'N/A'
-
-    def get_juridico_email_by_id(self, juridico_id: str, jwt_token: str) -> str:
-        """
-        Busca o email do usuário jurídico pelo ID
-        """
-        try:
-            import requests
-
-            headers = {
-                "apikey": os.getenv("SUPABASE_KEY"),
-                "Authorization": f"Bearer {jwt_token}",
-                "Content-Type": "application/json"
-            }
-
-            url = f"{os.getenv('SUPABASE_URL')}/rest/v1/juridico_marca?id=eq.{juridico_id}"
-            resp = requests.get(url, headers=headers)
-
-            if resp.status_code == 200:
-                data = resp.json()
-                if data and len(data) > 0:
-                    return data[0].get('email', 'N/A')
-            return 'N/A'
-        except Exception as e:
-            st.error(f"Erro ao buscar email do usuário jurídico: {str(e)}")
-            return 'N/A'
+        registro = diretorio_usuarios().registro("perfil", consultor_id, jwt_token)
+        return registro.get('email', 'N/A') if registro else 'N/A'
+
+    def get_juridico_email_by_id(self, juridico_id: str, jwt_token: str) -> str:
+        """
+        Busca o email do usuário jurídico pelo ID
+        """
+        registro = diretorio_usuarios().registro("juridico_marca", juridico_id, jwt_token)
+        return registro.get('email', 'N/A') if registro else 'N/A'
 
     def insert_objecao(self, objecao_data: dict, jwt_token: str) -> dict:
         """
@@ -775,8 +1395,6 @@ class SupabaseAgent:
         Retorna o objeto criado ou None se falhar.
         """
         try:
-            import requests
-
             # Buscar nomes e emails antes da inserção
             consultor_id = objecao_data.get('consultor_objecao')
             juridico_id = objecao_data.get('juridico_id')
@@ -804,9 +1422,10 @@ class SupabaseAgent:
             }
 
             url = f"{os.getenv('SUPABASE_URL')}/rest/v1/objecao"
-            resp = requests.post(url, headers=headers, json=objecao_data)
+            resp = sessao_http().post(url, headers=headers, json=objecao_data)
 
             if resp.status_code == 201:
+                self._invalidar_listas("objecao", [objecao_data])
                 try:
                     # Tentar parsear a resposta JSON
                     created_obj = resp.json()
@@ -830,8 +1449,6 @@ class SupabaseAgent:
         Busca uma objeção recém-criada usando os dados principais
         """
         try:
-            import requests
-
             headers = {
                 "apikey": os.getenv("SUPABASE_KEY"),
                 "Authorization": f"Bearer {jwt_token}",
@@ -845,7 +1462,7 @@ class SupabaseAgent:
             juridico_id = objecao_data.get('juridico_id', '')
 
             url = f"{os.getenv('SUPABASE_URL')}/rest/v1/objecao?marca=eq.{marca}&nomecliente=eq.{nomecliente}&consultor_objecao=eq.{consultor_objecao}&juridico_id=eq.{juridico_id}&order=created_at.desc&limit=1"
-            resp = requests.get(url, headers=headers)
+            resp = ler_compartilhado(url, headers=headers)
 
             if resp.status_code == 200:
                 data = resp.json()
@@ -863,7 +1480,9 @@ class SupabaseAgent:
         Busca objeções por consultor via REST API
         """
         try:
-            import requests
+            linhas = self._listar_espelho("objecao", jwt_token, ("consultor_objecao", consultor_id))
+            if linhas is not None:
+                return linhas
 
             headers = {
                 "apikey": os.getenv("SUPABASE_KEY"),
@@ -872,7 +1491,7 @@ class SupabaseAgent:
             }
 
             url = f"{os.getenv('SUPABASE_URL')}/rest/v1/objecao?consultor_objecao=eq.{consultor_id}&order=created_at.desc"
-            resp = requests.get(url, headers=headers)
+            resp = ler_compartilhado(url, headers=headers, cache=("objecao", consultor_id))
 
             if resp.status_code == 200:
                 return resp.json() if resp.json() else []
@@ -889,7 +1508,9 @@ class SupabaseAgent:
         Busca objeções criadas por um usuário jurídico via REST API
         """
         try:
-            import requests
+            linhas = self._listar_espelho("objecao", jwt_token, ("juridico_id", juridico_id))
+            if linhas is not None:
+                return linhas
 
             headers = {
                 "apikey": os.getenv("SUPABASE_KEY"),
@@ -898,7 +1519,7 @@ class SupabaseAgent:
             }
 
             url = f"{os.getenv('SUPABASE_URL')}/rest/v1/objecao?juridico_id=eq.{juridico_id}&order=created_at.desc"
-            resp = requests.get(url, headers=headers)
+            resp = ler_compartilhado(url, headers=headers, cache=("objecao", juridico_id))
 
             if resp.status_code == 200:
                 return resp.json() if resp.json() else []
@@ -915,8 +1536,6 @@ class SupabaseAgent:
         Busca uma objeção específica pelo ID
         """
         try:
-            import requests
-
             headers = {
                 "apikey": os.getenv("SUPABASE_KEY"),
                 "Authorization": f"Bearer {jwt_token}",
@@ -924,7 +1543,7 @@ class SupabaseAgent:
             }
 
             url = f"{os.getenv('SUPABASE_URL')}/rest/v1/objecao?id=eq.{objecao_id}"
-            resp = requests.get(url, headers=headers)
+            resp = ler_compartilhado(url, headers=headers)
 
             if resp.status_code == 200:
                 data = resp.json()
@@ -936,28 +1555,27 @@ class SupabaseAgent:
             st.error(f"Erro ao buscar objeção: {str(e)}")
             return None
 
-    def get_all_objecoes(self, jwt_token: str) -> list:
+    def iter_all_objecoes(self, jwt_token: str, colunas: str = "*", tamanho_pagina: int = None):
+        """
+        Gerador com todas as objeções, paginado (ver _iterar_paginas).
+        """
+        return self._iterar_paginas("objecao", jwt_token, None, colunas, tamanho_pagina, "objeções")
+
+    def get_all_objecoes(self, jwt_token: str, resumo: bool = False) -> list:
         """
         Busca todas as objeções (apenas para administradores)
+        Com resumo=True traz apenas as colunas de COLUNAS_RESUMO["objecao"],
+        da cópia delta (SnapshotsListas) quando disponível; do espelho local, se ativo.
         """
         try:
-            import requests
-
-            headers = {
-                "apikey": os.getenv("SUPABASE_KEY"),
-                "Authorization": f"Bearer {jwt_token}",
-                "Content-Type": "application/json"
-            }
-
-            url = f"{os.getenv('SUPABASE_URL')}/rest/v1/objecao?order=created_at.desc"
-            resp = requests.get(url, headers=headers)
-
-            if resp.status_code == 200:
-                return resp.json() if resp.json() else []
-            else:
-                st.warning(f"Erro ao buscar objeções: {resp.text}")
-                return []
-
+            linhas = self._listar_espelho("objecao", jwt_token, resumo=resumo)
+            if linhas is not None:
+                return linhas
+            if resumo:
+                linhas = snapshots_listas().linhas("objecao", jwt_token)
+                if linhas is not None:
+                    return linhas
+            return list(self.iter_all_objecoes(jwt_token, self._colunas("objecao", resumo)))
         except Exception as e:
             st.error(f"Erro ao buscar objeções: {str(e)}")
             return []
@@ -967,8 +1585,6 @@ class SupabaseAgent:
         Atualiza o status de uma objeção
         """
         try:
-            import requests
-
             headers = {
                 "apikey": os.getenv("SUPABASE_KEY"),
                 "Authorization": f"Bearer {jwt_token}",
@@ -976,11 +1592,13 @@ class SupabaseAgent:
             }
 
             url = f"{os.getenv('SUPABASE_URL')}/rest/v1/objecao?id=eq.{objecao_id}"
+            headers["Prefer"] = "return=representation"
             data = {"status_objecao": status}
 
-            resp = requests.patch(url, headers=headers, json=data)
+            resp = sessao_http().patch(url, headers=headers, params=self._select_donos("objecao"), json=data)
 
             if resp.status_code in (200, 204):
+                self._invalidar_listas("objecao", resp.json() if resp.status_code == 200 else None)
                 return True
             else:
                 st.warning(f"Erro ao atualizar status: {resp.text}")
@@ -990,12 +1608,18 @@ class SupabaseAgent:
             st.error(f"Erro ao atualizar status: {str(e)}")
             return False
 
+    def update_objecoes_status(self, objecao_ids: List, status: str, jwt_token: str) -> int:
+        """
+        Atualiza o status de várias objeções em uma requisição.
+        Retorna quantas objeções foram alteradas.
+        """
+        return self._atualizar_status_em_lote("objecao", "status_objecao", objecao_ids, status, jwt_token)
+
     def update_objecao_obejpdf(self, objecao_id, obejpdf_data, jwt_token=None):
         """
         Atualiza o campo obejpdf de uma objeção pelo ID via REST API do Supabase.
         Para documentos enviados por funcionários.
         """
-        import requests
         url = f"{os.getenv('SUPABASE_URL')}/rest/v1/objecao?id=eq.{objecao_id}"
 
         # Usar JWT token passado como parâmetro ou da sessão
@@ -1014,11 +1638,12 @@ class SupabaseAgent:
         data = {"obejpdf": obejpdf_data}
 
         try:
-            resp = requests.patch(url, headers=headers, json=data)
+            resp = sessao_http().patch(url, headers=headers, json=data)
             if resp.status_code not in (200, 204):
                 st.warning(f"Erro ao atualizar obejpdf: {resp.text}")
                 logging.error(f"Erro ao atualizar obejpdf: {resp.text}")
                 return False
+            self._invalidar_listas("objecao")
             return True
         except Exception as e:
             st.error(f"Erro na requisição: {str(e)}")
@@ -1030,7 +1655,6 @@ class SupabaseAgent:
         Atualiza o campo peticaopdf de uma objeção pelo ID via REST API do Supabase.
         Para petições enviadas por advogados.
         """
-        import requests
         url = f"{os.getenv('SUPABASE_URL')}/rest/v1/objecao?id=eq.{objecao_id}"
 
         # Usar JWT token passado como parâmetro ou da sessão
@@ -1049,11 +1673,12 @@ class SupabaseAgent:
         data = {"peticaopdf": peticaopdf_data}
 
         try:
-            resp = requests.patch(url, headers=headers, json=data)
+            resp = sessao_http().patch(url, headers=headers, json=data)
             if resp.status_code not in (200, 204):
                 st.warning(f"Erro ao atualizar peticaopdf: {resp.text}")
                 logging.error(f"Erro ao atualizar peticaopdf: {resp.text}")
                 return False
+            self._invalidar_listas("objecao")
             return True
         except Exception as e:
             st.error(f"Erro na requisição: {str(e)}")
@@ -1064,7 +1689,6 @@ class SupabaseAgent:
         """
         Atualiza o campo documentos_objecao de uma objeção pelo ID via REST API do Supabase.
         """
-        import requests
         url = f"{os.getenv('SUPABASE_URL')}/rest/v1/objecao?id=eq.{objecao_id}"
 
         # Usar JWT token passado como parâmetro ou da sessão
@@ -1083,13 +1707,14 @@ class SupabaseAgent:
         data = {"documentos_objecao": documentos_data}
 
         try:
-            resp = requests.patch(url, headers=headers, json=data)
+            resp = sessao_http().patch(url, headers=headers, json=data)
             if resp.status_code not in (200, 204):
                 st.warning(
                     f"Erro ao atualizar documentos_objecao: {resp.text}")
                 logging.error(
                     f"Erro ao atualizar documentos_objecao: {resp.text}")
                 return False
+            self._invalidar_listas("objecao")
             return True
         except Exception as e:
             st.error(f"Erro na requisição: {str(e)}")
@@ -1123,8 +1748,6 @@ class SupabaseAgent:
         Insere um novo depósito de patente na tabela 'deposito_patente' via REST API do Supabase.
         """
         try:
-            import requests
-
             headers = {
                 "apikey": os.getenv("SUPABASE_KEY"),
                 "Authorization": f"Bearer {jwt_token}",
@@ -1132,9 +1755,10 @@ class SupabaseAgent:
             }
 
             url = f"{os.getenv('SUPABASE_URL')}/rest/v1/deposito_patente"
-            resp = requests.post(url, headers=headers, json=data)
+            resp = sessao_http().post(url, headers=headers, json=data)
 
             if resp.status_code == 201:
+                self._invalidar_listas("deposito_patente", [data])
                 return True
             else:
                 st.warning(f"Erro ao inserir depósito de patente: {resp.text}")
@@ -1152,13 +1776,15 @@ class SupabaseAgent:
         Busca depósitos de patente para um funcionário específico
         """
         try:
-            import requests
-
             token = jwt_token or st.session_state.get('jwt_token')
             if not token:
                 st.error("Token JWT não encontrado")
                 return []
 
+            linhas = self._listar_espelho("deposito_patente", token, ("funcionario_id", funcionario_id))
+            if linhas is not None:
+                return linhas
+
             headers = {
                 "apikey": os.getenv("SUPABASE_KEY"),
                 "Authorization": f"Bearer {token}",
@@ -1166,7 +1792,7 @@ class SupabaseAgent:
             }
 
             url = f"{os.getenv('SUPABASE_URL')}/rest/v1/deposito_patente?funcionario_id=eq.{funcionario_id}&order=created_at.desc"
-            resp = requests.get(url, headers=headers)
+            resp = ler_compartilhado(url, headers=headers, cache=("deposito_patente", funcionario_id))
 
             if resp.status_code == 200:
                 return resp.json() if resp.json() else []
@@ -1183,13 +1809,15 @@ class SupabaseAgent:
         Busca depósitos de patente para um consultor específico
         """
         try:
-            import requests
-
             token = jwt_token or st.session_state.get('jwt_token')
             if not token:
                 st.error("Token JWT não encontrado")
                 return []
 
+            linhas = self._listar_espelho("deposito_patente", token, ("consultor", consultor_id))
+            if linhas is not None:
+                return linhas
+
             headers = {
                 "apikey": os.getenv("SUPABASE_KEY"),
                 "Authorization": f"Bearer {token}",
@@ -1197,7 +1825,7 @@ class SupabaseAgent:
             }
 
             url = f"{os.getenv('SUPABASE_URL')}/rest/v1/deposito_patente?consultor=eq.{consultor_id}&order=created_at.desc"
-            resp = requests.get(url, headers=headers)
+            resp = ler_compartilhado(url, headers=headers, cache=("deposito_patente", consultor_id))
 
             if resp.status_code == 200:
                 return resp.json() if resp.json() else []
@@ -1214,8 +1842,6 @@ class SupabaseAgent:
         Atualiza o status de uma patente
         """
         try:
-            import requests
-
             headers = {
                 "apikey": os.getenv("SUPABASE_KEY"),
                 "Authorization": f"Bearer {jwt_token}",
@@ -1223,11 +1849,13 @@ class SupabaseAgent:
             }
 
             url = f"{os.getenv('SUPABASE_URL')}/rest/v1/deposito_patente?id=eq.{patente_id}"
+            headers["Prefer"] = "return=representation"
             data = {"status_patente": status}
 
-            resp = requests.patch(url, headers=headers, json=data)
+            resp = sessao_http().patch(url, headers=headers, params=self._select_donos("deposito_patente"), json=data)
 
             if resp.status_code in (200, 204):
+                self._invalidar_listas("deposito_patente", resp.json() if resp.status_code == 200 else None)
                 return True
             else:
                 st.warning(f"Erro ao atualizar status da patente: {resp.text}")
@@ -1237,11 +1865,17 @@ class SupabaseAgent:
             st.error(f"Erro ao atualizar status da patente: {str(e)}")
             return False
 
+    def update_patentes_status(self, patente_ids: List, status: str, jwt_token: str) -> int:
+        """
+        Atualiza o status de várias patentes em uma requisição.
+        Retorna quantas patentes foram alteradas.
+        """
+        return self._atualizar_status_em_lote("deposito_patente", "status_patente", patente_ids, status, jwt_token)
+
     def update_patente_relatorio(self, patente_id, relatorio_data, jwt_token=None):
         """
         Atualiza o campo relatorio de uma patente pelo ID via REST API do Supabase.
         """
-        import requests
         url = f"{os.getenv('SUPABASE_URL')}/rest/v1/deposito_patente?id=eq.{patente_id}"
 
         # Usar JWT token passado como parâmetro ou da sessão
@@ -1260,360 +1894,95 @@ class SupabaseAgent:
         data = {"relatorio_patente": relatorio_data}
 
         try:
-            resp = requests.patch(url, headers=headers, json=data)
+            resp = sessao_http().patch(url, headers=headers, json=data)
             if resp.status_code not in (200, 204):
                 st.warning(f"Erro ao atualizar relatório: {resp.text}")
                 logging.error(f"Erro ao atualizar relatório: {resp.text}")
                 return False
+            self._invalidar_listas("deposito_patente")
             return True
         except Exception as e:
             st.error(f"Erro na requisição: {str(e)}")
             logging.error(f"Erro na requisição: {str(e)}")
             return False
 
-    def update_patente_pdf_url(self, patente_id, pdf_urls, jwt_token=None):
+    def _anexar_arquivos(self, tabela: str, registro_id, coluna: str, arquivos: List[str], jwt_token=None):
         """
-        Atualiza a coluna pdf_patente de uma patente pelo ID via REST API do Supabase.
-        Permite que tanto consultores quanto funcionários adicionem documentos na mesma coluna.
+        Anexa arquivos a uma coluna de lista via RPC anexar_arquivos
+        (ver supabase/migrations): uma requisição, sem ler a linha antes.
+        Retorna a lista atualizada ou None em caso de erro.
         """
-        import requests
-        url = f"{os.getenv('SUPABASE_URL')}/rest/v1/deposito_patente?id=eq.{patente_id}"
-
-        # Usar JWT token passado como parâmetro ou da sessão
         token = jwt_token or st.session_state.get('jwt_token')
         if not token:
             st.error("Token JWT não encontrado")
-            return False
+            return None
 
-        headers = {
-            "apikey": os.getenv("SUPABASE_KEY"),
-            "Authorization": f"Bearer {token}",
-            "Content-Type": "application/json"
+        url = f"{os.getenv('SUPABASE_URL')}/rest/v1/rpc/anexar_arquivos"
+        data = {
+            "tabela": tabela,
+            # Convertido no banco para o tipo da coluna id
+            "registro_id": str(registro_id),
+            "coluna": coluna,
+            # Uma URL solta é um arquivo, não uma sequência de caracteres
+            "arquivos": [arquivos] if isinstance(arquivos, str) else list(arquivos),
         }
-
-        # Primeiro, buscar os arquivos existentes
-        try:
-            resp = requests.get(url, headers=headers)
-            if resp.status_code == 200:
-                patente_data = resp.json()
-                if patente_data:
-                    existing_pdfs = patente_data[0].get('pdf_patente', [])
-                    if isinstance(existing_pdfs, str):
-                        try:
-                            import json
-                            existing_pdfs = json.loads(existing_pdfs)
-                        except:
-                            existing_pdfs = []
-                    if not isinstance(existing_pdfs, list):
-                        existing_pdfs = []
-                else:
-                    existing_pdfs = []
-            else:
-                st.warning(f"Erro ao buscar patente: {resp.text}")
-                return False
-        except Exception as e:
-            st.error(f"Erro ao buscar patente: {str(e)}")
-            return False
-
-        # Combinar arquivos existentes com novos arquivos
-        all_pdfs = existing_pdfs + pdf_urls
-
-        # Atualizar a coluna pdf_patente
-        data = {"pdf_patente": all_pdfs}
-
         try:
-            resp = requests.patch(url, headers=headers, json=data)
-            if resp.status_code not in (200, 204):
-                st.warning(
-                    f"Erro ao atualizar arquivos da patente: {resp.text}")
-                logging.error(
-                    f"Erro ao atualizar arquivos da patente: {resp.text}")
-                return False
-            return True
+            resp = sessao_http().post(url, headers=self._get_headers(token, content_type=True), json=data)
+            if resp.status_code != 200:
+                st.warning(f"Erro ao atualizar {coluna} da patente: {resp.text}")
+                logging.error(f"Erro ao atualizar {coluna} de {tabela} {registro_id}: {resp.text}")
+                return None
+            resultado = resp.json() if resp.content else None
+            if resultado is None:
+                # Registro inexistente ou sem permissão de alteração (RLS)
+                st.warning("⚠️ Atualização não confirmada.")
+                logging.error(f"Nenhum registro alterado ao anexar {coluna} em {tabela} {registro_id}")
+                return None
+            self._invalidar_listas(tabela)
+            return resultado
         except Exception as e:
             st.error(f"Erro na requisição: {str(e)}")
             logging.error(f"Erro na requisição: {str(e)}")
-            return False
+            return None
 
-    def update_patente_aguardando_info(self, patente_id, pdf_urls, jwt_token=None):
+    def update_patente_pdf_url(self, patente_id, pdf_urls, jwt_token=None):
         """
-        Atualiza a coluna aguardando_info de uma patente pelo ID via REST API do Supabase.
+        Anexa arquivos à coluna pdf_patente de uma patente.
+        Permite que tanto consultores quanto funcionários adicionem documentos na mesma coluna.
         """
-        import requests
-        url = f"{os.getenv('SUPABASE_URL')}/rest/v1/deposito_patente?id=eq.{patente_id}"
-
-        token = jwt_token or st.session_state.get('jwt_token')
-        if not token:
-            st.error("Token JWT não encontrado")
-            return False
-
-        headers = {
-            "apikey": os.getenv("SUPABASE_KEY"),
-            "Authorization": f"Bearer {token}",
-            "Content-Type": "application/json"
-        }
-
-        # Primeiro, buscar os PDFs existentes
-        try:
-            resp = requests.get(url, headers=headers)
-            if resp.status_code == 200:
-                patente_data = resp.json()
-                if patente_data:
-                    existing_pdfs = patente_data[0].get('aguardando_info', [])
-
-                    # Tratar diferentes tipos de dados
-                    if existing_pdfs is None:
-                        existing_pdfs = []
-                    elif isinstance(existing_pdfs, str):
-                        try:
-                            import json
-                            existing_pdfs = json.loads(existing_pdfs)
-                        except:
-                            # Se não conseguir fazer parse JSON, tratar como string única
-                            existing_pdfs = [existing_pdfs] if existing_pdfs.strip() else [
-                            ]
-                    elif not isinstance(existing_pdfs, list):
-                        # Se não for lista, converter para lista
-                        existing_pdfs = [
-                            existing_pdfs] if existing_pdfs else []
-                else:
-                    existing_pdfs = []
-            else:
-                st.warning(f"Erro ao buscar patente: {resp.text}")
-                return False
-        except Exception as e:
-            st.error(f"Erro ao buscar patente: {str(e)}")
-            return False
-
-        # Combinar PDFs existentes com novos PDFs
-        all_pdfs = existing_pdfs + pdf_urls
-
-        # Atualizar a coluna aguardando_info
-        data = {"aguardando_info": all_pdfs}
-
-        try:
-            resp = requests.patch(url, headers=headers, json=data)
+        return self._anexar_arquivos("deposito_patente", patente_id, "pdf_patente", pdf_urls, jwt_token) is not None
 
-            if resp.status_code not in (200, 204):
-                st.warning(
-                    f"Erro ao atualizar aguardando_info da patente: {resp.text}")
-                logging.error(
-                    f"Erro ao atualizar aguardando_info da patente: {resp.text}")
-                return False
-
-            # Verificar se os dados foram realmente salvos
-            verify_resp = requests.get(url, headers=headers)
-
-            if verify_resp.status_code == 200:
-                verify_data = verify_resp.json()
-                if verify_data:
-                    saved_pdfs = verify_data[0].get('aguardando_info', [])
-                    if saved_pdfs and len(saved_pdfs) > 0:
-                        st.success("✅ Documentos salvos com sucesso!")
-                    else:
-                        st.warning("⚠️ Atualização não confirmada.")
-                        return False
-                else:
-                    st.warning("⚠️ Nenhum dado encontrado na verificação")
-                    return False
-            else:
-                st.warning(
-                    f"⚠️ DEBUG: Erro na verificação: {verify_resp.text}")
-                return False
-
-            return True
-        except Exception as e:
-            st.error(f"Erro na requisição: {str(e)}")
-            logging.error(f"Erro na requisição: {str(e)}")
+    def update_patente_aguardando_info(self, patente_id, pdf_urls, jwt_token=None):
+        """
+        Anexa arquivos à coluna aguardando_info de uma patente.
+        """
+        if self._anexar_arquivos("deposito_patente", patente_id, "aguardando_info", pdf_urls, jwt_token) is None:
             return False
+        st.success("✅ Documentos salvos com sucesso!")
+        return True
 
     def update_patente_para_aprovacao(self, patente_id, pdf_urls, jwt_token=None):
         """
-        Atualiza a coluna para_aprovacao de uma patente pelo ID via REST API do Supabase.
+        Anexa arquivos à coluna para_aprovacao de uma patente.
         """
-        import requests
-        url = f"{os.getenv('SUPABASE_URL')}/rest/v1/deposito_patente?id=eq.{patente_id}"
-
-        token = jwt_token or st.session_state.get('jwt_token')
-        if not token:
-            st.error("Token JWT não encontrado")
-            return False
-
-        headers = {
-            "apikey": os.getenv("SUPABASE_KEY"),
-            "Authorization": f"Bearer {token}",
-            "Content-Type": "application/json"
-        }
-
-        # Primeiro, buscar os PDFs existentes
-        try:
-            resp = requests.get(url, headers=headers)
-            if resp.status_code == 200:
-                patente_data = resp.json()
-                if patente_data:
-                    existing_pdfs = patente_data[0].get('para_aprovacao', [])
-
-                    # Tratar diferentes tipos de dados
-                    if existing_pdfs is None:
-                        existing_pdfs = []
-                    elif isinstance(existing_pdfs, str):
-                        try:
-                            import json
-                            existing_pdfs = json.loads(existing_pdfs)
-                        except:
-                            # Se não conseguir fazer parse JSON, tratar como string única
-                            existing_pdfs = [existing_pdfs] if existing_pdfs.strip() else [
-                            ]
-                    elif not isinstance(existing_pdfs, list):
-                        # Se não for lista, converter para lista
-                        existing_pdfs = [
-                            existing_pdfs] if existing_pdfs else []
-                else:
-                    existing_pdfs = []
-            else:
-                st.warning(f"Erro ao buscar patente: {resp.text}")
-                return False
-        except Exception as e:
-            st.error(f"Erro ao buscar patente: {str(e)}")
-            return False
-
-        # Combinar PDFs existentes com novos PDFs
-        all_pdfs = existing_pdfs + pdf_urls
-
-        # Atualizar a coluna para_aprovacao
-        data = {"para_aprovacao": all_pdfs}
-
-        try:
-            resp = requests.patch(url, headers=headers, json=data)
-
-            if resp.status_code not in (200, 204):
-                st.warning(
-                    f"Erro ao atualizar para_aprovacao da patente: {resp.text}")
-                logging.error(
-                    f"Erro ao atualizar para_aprovacao da patente: {resp.text}")
-                return False
-
-            # Verificar se os dados foram realmente salvos
-            verify_resp = requests.get(url, headers=headers)
-
-            if verify_resp.status_code == 200:
-                verify_data = verify_resp.json()
-                if verify_data:
-                    saved_pdfs = verify_data[0].get('para_aprovacao', [])
-                    if saved_pdfs and len(saved_pdfs) > 0:
-                        st.success("✅ Documentos salvos com sucesso!")
-                    else:
-                        st.warning("⚠️ Atualização não confirmada.")
-                        return False
-                else:
-                    st.warning("⚠️ Nenhum dado encontrado na verificação")
-                    return False
-            else:
-                st.warning(f"⚠️ Erro na verificação: {verify_resp.text}")
-                return False
-
-            return True
-        except Exception as e:
-            st.error(f"Erro na requisição: {str(e)}")
-            logging.error(f"Erro na requisição: {str(e)}")
+        if self._anexar_arquivos("deposito_patente", patente_id, "para_aprovacao", pdf_urls, jwt_token) is None:
             return False
+        st.success("✅ Documentos salvos com sucesso!")
+        return True
 
     def update_patente_pdf_pendente(self, patente_id, pdf_urls, jwt_token=None):
         """
-        Atualiza a coluna pdf_pendente de uma patente pelo ID via REST API do Supabase.
+        Anexa arquivos à coluna pdf_pendente de uma patente.
         """
-        import requests
-        url = f"{os.getenv('SUPABASE_URL')}/rest/v1/deposito_patente?id=eq.{patente_id}"
-
-        token = jwt_token or st.session_state.get('jwt_token')
-        if not token:
-            st.error("Token JWT não encontrado")
-            return False
-
-        headers = {
-            "apikey": os.getenv("SUPABASE_KEY"),
-            "Authorization": f"Bearer {token}",
-            "Content-Type": "application/json"
-        }
-
-        # Primeiro, buscar os PDFs existentes
-        try:
-            resp = requests.get(url, headers=headers)
-            if resp.status_code == 200:
-                patente_data = resp.json()
-                if patente_data:
-                    existing_pdfs = patente_data[0].get('pdf_pendente', [])
-
-                    # Tratar diferentes tipos de dados
-                    if existing_pdfs is None:
-                        existing_pdfs = []
-                    elif isinstance(existing_pdfs, str):
-                        try:
-                            import json
-                            existing_pdfs = json.loads(existing_pdfs)
-                        except:
-                            # Se não conseguir fazer parse JSON, tratar como string única
-                            existing_pdfs = [existing_pdfs] if existing_pdfs.strip() else [
-                            ]
-                    elif not isinstance(existing_pdfs, list):
-                        # Se não for lista, converter para lista
-                        existing_pdfs = [
-                            existing_pdfs] if existing_pdfs else []
-                else:
-                    existing_pdfs = []
-            else:
-                st.warning(f"Erro ao buscar patente: {resp.text}")
-                return False
-        except Exception as e:
-            st.error(f"Erro ao buscar patente: {str(e)}")
-            return False
-
-        # Combinar PDFs existentes com novos PDFs
-        all_pdfs = existing_pdfs + pdf_urls
-
-        # Atualizar a coluna pdf_pendente
-        data = {"pdf_pendente": all_pdfs}
-
-        try:
-            resp = requests.patch(url, headers=headers, json=data)
-
-            if resp.status_code not in (200, 204):
-                st.warning(
-                    f"Erro ao atualizar pdf_pendente da patente: {resp.text}")
-                logging.error(
-                    f"Erro ao atualizar pdf_pendente da patente: {resp.text}")
-                return False
-
-            # Verificar se os dados foram realmente salvos
-            verify_resp = requests.get(url, headers=headers)
-
-            if verify_resp.status_code == 200:
-                verify_data = verify_resp.json()
-                if verify_data:
-                    saved_pdfs = verify_data[0].get('pdf_pendente', [])
-                    if saved_pdfs and len(saved_pdfs) > 0:
-                        st.success("✅ Documentos salvos com sucesso!")
-                    else:
-                        st.warning("⚠️ Atualização não confirmada.")
-                        return False
-                else:
-                    st.warning("⚠️ Nenhum dado encontrado na verificação")
-                    return False
-            else:
-                st.warning(f"⚠️ Erro na verificação: {verify_resp.text}")
-                return False
-
-            return True
-        except Exception as e:
-            st.error(f"Erro na requisição: {str(e)}")
-            logging.error(f"Erro na requisição: {str(e)}")
+        if self._anexar_arquivos("deposito_patente", patente_id, "pdf_pendente", pdf_urls, jwt_token) is None:
             return False
+        st.success("✅ Documentos salvos com sucesso!")
+        return True
 
     def test_patente_update_permissions(self, patente_id, jwt_token=None):
         """
         Testa se conseguimos atualizar diferentes colunas da patente
         """
-        import requests
         url = f"{os.getenv('SUPABASE_URL')}/rest/v1/deposito_patente?id=eq.{patente_id}"
 
         token = jwt_token or st.session_state.get('jwt_token')
@@ -1633,7 +2002,7 @@ class SupabaseAgent:
         st.info("🧪 TESTE 1: Tentando atualizar pdf_patente...")
         test_data_pdf = {"pdf_patente": ["test_url_pdf"]}
         try:
-            resp = requests.patch(url, headers=headers, json=test_data_pdf)
+            resp = sessao_http().patch(url, headers=headers, json=test_data_pdf)
             st.info(f"🧪 TESTE 1 - Status: {resp.status_code}")
             if resp.status_code in (200, 204):
                 st.success("🧪 TESTE 1: pdf_patente pode ser atualizada!")
@@ -1646,8 +2015,8 @@ class SupabaseAgent:
         st.info("🧪 TESTE 2: Tentando atualizar aguardando_info...")
         test_data_aguardando = {"aguardando_info": ["test_url_aguardando"]}
         try:
-            resp = requests.patch(url, headers=headers,
-                                  json=test_data_aguardando)
+            resp = sessao_http().patch(url, headers=headers,
+                                       json=test_data_aguardando)
             st.info(f"🧪 TESTE 2 - Status: {resp.status_code}")
             if resp.status_code in (200, 204):
                 st.success("🧪 TESTE 2: aguardando_info pode ser atualizada!")
@@ -1660,8 +2029,8 @@ class SupabaseAgent:
         st.info("🧪 TESTE 3: Tentando atualizar para_aprovacao...")
         test_data_aprovacao = {"para_aprovacao": ["test_url_aprovacao"]}
         try:
-            resp = requests.patch(url, headers=headers,
-                                  json=test_data_aprovacao)
+            resp = sessao_http().patch(url, headers=headers,
+                                       json=test_data_aprovacao)
             st.info(f"🧪 TESTE 3 - Status: {resp.status_code}")
             if resp.status_code in (200, 204):
                 st.success("🧪 TESTE 3: para_aprovacao pode ser atualizada!")
@@ -1670,10 +2039,12 @@ class SupabaseAgent:
         except Exception as e:
             st.error(f"🧪 TESTE 3: Exceção - {str(e)}")
 
+        self._invalidar_listas("deposito_patente")
+
         # Verificar dados atuais
         st.info("🧪 VERIFICAÇÃO: Dados atuais da patente...")
         try:
-            resp = requests.get(url, headers=headers)
+            resp = ler_compartilhado(url, headers=headers)
             if resp.status_code == 200:
                 data = resp.json()
                 if data:
@@ -1716,72 +2087,151 @@ class SupabaseAgent:
         }
         return icon_map.get(status, "❓")
 
-    def get_all_depositos_patente(self, jwt_token: str = None):
+    def iter_all_depositos_patente(self, jwt_token: str = None, colunas: str = "*", tamanho_pagina: int = None):
+        """
+        Gerador com todos os depósitos de patente, paginado (ver _iterar_paginas).
+        """
+        token = jwt_token or st.session_state.get('jwt_token')
+        return self._iterar_paginas("deposito_patente", token, None, colunas, tamanho_pagina,
+                                    "depósitos de patente")
+
+    def get_all_depositos_patente(self, jwt_token: str = None, resumo: bool = False):
         """
         Busca todos os depósitos de patente (apenas para administradores)
+        Com resumo=True traz apenas as colunas de COLUNAS_RESUMO["deposito_patente"],
+        da cópia delta (SnapshotsListas) quando disponível; do espelho local, se ativo.
         """
         try:
-            import requests
-
             token = jwt_token or st.session_state.get('jwt_token')
             if not token:
                 st.error("Token JWT não encontrado")
                 return []
 
-            headers = {
-                "apikey": os.getenv("SUPABASE_KEY"),
-                "Authorization": f"Bearer {token}",
-                "Content-Type": "application/json"
-            }
-
-            url = f"{os.getenv('SUPABASE_URL')}/rest/v1/deposito_patente?order=created_at.desc"
-            resp = requests.get(url, headers=headers)
+            linhas = self._listar_espelho("deposito_patente", token, resumo=resumo)
+            if linhas is not None:
+                return linhas
+            if resumo:
+                linhas = snapshots_listas().linhas("deposito_patente", token)
+                if linhas is not None:
+                    return linhas
 
-            if resp.status_code == 200:
-                return resp.json() if resp.json() else []
-            else:
-                st.warning(f"Erro ao buscar depósitos de patente: {resp.text}")
-                return []
+            return list(self.iter_all_depositos_patente(
+                token, self._colunas("deposito_patente", resumo)))
 
         except Exception as e:
             st.error(f"Erro ao buscar depósitos de patente: {str(e)}")
             return []
 
-    def get_user_email_by_id(self, user_id: str, jwt_token: str = None):
+    def get_deposito_patente_by_id(self, patente_id: str, jwt_token: str = None):
         """
-        Busca o e-mail de um usuário pelo ID
+        Busca um depósito de patente específico pelo ID (linha completa)
         """
         try:
-            import requests
-
             token = jwt_token or st.session_state.get('jwt_token')
             if not token:
                 st.error("Token JWT não encontrado")
                 return None
 
-            headers = {
-                "apikey": os.getenv("SUPABASE_KEY"),
-                "Authorization": f"Bearer {token}",
-                "Content-Type": "application/json"
-            }
-
-            url = f"{os.getenv('SUPABASE_URL')}/rest/v1/funcionario?id=eq.{user_id}&select=email"
-            resp = requests.get(url, headers=headers)
+            url = f"{os.getenv('SUPABASE_URL')}/rest/v1/deposito_patente?id=eq.{patente_id}"
+            resp = ler_compartilhado(url, headers=self._get_headers(token))
 
             if resp.status_code == 200:
                 data = resp.json()
-                if data and len(data) > 0:
-                    return data[0].get('email')
-                else:
-                    # Tentar na tabela de consultores
-                    url = f"{os.getenv('SUPABASE_URL')}/rest/v1/consultor?id=eq.{user_id}&select=email"
-                    resp = requests.get(url, headers=headers)
-                    if resp.status_code == 200:
-                        data = resp.json()
-                        if data and len(data) > 0:
-                            return data[0].get('email')
-            return None
+                return data[0] if data else None
+            else:
+                st.warning(f"Erro ao buscar depósito de patente: {resp.text}")
+                return None
 
         except Exception as e:
-            st.error(f"Erro ao buscar e-mail do usuário: {str(e)}")
+            st.error(f"Erro ao buscar depósito de patente: {str(e)}")
+            return None
+
+    def get_user_email_by_id(self, user_id: str, jwt_token: str = None):
+        """
+        Busca o e-mail de um usuário pelo ID: funcionario, depois juridico_marca e perfil
+        """
+        token = jwt_token or st.session_state.get('jwt_token')
+        if not token:
+            st.error("Token JWT não encontrado")
             return None
+        return diretorio_usuarios().email(user_id, ("funcionario", "juridico_marca", "perfil"), token)
+
+
+@st.cache_resource
+def obter_supabase_agent() -> SupabaseAgent:
+    """
+    Agente Supabase único do processo, compartilhado entre reruns e sessões.
+    O agente não guarda estado do usuário: o JWT é lido da sessão ou passado a cada chamada.
+    """
+    return SupabaseAgent()
+
+
+_executor_leituras = None
+
+
+def _obter_executor_leituras() -> ThreadPoolExecutor:
+    global _executor_leituras
+    if _executor_leituras is None:
+        with _sessao_lock:
+            if _executor_leituras is None:
+                _executor_leituras = ThreadPoolExecutor(
+                    max_workers=SUPABASE_POOL_SIZE, thread_name_prefix="supabase-leitura")
+    return _executor_leituras
+
+
+class SupabaseAgentAsync:
+    """
+    Variante assíncrona da API de leitura do SupabaseAgent.
+
+    Expõe os mesmos métodos get_* como corrotinas, com os mesmos argumentos e
+    retornos. As requisições rodam num pool de threads sobre a sessão HTTP
+    compartilhada, então consultas independentes aguardadas juntas
+    (asyncio.gather) custam o tempo da mais lenta, e não a soma.
+    """
+
+    def __init__(self, agente: SupabaseAgent):
+        self._agente = agente
+
+    def __getattr__(self, nome):
+        metodo = getattr(self._agente, nome)
+        if not nome.startswith("get_") or not callable(metodo):
+            raise AttributeError(
+                f"{nome} não faz parte da API de leitura assíncrona")
+
+        # O contexto do Streamlit (session_state com o JWT, st.warning) é da
+        # thread do script; a thread do pool o recebe só durante a chamada,
+        # para que a próxima tarefa nela não rode com a sessão de outro usuário.
+        ctx = get_script_run_ctx(suppress_warning=True)
+
+        def executar(*args, **kwargs):
+            thread = threading.current_thread()
+            anterior = get_script_run_ctx(suppress_warning=True)
+            if ctx is not None:
+                add_script_run_ctx(thread, ctx)
+            try:
+                return metodo(*args, **kwargs)
+            finally:
+                # add_script_run_ctx(ctx=None) mantém o contexto atual: restaura o atributo
+                setattr(thread, SCRIPT_RUN_CONTEXT_ATTR_NAME, anterior)
+
+        async def chamada(*args, **kwargs):
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(
+                _obter_executor_leituras(), lambda: executar(*args, **kwargs))
+
+        return chamada
+
+
+def executar_em_paralelo(*corrotinas):
+    """
+    Ponte síncrona para as views: aguarda as corrotinas ao mesmo tempo e
+    retorna os resultados na mesma ordem.
+
+        funcionario, perfil = executar_em_paralelo(
+            agente_async.get_funcionario_by_id(user_id),
+            agente_async.get_profile(user_id))
+    """
+    async def _reunir():
+        return await asyncio.gather(*corrotinas)
+
+    return asyncio.run(_reunir())
@@ -1,6 +1,8 @@
 import streamlit as st
+from array import array
 from datetime import date
 import json
+import os
 import re
 from fpdf import FPDF
 
@@ -432,8 +434,8 @@ def render_login_screen(supabase_agent):
                         del st.session_state.login_in_progress
                     return
 
-                # Limpar cache de dados do usuário anterior
-                st.cache_data.clear()
+                # As listagens em cache são separadas por token: nada do usuário
+                # anterior é reaproveitado, sem limpar o cache dos demais
 
                 # Loading para carregamento do classificador
                 with st.spinner(""):
@@ -818,8 +820,38 @@ def limpar_formulario():
     st.rerun()
 
 
-def exibir_especificacoes_card(busca):
-    """Exibe especificações em formato de card usando componentes nativos do Streamlit - OTIMIZADO"""
+def obter_especificacoes_selecionadas():
+    """
+    Seleção do classificador: conjunto ordenado (dict com valores None) de ids
+    do classificador compartilhado, com verificação e alternância em O(1).
+    Itens sem id são guardados pela chave (classe, especificacao).
+    """
+    selecionadas = st.session_state.get('especificacoes_selecionadas')
+    if not isinstance(selecionadas, dict):
+        # Sessões antigas guardavam uma lista de dicionários
+        selecionadas = dict.fromkeys(
+            (item.get('classe', ''), item.get('especificacao', ''))
+            for item in (selecionadas or [])
+        )
+        st.session_state.especificacoes_selecionadas = selecionadas
+    return selecionadas
+
+
+def _alternar_especificacao(checkbox_key, chave_selecao):
+    """Callback do checkbox clicado: marca ou desmarca o item na seleção"""
+    selecionadas = obter_especificacoes_selecionadas()
+    if st.session_state[checkbox_key]:
+        selecionadas[chave_selecao] = None
+    else:
+        selecionadas.pop(chave_selecao, None)
+
+
+def exibir_especificacoes_card(busca, prefixo_chave=""):
+    """
+    Exibe especificações em formato de card usando componentes nativos do Streamlit - OTIMIZADO
+    O prefixo_chave diferencia os checkboxes quando a mesma classe aparece em mais de um card.
+    Com 'ids' na busca, a seleção e os checkboxes usam o id do item no classificador.
+    """
     especs = busca.get('especificacoes', '')
     classes = busca.get('classes', '')
 
@@ -853,6 +885,9 @@ def exibir_especificacoes_card(busca):
             especs_list = []
 
         if especs_list:
+            ids_list = busca.get('ids') or []
+            selecionadas = obter_especificacoes_selecionadas()
+
             # Criar título do card
             if classes_list and len(classes_list) == 1:
                 card_title = f"📋 Classe {classes_list[0]} - Produtos/Serviços ({len(especs_list)} itens)"
@@ -872,51 +907,30 @@ def exibir_especificacoes_card(busca):
                         elif espec.startswith(f"{classe_num} "):
                             espec_limpa = espec[len(f"{classe_num} "):]
 
+                    # Identificador do item na seleção: id do classificador ou (classe, texto)
+                    classe_card = classes_list[0] if classes_list else ''
+                    chave_selecao = ids_list[i] if i < len(ids_list) else (classe_card, espec)
+
                     # Criar checkbox nativo do Streamlit com chave única
-                    checkbox_key = f"checkbox_{st.session_state.busca_session_key}_{classes_list[0] if classes_list else 'geral'}_{i}"
-
-                    # Verificar se esta especificação já está selecionada
-                    is_selected = any(
-                        sel.get('especificacao') == espec and sel.get(
-                            'classe') == (classes_list[0] if classes_list else '')
-                        for sel in st.session_state.get('especificacoes_selecionadas', [])
-                    )
-
-                    # Checkbox do Streamlit com texto inline
-                    checkbox_clicked = st.checkbox(
-                        espec_limpa, value=is_selected, key=checkbox_key)
-
-                    # Atualizar estado apenas se houve mudança
-                    if checkbox_clicked != is_selected:
-                        if checkbox_clicked:
-                            # Adicionar à lista de selecionados
-                            item = {
-                                'classe': classes_list[0] if classes_list else '',
-                                'especificacao': espec
-                            }
-                            if 'especificacoes_selecionadas' not in st.session_state:
-                                st.session_state.especificacoes_selecionadas = []
-
-                            # Verificar se já não existe
-                            if not any(
-                                sel.get('especificacao') == espec and sel.get(
-                                    'classe') == item['classe']
-                                    for sel in st.session_state.especificacoes_selecionadas
-                            ):
-                                st.session_state.especificacoes_selecionadas.append(
-                                    item)
-                        else:
-                            # Remover da lista de selecionados
-                            if 'especificacoes_selecionadas' in st.session_state:
-                                st.session_state.especificacoes_selecionadas = [
-                                    sel for sel in st.session_state.especificacoes_selecionadas
-                                    if not (sel.get('especificacao') == espec and sel.get('classe') == (classes_list[0] if classes_list else ''))
-                                ]
+                    if isinstance(chave_selecao, int):
+                        checkbox_key = f"checkbox_{st.session_state.busca_session_key}{prefixo_chave}_id{chave_selecao}"
+                    else:
+                        checkbox_key = f"checkbox_{st.session_state.busca_session_key}{prefixo_chave}_{classe_card or 'geral'}_{i}"
+
+                    # O checkbox reflete a seleção (O(1)): o mesmo item pode estar em
+                    # outro card, que guarda o valor antigo no próprio widget
+                    is_selected = chave_selecao in selecionadas
+                    if st.session_state.get(checkbox_key) != is_selected:
+                        st.session_state[checkbox_key] = is_selected
+
+                    # Só o checkbox clicado altera a seleção, no callback
+                    st.checkbox(espec_limpa, key=checkbox_key,
+                                on_change=_alternar_especificacao, args=(checkbox_key, chave_selecao))
 
                 # Mostrar contador de seleções
-                if st.session_state.get('especificacoes_selecionadas', []):
+                if selecionadas:
                     st.success(
-                        f"✅ {len(st.session_state.especificacoes_selecionadas)} especificação(ões) selecionada(s)")
+                        f"✅ {len(selecionadas)} especificação(ões) selecionada(s)")
         else:
             st.write("Especificações: Sem especificações")
     else:
@@ -960,8 +974,11 @@ def exibir_especificacoes_pdf(busca, pdf):
 
 def limpar_session_state():
     """Limpa o session_state e cache para logout"""
-    # Limpar cache
-    st.cache_data.clear()
+    # Descartar só as listagens em cache (e cópias delta) lidas com o token deste usuário
+    if st.session_state.get('jwt_token'):
+        from supabase_agent import cache_listas, snapshots_listas
+        cache_listas().invalidar_token(st.session_state.jwt_token)
+        snapshots_listas().descartar_token(st.session_state.jwt_token)
 
     # Limpar cache específico do usuário se existir
     current_user_id = st.session_state.get('current_user_id', None)
@@ -1021,11 +1038,175 @@ def limpar_session_state():
     )
 
 
+def _buscar_no_classificador_ranqueado(especificacoes, termo_busca, limite):
+    """
+    Executa a busca ranqueada (com fallback aproximado) e guarda na sessão
+    apenas os ids compactos dos resultados, resolvidos na renderização.
+    """
+    total, ids = especificacoes.buscar_ranqueado_ids(termo_busca, limite)
+
+    # Sem resultado exato: tenta a busca tolerante a erros de digitação
+    busca_aproximada = False
+    if not total:
+        total, ids = especificacoes.buscar_ranqueado_ids(
+            termo_busca, limite, aproximado=True)
+        busca_aproximada = bool(total)
+
+    # Salvar resultados na sessão para manter as seleções
+    st.session_state.resultados_busca_atual = array('I', ids)
+    st.session_state.total_resultados_busca_atual = total
+    st.session_state.termo_busca_atual = termo_busca
+    st.session_state.busca_aproximada_atual = busca_aproximada
+    st.session_state.limite_resultados_classificador = limite
+
+
+def _exibir_cards_por_classe(especificacoes, ids, prefixo_chave=""):
+    """Resolve os ids no classificador compartilhado e exibe um card por classe"""
+    # Agrupar ids por classe
+    classes_agrupadas = {}
+    for id_item in ids:
+        classes_agrupadas.setdefault(especificacoes.classe(id_item), []).append(id_item)
+
+    # Exibir um card para cada classe (ordenado numericamente)
+    for classe, ids_classe in sorted(classes_agrupadas.items(), key=lambda x: int(x[0])):
+        busca_data = {
+            'classes': [classe],
+            'especificacoes': [especificacoes.especificacoes[i] for i in ids_classe],
+            'ids': ids_classe
+        }
+        exibir_especificacoes_card(busca_data, prefixo_chave=prefixo_chave)
+
+
+def _exibir_resultados_classificador(especificacoes):
+    """Exibe os resultados salvos da busca, agrupados por classe, com os botões de ação"""
+    from classificador_agent import LIMITE_RESULTADOS
+
+    ids = st.session_state.resultados_busca_atual
+    termo_busca = st.session_state.termo_busca_atual
+    total = st.session_state.get('total_resultados_busca_atual', len(ids))
+
+    if st.session_state.get('busca_aproximada_atual', False):
+        st.markdown(
+            f"**🔎 Nenhum resultado exato para '{termo_busca}'. Resultados aproximados ({total} itens):**")
+    else:
+        st.markdown(
+            f"**📋 Produto/Serviço '{termo_busca}' encontrado ({total} itens):**")
+
+    if total > len(ids):
+        st.caption(
+            f"Mostrando os {len(ids)} mais relevantes de {total}. Refine o termo ou carregue mais resultados.")
+
+    _exibir_cards_por_classe(especificacoes, ids)
+
+    if total > len(ids):
+        if st.button(f"➕ Mostrar mais {LIMITE_RESULTADOS} resultados", key="btn_mais_resultados_classificador"):
+            _buscar_no_classificador_ranqueado(
+                especificacoes, termo_busca,
+                st.session_state.get('limite_resultados_classificador', LIMITE_RESULTADOS) + LIMITE_RESULTADOS)
+            st.rerun()
+
+    # Botão para adicionar especificações selecionadas (sempre visível após busca)
+    st.markdown("---")  # Separador visual
+    _botao_adicionar_especificacoes(especificacoes, "btn_adicionar_especificacoes")
+
+
+def _resolver_selecao(especificacoes, chave_selecao):
+    """Converte a chave guardada na seleção (id ou (classe, texto)) em {classe, especificacao}"""
+    if isinstance(chave_selecao, int):
+        return {'classe': especificacoes.classe(chave_selecao),
+                'especificacao': especificacoes.especificacoes[chave_selecao]}
+    classe, especificacao = chave_selecao
+    return {'classe': classe, 'especificacao': especificacao}
+
+
+def _botao_adicionar_especificacoes(especificacoes, chave_botao):
+    """Botão que envia as especificações marcadas para o formulário principal"""
+    import time
+
+    if st.button("📋 Adicionar Especificações Selecionadas", type="primary", key=chave_botao):
+        selecionadas = obter_especificacoes_selecionadas()
+        if selecionadas:
+            # Inicializar seleção acumulada (conjunto ordenado de ids) se não existir
+            if not isinstance(st.session_state.get("classificador_selecionado"), dict):
+                st.session_state.classificador_selecionado = {}
+
+            # Adicionar apenas as especificações selecionadas que ainda não estão na lista
+            itens_adicionados = 0
+            for chave_selecao in selecionadas:
+                if chave_selecao not in st.session_state.classificador_selecionado:
+                    st.session_state.classificador_selecionado[chave_selecao] = None
+                    itens_adicionados += 1
+
+            # Marcar que as especificações devem ser aplicadas ao formulário principal
+            st.session_state.aplicar_especificacoes = True
+            st.session_state.especificacoes_para_aplicar = [
+                _resolver_selecao(especificacoes, chave_selecao) for chave_selecao in selecionadas
+            ]
+
+            # Limpar seleções temporárias (nova chave de sessão desmarca os checkboxes)
+            st.session_state.especificacoes_selecionadas = {}
+            st.session_state.busca_session_key = f"busca_{time.time_ns()}"
+
+            st.success(
+                f"✅ {itens_adicionados} especificação(ões) adicionada(s) e aplicada(s) ao formulário!")
+            st.rerun()
+        else:
+            st.warning(
+                "⚠️ Nenhuma especificação foi selecionada. Selecione pelo menos uma especificação antes de adicionar.")
+
+
+def _render_busca_em_lote_classificador(especificacoes):
+    """Busca em lote: o consultor cola a lista de produtos do cliente e busca todos de uma vez"""
+    from classificador_agent import separar_termos
+
+    with st.expander("📋 Buscar lista de produtos/serviços", expanded=bool(st.session_state.get('resultados_lote_classificador'))):
+        texto_lista = st.text_area(
+            "Cole a lista de produtos/serviços (um por linha ou separados por ponto e vírgula/vírgula):",
+            key="lista_termos_classificador",
+            height=120
+        )
+        if st.button("🔍 Buscar lista", key="btn_buscar_lista_classificador"):
+            termos = separar_termos(texto_lista)
+            if termos:
+                # Na sessão ficam só o total e os ids de cada termo
+                st.session_state.resultados_lote_classificador = {
+                    termo: (total, array('I', ids))
+                    for termo, (total, ids) in especificacoes.buscar_varios_ids(termos).items()
+                }
+            else:
+                st.session_state.resultados_lote_classificador = None
+                st.warning("⚠️ Informe pelo menos um termo.")
+
+        resultados_lote = st.session_state.get('resultados_lote_classificador')
+        if not resultados_lote:
+            return
+
+        sem_resultado = [termo for termo, (total, _) in resultados_lote.items() if not total]
+        if sem_resultado:
+            st.warning("Sem resultados para: " + ", ".join(sem_resultado))
+
+        for posicao, (termo, (total, ids)) in enumerate(resultados_lote.items()):
+            if not total:
+                continue
+            st.markdown(
+                f"**📋 '{termo}' ({total} itens{f', mostrando {len(ids)}' if total > len(ids) else ''}):**")
+            _exibir_cards_por_classe(especificacoes, ids, prefixo_chave=f"_lote{posicao}")
+
+        st.markdown("---")  # Separador visual
+        _botao_adicionar_especificacoes(especificacoes, "btn_adicionar_especificacoes_lote")
+
+
+def _aplicar_sugestao_classificador(sugestao):
+    """Callback: troca o termo pela sugestão escolhida e dispara a busca"""
+    st.session_state.termo_busca_unificado = sugestao
+    st.session_state.buscar_sugestao_classificador = True
+
+
 def render_classificador_inpi():
     """Renderiza o classificador do INPI com campo de busca unificado - FORMULÁRIO SEPARADO"""
     # Carregar dados do classificador com cache otimizado
     try:
-        from classificador_agent import carregar_classificador_inpi_json
+        from classificador_agent import carregar_classificador_inpi_json, LIMITE_RESULTADOS
         especificacoes = carregar_classificador_inpi_json()
         if not especificacoes:
             st.error("❌ Não foi possível carregar o classificador INPI")
@@ -1035,8 +1216,7 @@ def render_classificador_inpi():
         return
 
     # Inicializar especificações selecionadas se não existir
-    if "especificacoes_selecionadas" not in st.session_state:
-        st.session_state.especificacoes_selecionadas = []
+    obter_especificacoes_selecionadas()
 
     # Criar uma chave única para esta sessão de busca
     if "busca_session_key" not in st.session_state:
@@ -1061,138 +1241,113 @@ def render_classificador_inpi():
         buscar_btn = st.button("🔍 Buscar", type="primary",
                                key="btn_buscar_classificador")
 
-    # Processar busca quando o botão for clicado
-    if buscar_btn and termo_busca and len(termo_busca) >= 1:
-        from classificador_agent import buscar_no_classificador
+    # Sugestões de autocompletar para o termo ainda não buscado
+    if termo_busca and not buscar_btn and termo_busca != st.session_state.get('termo_busca_atual'):
+        from classificador_agent import sugerir_termos_classificador
+        sugestoes = [
+            sugestao for sugestao in sugerir_termos_classificador(termo_busca, especificacoes, limite=4)
+            if sugestao.lower() != termo_busca.lower()
+        ]
+        if sugestoes:
+            st.caption("Sugestões:")
+            colunas_sugestoes = st.columns(4)
+            for i, sugestao in enumerate(sugestoes):
+                with colunas_sugestoes[i]:
+                    st.button(sugestao, key=f"btn_sugestao_classificador_{i}",
+                              on_click=_aplicar_sugestao_classificador, args=(sugestao,))
+
+    buscar_sugestao = st.session_state.pop('buscar_sugestao_classificador', False)
+
+    # Processar busca quando o botão for clicado (apenas os mais relevantes vão para a sessão)
+    if (buscar_btn or buscar_sugestao) and termo_busca and len(termo_busca) >= 1:
+        _buscar_no_classificador_ranqueado(
+            especificacoes, termo_busca, LIMITE_RESULTADOS)
+        if not st.session_state.resultados_busca_atual:
+            st.info(
+                f"Nenhum produto/serviço encontrado para '{termo_busca}'.")
 
-        # Busca por palavra/produto com cache
-        resultados = buscar_no_classificador(termo_busca, especificacoes)
+    # Mostrar resultados salvos se existirem (para manter seleções após rerun)
+    if st.session_state.get("resultados_busca_atual"):
+        _exibir_resultados_classificador(especificacoes)
 
-        # Salvar resultados na sessão para manter as seleções
-        st.session_state.resultados_busca_atual = resultados
-        st.session_state.termo_busca_atual = termo_busca
+    # Busca em lote de uma lista colada
+    _render_busca_em_lote_classificador(especificacoes)
 
-        if resultados:
-            st.markdown(
-                f"**📋 Produto/Serviço '{termo_busca}' encontrado ({len(resultados)} itens):**")
-
-            # Agrupar resultados por classe
-            classes_agrupadas = {}
-            for r in resultados:
-                classe = r['classe']
-                especificacao = r['especificacao']
-
-                if classe not in classes_agrupadas:
-                    classes_agrupadas[classe] = []
-                classes_agrupadas[classe].append(especificacao)
-
-            # Exibir um card para cada classe (ordenado numericamente)
-            for classe, especificacoes in sorted(classes_agrupadas.items(), key=lambda x: int(x[0])):
-                busca_data = {
-                    'classes': [classe],
-                    'especificacoes': especificacoes
-                }
-                exibir_especificacoes_card(busca_data)
-
-            # Botão para adicionar especificações selecionadas (sempre visível após busca)
-            st.markdown("---")  # Separador visual
-            if st.button("📋 Adicionar Especificações Selecionadas", type="primary", key="btn_adicionar_especificacoes"):
-                if st.session_state.get('especificacoes_selecionadas', []):
-                    # Inicializar lista se não existir
-                    if "classificador_selecionado" not in st.session_state:
-                        st.session_state.classificador_selecionado = []
-
-                    # Adicionar apenas as especificações selecionadas
-                    itens_adicionados = 0
-                    for item in st.session_state.especificacoes_selecionadas:
-                        # Verificar se já não existe na lista
-                        ja_existe = any(
-                            sel.get('especificacao') == item.get('especificacao') and
-                            sel.get('classe') == item.get('classe')
-                            for sel in st.session_state.classificador_selecionado
-                        )
-
-                        if not ja_existe:
-                            st.session_state.classificador_selecionado.append(
-                                item)
-                            itens_adicionados += 1
-
-                    # Marcar que as especificações devem ser aplicadas ao formulário principal
-                    st.session_state.aplicar_especificacoes = True
-                    st.session_state.especificacoes_para_aplicar = st.session_state.especificacoes_selecionadas.copy()
-
-                    # Limpar seleções temporárias
-                    st.session_state.especificacoes_selecionadas = []
 
-                    st.success(
-                        f"✅ {itens_adicionados} especificação(ões) adicionada(s) e aplicada(s) ao formulário!")
-                    st.rerun()
-                else:
-                    st.warning(
-                        "⚠️ Nenhuma especificação foi selecionada. Selecione pelo menos uma especificação antes de adicionar.")
+def render_alteracao_status_em_lote(registros, rotulo, destinos, aplicar, chave):
+    """
+    Formulário do admin para mover vários registros de uma aba de status de uma vez.
 
-    # Mostrar resultados salvos se existirem (para manter seleções após rerun)
-    elif "resultados_busca_atual" in st.session_state and st.session_state.resultados_busca_atual:
-        resultados = st.session_state.resultados_busca_atual
-        termo_busca = st.session_state.termo_busca_atual
+    rotulo(registro) gera o texto de cada opção, destinos é uma lista de
+    (status, texto) e aplicar(ids, status) persiste a mudança em uma única
+    requisição, retornando quantos registros foram alterados.
+    """
+    if not registros or not destinos:
+        return
+    rotulos = {registro['id']: rotulo(registro) for registro in registros}
+    textos_destino = dict(destinos)
+
+    with st.expander(f"☑️ Alterar status em lote ({len(registros)})"):
+        # Formulário: marcar os itens não dispara rerun, só o envio
+        with st.form(key=f"lote_{chave}", clear_on_submit=True):
+            ids = st.multiselect("Selecione os itens", list(rotulos),
+                                 format_func=rotulos.get, key=f"lote_ids_{chave}")
+            novo_status = st.selectbox("Novo status", list(textos_destino),
+                                       format_func=textos_destino.get, key=f"lote_status_{chave}")
+            enviar = st.form_submit_button("Aplicar aos selecionados", type="primary")
+
+        if enviar:
+            if not ids:
+                st.warning("⚠️ Selecione pelo menos um item.")
+            elif aplicar(ids, novo_status):
+                st.rerun()
 
-        st.markdown(
-            f"**📋 Produto/Serviço '{termo_busca}' encontrado ({len(resultados)} itens):**")
-
-        # Agrupar resultados por classe
-        classes_agrupadas = {}
-        for r in resultados:
-            classe = r['classe']
-            especificacao = r['especificacao']
-
-            if classe not in classes_agrupadas:
-                classes_agrupadas[classe] = []
-            classes_agrupadas[classe].append(especificacao)
-
-        # Exibir um card para cada classe (ordenado numericamente)
-        for classe, especificacoes in sorted(classes_agrupadas.items(), key=lambda x: int(x[0])):
-            busca_data = {
-                'classes': [classe],
-                'especificacoes': especificacoes
-            }
-            exibir_especificacoes_card(busca_data)
 
-        # Botão para adicionar especificações selecionadas (sempre visível após busca)
-        st.markdown("---")  # Separador visual
-        if st.button("📋 Adicionar Especificações Selecionadas", type="primary", key="btn_adicionar_especificacoes_saved"):
-            if st.session_state.get('especificacoes_selecionadas', []):
-                # Inicializar lista se não existir
-                if "classificador_selecionado" not in st.session_state:
-                    st.session_state.classificador_selecionado = []
-
-                # Adicionar apenas as especificações selecionadas
-                itens_adicionados = 0
-                for item in st.session_state.especificacoes_selecionadas:
-                    # Verificar se já não existe na lista
-                    ja_existe = any(
-                        sel.get('especificacao') == item.get('especificacao') and
-                        sel.get('classe') == item.get('classe')
-                        for sel in st.session_state.classificador_selecionado
-                    )
-
-                    if not ja_existe:
-                        st.session_state.classificador_selecionado.append(
-                            item)
-                        itens_adicionados += 1
-
-                # Marcar que as especificações devem ser aplicadas ao formulário principal
-                st.session_state.aplicar_especificacoes = True
-                st.session_state.especificacoes_para_aplicar = st.session_state.especificacoes_selecionadas.copy()
-
-                # Limpar seleções temporárias
-                st.session_state.especificacoes_selecionadas = []
-
-                st.success(
-                    f"✅ {itens_adicionados} especificação(ões) adicionada(s) e aplicada(s) ao formulário!")
-                st.rerun()
-            else:
-                st.warning(
-                    "⚠️ Nenhuma especificação foi selecionada. Selecione pelo menos uma especificação antes de adicionar.")
+def render_atualizacao_automatica(tabelas, chave):
+    """
+    Com o feed de alterações ativo (ver feed_alteracoes.py), faz o rerun da página
+    quando chega uma alteração das tabelas. As listas já foram atualizadas em
+    memória pelo feed, então o rerun não relê as tabelas do Supabase.
+    """
+    from feed_alteracoes import feed_alteracoes, SUPABASE_FEED_VERIFICAR
+
+    feed = feed_alteracoes()
+    if not feed:
+        return
+    estado = f"versao_feed_{chave}"
+    st.session_state[estado] = feed.versao(tabelas)
+
+    @st.fragment(run_every=SUPABASE_FEED_VERIFICAR)
+    def verificar_alteracoes():
+        if feed.versao(tabelas) != st.session_state.get(estado):
+            st.rerun()
+
+    verificar_alteracoes()
+
+
+def render_painel_chamadas():
+    """
+    Painel de diagnóstico (SUPABASE_PAINEL_CHAMADAS=1): chamadas ao Supabase do
+    rerun anterior desta sessão e os histogramas da página (ver instrumentacao.py).
+    """
+    if os.getenv("SUPABASE_PAINEL_CHAMADAS", "") not in ("1", "true"):
+        return
+    from instrumentacao import medidor_chamadas
+
+    rerun = medidor_chamadas().ultimo_rerun()
+    if not rerun:
+        return
+    chamadas = rerun["chamadas"]
+    with st.expander(f"📡 Supabase: {len(chamadas)} chamada(s) no último rerun"):
+        st.caption(f"{rerun['pagina']} · {sum(c['duracao_ms'] for c in chamadas):.0f} ms em rede · "
+                   f"{sum(c['recebidos'] for c in chamadas) / 1024:.1f} KB")
+        for chamada in chamadas:
+            st.text(f"{chamada['modelo']}\n  {chamada['status']} · {chamada['duracao_ms']:.0f} ms · "
+                    f"{chamada['recebidos']} B")
+        pagina = medidor_chamadas().resumo()["paginas"].get(rerun["pagina"])
+        if pagina:
+            st.caption(f"Chamadas por rerun em {pagina['reruns']} rerun(s): "
+                       f"p50 ≤ {pagina['chamadas_por_rerun']['p50']}, p95 ≤ {pagina['chamadas_por_rerun']['p95']}")
 
 
 def limpar_cache_completo():